@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+フォルダ内の音声ファイルをまとめて文字起こしするコマンド（GUI なし）
+
+使い方
+------
+    python batch_transcribe.py recordings/
+    python batch_transcribe.py "recordings/**/*.wav" --workers 4 --model whisper-large-v3-turbo
+
+- 音声の読み込み（デコード・16kHz への変換）はプロセスプールで並列に行い、
+  モデルはこのプロセスの 1 つのワーカーだけで実行する。
+- 結果は出力先（settings.json の transcription_dir）に、入力のフォルダ構成とファイル名（拡張子を含む）の
+  ままで書き出す（recordings/a/x.wav → transcriptions/a/x.wav.txt）。
+- 出力先に結果がすでにあるファイルは飛ばすため、途中で止めても再実行すれば続きから処理できる。
+- 終了時に処理速度（ファイル数/分, 音声秒数/経過秒数）を表示し、batch_summary.json に書き出す。
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models import audio2text
+from models.audio_io import SAMPLE_RATE, load_audio
+from models.data_model import DataModel
+
+# 対象とする音声ファイルの拡張子
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".mp4")
+
+
+def find_audio_files(target: str) -> List[str]:
+    """
+    ディレクトリまたは glob パターンから音声ファイルの一覧を返す
+
+    Parameters
+    ----------
+    target : str
+        ディレクトリのパス、または glob パターン（"**" 可）
+
+    Returns
+    -------
+    List[str]
+        音声ファイルのパス（名前順）
+    """
+    if os.path.isdir(target):
+        paths = []
+        for root, _, files in os.walk(target):
+            paths.extend(os.path.join(root, name) for name in files)
+    else:
+        paths = glob.glob(target, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(p))
+
+
+def input_root(target: str) -> str:
+    """
+    ディレクトリまたは glob パターンの、出力先のフォルダ構成の基準にするフォルダを返す
+
+    Notes
+    -----
+    - glob パターンの場合は、ワイルドカードを含む最初の部分より前のフォルダを返す（"recordings/**/*.wav" → "recordings"）。
+    """
+    if os.path.isdir(target):
+        return target
+    parts = []
+    for part in os.path.normpath(target).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        # ワイルドカードを含まない（ファイル 1 つを指定した）場合はそのファイルのフォルダ
+        parts = parts[:-1]
+    return os.sep.join(parts) or os.curdir
+
+
+def output_path_for(audio_path: str, output_dir: str, root: str) -> str:
+    """
+    音声ファイルに対応する文字起こし結果のパスを返す
+
+    Parameters
+    ----------
+    audio_path : str
+        音声ファイルのパス
+    output_dir : str
+        文字起こし結果の保存先フォルダ
+    root : str
+        入力の基準のフォルダ（input_root の戻り値）
+
+    Returns
+    -------
+    str
+        root からの相対パスを output_dir の下に写し、拡張子を残して ".txt" を付けたパス
+        （別のフォルダの同じ名前のファイルや、拡張子だけが違うファイルが同じ結果にならない）
+    """
+    relative = os.path.relpath(audio_path, root)
+    if relative.startswith(os.pardir):
+        # 基準のフォルダの外（シンボリックリンクの先など）はフォルダ構成を写せないので、絶対パスで区別する
+        relative = os.path.abspath(audio_path).lstrip(os.sep)
+    return os.path.join(output_dir, f"{relative}.txt")
+
+
+def _decode(audio_path: str) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    """プロセスプールで実行される音声の読み込み（失敗した場合はエラー内容を返す）"""
+    try:
+        return audio_path, load_audio(audio_path, SAMPLE_RATE), None
+    except Exception as e:
+        return audio_path, None, str(e)
+
+
+def _decoded_in_parallel(paths: List[str], workers: int) -> Iterator[Tuple[str, Optional[np.ndarray], Optional[str]]]:
+    """
+    音声をプロセスプールで読み込み、読み込めたものから順に返す
+
+    Notes
+    -----
+    - 同時に読み込む数は workers * 2 までに抑え、メモリ使用量が増えすぎないようにする。
+    """
+    pending = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for path in pending:
+            in_flight.add(executor.submit(_decode, path))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_path = next(pending, None)
+                if next_path is not None:
+                    in_flight.add(executor.submit(_decode, next_path))
+                yield future.result()
+
+
+def _write_text(path: str, text: str) -> None:
+    """途中で止まっても中途半端なファイルが残らないよう、一時ファイル経由で書き込む"""
+    os.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def run_batch(target: str, output_dir: str, model_name: str, workers: int,
+              backend: Optional[str] = None) -> Dict[str, float]:
+    """
+    フォルダ内の音声ファイルを文字起こしする
+
+    Parameters
+    ----------
+    target : str
+        ディレクトリのパス、または glob パターン
+    output_dir : str
+        文字起こし結果の保存先フォルダ
+    model_name : str
+        使用するモデル名
+    workers : int
+        音声の読み込みに使うプロセス数
+    backend : str, optional
+        使用するバックエンド（デフォルト: audio2text.DEFAULT_BACKEND）
+
+    Returns
+    -------
+    Dict[str, float]
+        処理結果の集計（処理数・スキップ数・失敗数・処理速度など）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = find_audio_files(target)
+    root = input_root(target)
+    todo = [p for p in paths if not os.path.exists(output_path_for(p, output_dir, root))]
+    skipped = len(paths) - len(todo)
+    print(f"{len(paths)} 件中 {skipped} 件は処理済みのため飛ばします。残り {len(todo)} 件")
+
+    # 最初のファイルが読み込まれる間にモデルを読み込んでおく
+    audio2text.preload_model(model_name, backend)
+
+    start = time.perf_counter()
+    done_count = 0
+    failed: List[str] = []
+    audio_seconds = 0.0
+    decode_seconds = 0.0
+
+    for audio_path, samples, error in _decoded_in_parallel(todo, workers):
+        if error is not None:
+            # 読み込みに失敗したファイルは記録して次へ進む
+            print(f"読み込みに失敗しました: {audio_path}: {error}")
+            failed.append(audio_path)
+            continue
+
+        try:
+            result = audio2text.transcribe(samples, model_name=model_name, backend=backend)
+        except Exception as e:
+            print(f"文字起こしに失敗しました: {audio_path}: {e}")
+            failed.append(audio_path)
+            continue
+
+        _write_text(output_path_for(audio_path, output_dir, root), result["text"])
+        done_count += 1
+        audio_seconds += len(samples) / SAMPLE_RATE
+        decode_seconds += result["decode_seconds"]
+        print(f"[{done_count}/{len(todo)}] {audio_path}")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "model_name": model_name,
+        "backend": audio2text.get_transcriber(model_name, backend).backend,
+        "workers": workers,
+        "total_files": len(paths),
+        "transcribed": done_count,
+        "skipped": skipped,
+        "failed": len(failed),
+        "wall_seconds": elapsed,
+        "audio_seconds": audio_seconds,
+        "decode_seconds": decode_seconds,
+        "files_per_minute": done_count / elapsed * 60 if elapsed > 0 else 0.0,
+        "audio_seconds_per_wall_second": audio_seconds / elapsed if elapsed > 0 else 0.0,
+    }
+    with open(os.path.join(output_dir, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+
+    print(
+        f"完了: {done_count} 件 / 失敗: {len(failed)} 件 / {elapsed:.1f}秒\n"
+        f"  {summary['files_per_minute']:.1f} ファイル/分, "
+        f"音声 {summary['audio_seconds_per_wall_second']:.2f} 秒/経過秒"
+    )
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    data_model = DataModel()
+    parser = argparse.ArgumentParser(description="フォルダ内の音声ファイルをまとめて文字起こしします。")
+    parser.add_argument("target", help="音声ファイルのあるディレクトリ、または glob パターン")
+    parser.add_argument("--output-dir", default=data_model.get("transcription_dir", "transcriptions"),
+                        help="文字起こし結果の保存先（デフォルト: settings.json の transcription_dir）")
+    parser.add_argument("--model", default=data_model.get("model_name", audio2text.DEFAULT_MODEL_NAME),
+                        help="使用するモデル名（デフォルト: settings.json の model_name）")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) - 1, 1),
+                        help="音声の読み込みに使うプロセス数")
+    parser.add_argument("--backend", default=data_model.get("backend", audio2text.DEFAULT_BACKEND),
+                        help="文字起こしのバックエンド（mlx / cpu / stub / auto）")
+    parser.add_argument("--threads", type=int, default=data_model.get("num_threads", 0),
+                        help="推論に使うスレッド数（0 はバックエンドの既定値）")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        audio2text.configure_backend(args.backend, num_threads=args.threads)
+    summary = run_batch(args.target, args.output_dir, args.model, args.workers, args.backend)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
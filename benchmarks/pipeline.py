@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+録音 → 文字起こし → 保存 の各段階の処理時間を計測するベンチマーク
+
+使い方
+------
+    # 合成音声（10秒, 60秒, 300秒）と stub バックエンドで計測し、JSON に書き出す
+    python -m benchmarks.pipeline run --output bench_base.json
+
+    # 実際のモデルで計測する（モデルの大きさごとに比較）
+    python -m benchmarks.pipeline run --backend mlx --models whisper-base-mlx whisper-large-v3-turbo
+
+    # 手元の録音（フィクスチャ）も計測に加える
+    python -m benchmarks.pipeline run --fixture recordings/meeting.wav
+
+    # 録音の保存形式（WAV / FLAC / Opus）ごとのファイルの大きさと読み込み時間だけを比べる
+    python -m benchmarks.pipeline run --codecs flac opus --output bench_storage.json
+
+    # 録音ボタンを押してから最初のサンプルが届くまでを、実際のマイクでも計測する
+    python -m benchmarks.pipeline run --mic --lengths 10 --models whisper-base-mlx
+
+    # 2 回の計測結果を比べ、遅くなった段階・エラーになった段階があれば終了コード 1 を返す
+    python -m benchmarks.pipeline compare bench_base.json bench_new.json --threshold 0.1
+
+- マイクは使わない（--mic を除く）。録音の段階は ffmpeg のファイル入力（record.file_input）で、
+  録音開始の待ち時間は実時間で生成する lavfi のサイン波（record.sine_input）で代用する。
+- キャッシュ・文字起こしストア・保存先は一時フォルダに切り替えるため、アプリのデータは変わらない。
+- stub バックエンドはモデルを実行しないため、モデル以外の処理（読み込み・変換・保存）の時間を測れる。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from models import audio2text, naming, save
+from models.audio_io import SAMPLE_RATE, load_audio, save_wav
+from models.transcript_cache import TranscriptCache, set_default_cache
+from models.transcript_store import TranscriptStore, set_default_store
+
+# 計測する音声の長さ(秒)
+DEFAULT_LENGTHS = [10, 60, 300]
+
+# get_unique_filename を計測するフォルダ内のファイル数
+DEFAULT_FOLDER_SIZES = [1000, 10000, 50000]
+
+# 比べる録音の保存形式（record.STORAGE_CODECS）
+DEFAULT_CODECS = ["wav", "flac", "opus"]
+
+# compare で「遅くなった」とみなす変化率と、無視する差(秒)（計測の揺れで誤検出しないため）
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_SECONDS = 0.002
+
+
+# ==========================================================
+# 合成音声
+# ==========================================================
+def synthetic_speech(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """
+    話し声に似た合成音声を作る（1.5 秒の発話と 0.5 秒の無音のくり返し）
+
+    Parameters
+    ----------
+    seconds : float
+        音声の長さ(秒)
+    sample_rate : int
+        サンプリングレート
+    seed : int
+        雑音の乱数のシード（同じシードなら同じ音声になる）
+
+    Returns
+    -------
+    np.ndarray
+        -1.0〜1.0 の float32 のサンプル列
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    # 基本周波数がゆっくり揺れる声帯音（倍音つき）に、音節くらいの速さ（4Hz）の強弱を付ける
+    f0 = 120.0 + 30.0 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 9))
+    envelope = 0.5 * (1.0 + np.sin(2 * np.pi * 4.0 * t))
+    gate = (t % 2.0) < 1.5
+    audio = 0.1 * voiced * envelope * gate + 0.003 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+# ==========================================================
+# 計測
+# ==========================================================
+class BenchmarkRunner:
+    """
+    各段階の処理時間を計測し、結果を JSON にまとめるクラス。
+
+    Notes
+    -----
+    - 各段階を repeat 回実行し、中央値・最小値・最大値を記録する。
+    - 計測中は各関数の print を捨てる（verbose=True の場合は表示する）。
+    """
+
+    def __init__(self, work_dir: str, backend: str = "stub", repeat: int = 3, verbose: bool = False) -> None:
+        self.work_dir = work_dir
+        self.backend = backend
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results: List[Dict[str, Any]] = []
+
+    def _quiet(self):
+        return contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    def measure(self, stage: str, params: Dict[str, Any], fn: Callable[[], Any],
+                setup: Optional[Callable[[], Any]] = None, repeat: Optional[int] = None,
+                audio_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        fn の処理時間を計測して結果に加える
+
+        Parameters
+        ----------
+        stage : str
+            段階の名前（"audio_to_text" など）
+        params : Dict[str, Any]
+            条件（音声の長さ・モデル名など、compare で同じ計測を見つけるのに使う）
+        fn : Callable[[], Any]
+            計測する処理
+        setup : Callable[[], Any], optional
+            毎回 fn の前に実行する処理（計測しない）
+        repeat : int, optional
+            実行回数（デフォルト: self.repeat）
+        audio_seconds : float, optional
+            音声の長さ(秒)。指定すると実時間係数（処理時間 / 音声の長さ）も記録する
+
+        Returns
+        -------
+        Dict[str, Any]
+            計測結果
+        """
+        runs = []
+        error = None
+        for _ in range(repeat or self.repeat):
+            try:
+                with self._quiet():
+                    if setup is not None:
+                        setup()
+                    start = time.perf_counter()
+                    fn()
+                    runs.append(time.perf_counter() - start)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                break
+
+        result: Dict[str, Any] = {"stage": stage, "params": params, "runs": runs}
+        if error is not None:
+            result["error"] = error
+            print(f"  {stage:<28} {_format_params(params):<40} 失敗: {error}")
+        else:
+            result.update(median=statistics.median(runs), min=min(runs), max=max(runs))
+            if audio_seconds:
+                result["real_time_factor"] = result["median"] / audio_seconds
+            print(f"  {stage:<28} {_format_params(params):<40} {result['median'] * 1000:10.2f} ms")
+        self.results.append(result)
+        return result
+
+    # ---------------------------------------------------------
+    # 各段階
+    # ---------------------------------------------------------
+    def bench_record(self, path: str, seconds: float, label: str) -> None:
+        """record_audio_array（マイクの代わりに ffmpeg のファイル入力）"""
+        from models import record
+
+        self.measure("record_audio_array", {"audio": label, "seconds": seconds},
+                     lambda: record.record_audio_array(seconds, source=record.file_input(path)),
+                     audio_seconds=seconds)
+
+    def bench_record_start(self, label: str, make_source: Callable[[], Any], pre_roll: float) -> None:
+        """
+        録音ボタンを押してから最初のサンプルが届くまでの時間
+
+        - record_start_cold: 押すたびに ffmpeg を起動する（これまでの録音と同じ）
+        - record_start_warm: 常時録音（record.WarmCapture）から切り出す。pre_roll > 0 なら押した時点で
+          直前の音声が録音に入っているので、待ち時間は録音先の確保と直前の音声の書き込みだけになる
+        """
+        from models import record
+
+        def cold():
+            capture = record.WarmCapture(make_source(), pre_roll=0.0).start()
+            try:
+                if not capture.start_clip(1.0, pre_roll=0.0).wait_first_sample(10.0):
+                    raise RuntimeError("最初のサンプルが届きません。")
+            finally:
+                capture.stop()
+
+        def warm(seconds: float):
+            clip = capture.start_clip(1.0, pre_roll=seconds)
+            if len(clip) == 0 and not clip.wait_first_sample(10.0):
+                raise RuntimeError("最初のサンプルが届きません。")
+            clip.stop()
+
+        self.measure("record_start_cold", {"source": label}, cold)
+        capture = record.WarmCapture(make_source(), pre_roll=pre_roll).start()
+        try:
+            # リングバッファが直前の音声で埋まるまで待つ
+            time.sleep(pre_roll + 0.2)
+            for seconds in (0.0, pre_roll):
+                self.measure("record_start_warm", {"source": label, "pre_roll": seconds}, lambda: warm(seconds))
+        finally:
+            capture.stop()
+
+    def bench_storage(self, path: str, seconds: float, label: str, codec: str) -> None:
+        """保存形式ごとの、録音しながらのエンコード・ファイルの大きさ・読み込み（16kHz への変換）"""
+        from models import record
+
+        params = {"audio": label, "seconds": seconds, "codec": codec}
+        stored = os.path.join(self.work_dir, f"{label}_stored.{record.codec_extension(codec)}")
+        result = self.measure("record_encoded", params,
+                              lambda: record.record_audio_array(seconds, source=record.file_input(path),
+                                                                output_filename=stored, codec=codec),
+                              audio_seconds=seconds)
+        if "median" not in result:
+            return
+        size = os.path.getsize(stored)
+        result.update(bytes=size, bytes_per_second=size / seconds)
+        wav_bytes = seconds * SAMPLE_RATE * 2
+        print(f"  {'':<28} {'':<40} {size / 1024:10.1f} KB（WAV の {size / wav_bytes * 100:.0f}%）")
+
+        self.measure("load_audio", params, lambda: load_audio(stored), audio_seconds=seconds)
+
+    def bench_model_load(self, model_name: str) -> None:
+        """モデルの読み込み（読み込み済みのモデルを捨ててから読み込む）"""
+        key = audio2text.model_key(model_name, self.backend)
+        self.measure("model_load", {"model": model_name, "backend": self.backend},
+                     lambda: audio2text.get_transcriber(model_name, self.backend),
+                     setup=lambda: audio2text.get_registry().evict(key))
+
+    def bench_transcribe(self, path: str, seconds: float, label: str, model_name: str) -> None:
+        """audio_to_text（キャッシュなし / キャッシュあり）と save_transcription_to_file"""
+        params = {"audio": label, "seconds": seconds, "model": model_name, "backend": self.backend}
+        self.measure("audio_to_text", params,
+                     lambda: audio2text.audio_to_text(path, model_name=model_name, backend=self.backend,
+                                                      use_cache=False),
+                     audio_seconds=seconds)
+
+        # 1 回目でキャッシュに入れ、2 回目以降を計測する
+        with self._quiet():
+            audio2text.audio_to_text(path, model_name=model_name, backend=self.backend)
+        self.measure("audio_to_text_cached", params,
+                     lambda: audio2text.audio_to_text(path, model_name=model_name, backend=self.backend),
+                     audio_seconds=seconds)
+
+        output_dir = os.path.join(self.work_dir, "outputs")
+        self.measure("save_transcription_to_file", params,
+                     lambda: save.save_transcription_to_file(path, f"{label}.txt", output_dir=output_dir,
+                                                             model_name=model_name, backend=self.backend),
+                     audio_seconds=seconds)
+
+    def bench_unique_filename(self, n_files: int) -> None:
+        """大きなフォルダでの get_unique_filename（最初の 1 回と、2 回目以降の 1 回あたり）"""
+        folder = os.path.join(self.work_dir, f"names_{n_files}")
+        os.makedirs(folder, exist_ok=True)
+        for i in range(n_files):
+            open(os.path.join(folder, "result.txt" if i == 0 else f"result({i}).txt"), "w").close()
+
+        # 最初の 1 回はフォルダの走査（索引の作成）を含むため、毎回新しい索引で計測する
+        self.measure("get_unique_filename_first", {"files": n_files},
+                     lambda: naming.FolderIndex(folder).peek("result", "txt"))
+
+        calls = 100
+
+        def _many():
+            for _ in range(calls):
+                save.get_unique_filename(folder)
+
+        result = self.measure("get_unique_filename_100", {"files": n_files}, _many)
+        if "median" in result:
+            result["per_call"] = result["median"] / calls
+
+    # ---------------------------------------------------------
+    # まとめて実行
+    # ---------------------------------------------------------
+    def run(self, lengths: List[float], models: List[str], fixtures: List[str],
+            folder_sizes: List[int], skip_record: bool = False,
+            codecs: Optional[List[str]] = None, microphone: bool = False) -> Dict[str, Any]:
+        """
+        すべての段階を計測し、結果の辞書を返す
+
+        Parameters
+        ----------
+        lengths : List[float]
+            合成音声の長さ(秒)
+        models : List[str]
+            計測するモデル名
+        fixtures : List[str]
+            合成音声に加えて計測する音声ファイル
+        folder_sizes : List[int]
+            get_unique_filename を計測するフォルダ内のファイル数
+        skip_record : bool
+            True の場合は録音の段階を計測しない（ffmpeg が無い環境など）
+        codecs : List[str], optional
+            比べる録音の保存形式（デフォルト: DEFAULT_CODECS）
+        microphone : bool
+            True の場合は録音開始の待ち時間を実際のマイクでも計測する
+
+        Returns
+        -------
+        Dict[str, Any]
+            "meta"（実行環境）と "results"（各計測）を含む辞書
+        """
+        audio_files = []
+        for seconds in lengths:
+            path = os.path.join(self.work_dir, f"synthetic_{seconds:g}s.wav")
+            save_wav(path, synthetic_speech(seconds))
+            audio_files.append((path, float(seconds), f"synthetic_{seconds:g}s"))
+        for fixture in fixtures:
+            seconds = len(load_audio(fixture)) / SAMPLE_RATE
+            audio_files.append((os.path.abspath(fixture), seconds, os.path.basename(fixture)))
+
+        if not skip_record:
+            print("録音（ファイル入力）")
+            for path, seconds, label in audio_files:
+                self.bench_record(path, seconds, label)
+
+            print("録音開始の待ち時間（ボタンを押してから最初のサンプルまで）")
+            from models import record
+            self.bench_record_start("lavfi_sine", lambda: record.sine_input(realtime=True),
+                                    record.DEFAULT_PRE_ROLL_SECONDS)
+            if microphone:
+                self.bench_record_start("microphone", record.microphone_input, record.DEFAULT_PRE_ROLL_SECONDS)
+
+            print("録音の保存形式（ファイルの大きさと読み込み時間）")
+            for codec in (DEFAULT_CODECS if codecs is None else codecs):
+                for path, seconds, label in audio_files:
+                    self.bench_storage(path, seconds, label, codec)
+
+        for model_name in models:
+            print(f"文字起こし・保存（{self.backend}:{model_name}）")
+            self.bench_model_load(model_name)
+            for path, seconds, label in audio_files:
+                self.bench_transcribe(path, seconds, label, model_name)
+
+        print("保存ファイル名の決定")
+        for n_files in folder_sizes:
+            self.bench_unique_filename(n_files)
+
+        return {"meta": _environment(self.backend), "results": self.results}
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return ", ".join(f"{key}={value}" for key, value in params.items())
+
+
+def _environment(backend: str) -> Dict[str, Any]:
+    """計測した環境（比較するときに条件が同じか確認するため）"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "backend": backend,
+        "commit": commit,
+    }
+
+
+# ==========================================================
+# 比較
+# ==========================================================
+def _result_key(result: Dict[str, Any]) -> str:
+    return f"{result['stage']}[{_format_params(result['params'])}]"
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            min_seconds: float = DEFAULT_MIN_SECONDS) -> List[Dict[str, Any]]:
+    """
+    2 回の計測結果を比べ、同じ条件の計測ごとに変化を返す
+
+    Parameters
+    ----------
+    base : Dict[str, Any]
+        基準の計測結果（run の出力）
+    new : Dict[str, Any]
+        比べる計測結果
+    threshold : float
+        中央値がこの割合を超えて増えたら「遅くなった」とみなす（0.1 = 10%）
+    min_seconds : float
+        差がこの秒数より小さい場合は、割合が大きくても変化なしとみなす
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        "key", "base", "new", "change", "status"（"regression", "improvement", "same", "failed", "missing"）の辞書。
+        "failed" は基準では計測できていた段階が今回はエラーになったもの（"error" にエラーの内容）
+    """
+    base_results = {_result_key(r): r for r in base["results"] if "median" in r}
+    rows = []
+    for result in new["results"]:
+        key = _result_key(result)
+        before = base_results.get(key)
+        if before is not None and "median" not in result:
+            rows.append({"key": key, "base": before["median"], "new": None, "change": None, "status": "failed",
+                         "error": result.get("error")})
+            continue
+        if before is None or "median" not in result:
+            rows.append({"key": key, "base": None, "new": result.get("median"), "change": None, "status": "missing"})
+            continue
+        diff = result["median"] - before["median"]
+        change = diff / before["median"] if before["median"] > 0 else 0.0
+        if abs(diff) < min_seconds or abs(change) <= threshold:
+            status = "same"
+        else:
+            status = "regression" if diff > 0 else "improvement"
+        rows.append({"key": key, "base": before["median"], "new": result["median"], "change": change,
+                     "status": status})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """compare の結果を表で表示する"""
+    labels = {"regression": "遅くなった", "improvement": "速くなった", "same": "", "failed": "失敗した",
+              "missing": "比較対象なし"}
+    print(f"{'計測':<72} {'基準[ms]':>10} {'今回[ms]':>10} {'変化':>8}")
+    for row in rows:
+        base = f"{row['base'] * 1000:10.2f}" if row["base"] is not None else f"{'-':>10}"
+        new = f"{row['new'] * 1000:10.2f}" if row["new"] is not None else f"{'-':>10}"
+        change = f"{row['change'] * 100:+7.1f}%" if row["change"] is not None else f"{'-':>8}"
+        print(f"{row['key']:<72} {base} {new} {change}  {labels[row['status']]}")
+        if row["status"] == "failed":
+            print(f"    {row['error']}")
+    regressions = sum(row["status"] == "regression" for row in rows)
+    failures = sum(row["status"] == "failed" for row in rows)
+    print(f"遅くなった計測: {regressions} 件 / 失敗した計測: {failures} 件")
+
+
+# ==========================================================
+# コマンドライン
+# ==========================================================
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="録音 → 文字起こし → 保存 の処理時間を計測します。")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="計測して JSON に書き出す")
+    run_parser.add_argument("--output", default="bench_results.json", help="結果の JSON ファイル")
+    run_parser.add_argument("--backend", default="stub", help="文字起こしのバックエンド（stub, mlx, cpu, auto）")
+    run_parser.add_argument("--models", nargs="+", default=[audio2text.DEFAULT_MODEL_NAME], help="計測するモデル名")
+    run_parser.add_argument("--lengths", nargs="+", type=float, default=DEFAULT_LENGTHS,
+                            help="合成音声の長さ(秒)")
+    run_parser.add_argument("--fixture", action="append", default=[], help="計測に加える音声ファイル（複数指定可）")
+    run_parser.add_argument("--folder-sizes", nargs="+", type=int, default=DEFAULT_FOLDER_SIZES,
+                            help="get_unique_filename を計測するフォルダ内のファイル数")
+    run_parser.add_argument("--repeat", type=int, default=3, help="各計測の実行回数")
+    run_parser.add_argument("--stub-rtf", type=float, default=0.0,
+                            help="stub バックエンドで推論時間を模擬する（音声 1 秒あたりの秒数）")
+    run_parser.add_argument("--codecs", nargs="*", default=DEFAULT_CODECS,
+                            help="比べる録音の保存形式（wav, flac, opus）")
+    run_parser.add_argument("--skip-record", action="store_true", help="録音の段階を計測しない")
+    run_parser.add_argument("--mic", action="store_true", help="録音開始の待ち時間を実際のマイクでも計測する")
+    run_parser.add_argument("--verbose", action="store_true", help="各処理の出力を表示する")
+
+    compare_parser = sub.add_parser("compare", help="2 回の計測結果を比べる")
+    compare_parser.add_argument("base", help="基準の結果 JSON")
+    compare_parser.add_argument("new", help="比べる結果 JSON")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="遅くなったとみなす変化率（0.1 = 10%%）")
+    compare_parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                                help="これより小さい差は無視する(秒)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, "r", encoding="utf-8") as f:
+            new = json.load(f)
+        if base["meta"].get("platform") != new["meta"].get("platform"):
+            print("注意: 計測した環境が異なります。")
+        rows = compare(base, new, args.threshold, args.min_seconds)
+        print_comparison(rows)
+        return 1 if any(row["status"] in ("regression", "failed") for row in rows) else 0
+
+    if args.backend == "stub" and args.stub_rtf:
+        audio2text.configure_backend("stub", seconds_per_audio_second=args.stub_rtf)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    # キャッシュと文字起こしストアを一時フォルダに切り替える（アプリのデータを汚さないため）
+    set_default_cache(TranscriptCache(os.path.join(work_dir, "cache")))
+    store = TranscriptStore(os.path.join(work_dir, "transcripts.db"))
+    set_default_store(store)
+    try:
+        runner = BenchmarkRunner(work_dir, backend=args.backend, repeat=args.repeat, verbose=args.verbose)
+        report = runner.run(args.lengths, args.models, args.fixture, args.folder_sizes, args.skip_record,
+                            args.codecs, args.mic)
+    finally:
+        set_default_cache(None)
+        set_default_store(None)
+        store.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"計測結果を保存しました: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
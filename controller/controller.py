@@ -1,59 +1,584 @@
 # controller.py
 
-from models import record
-from models import audio2text
-from models import save
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from models import instrumentation
+from models.data_model import DataModel
+from controller.job_queue import JobContext, JobQueue
+from controller.session_manager import DEFAULT_MAX_ACTIVE, Session, SessionLimitError, SessionManager, transcript_text
+
+# 録音・文字起こし・保存のモジュール（ffmpeg, numpy, mlx_whisper などを読み込む）は
+# 起動を速くするため、使う直前（または warm_up のバックグラウンド読み込み）で import する
+if TYPE_CHECKING:
+    from models.live_transcribe import LiveSegment
 
 
 class AudioController:
     """
     UIとモデルの橋渡し役（Controller）
     各ボタン（録音 / 文字起こし / 保存）の処理を分割して実行する。
+
+    重い処理（録音・文字起こし・保存）は JobQueue でワーカースレッドに渡し、
+    完了時のコールバック（UI スレッドで呼ばれる）で UI を更新する。
+
+    録音ごとにセッション（SessionManager）を作り、録音・文字起こし結果・状態はセッションに持たせる。
+    前の録音の文字起こし・保存を待たずに次の録音を始められる。
+
+    録音・文字起こしのモジュールは作成時には読み込まず、warm_up() のバックグラウンド読み込みか
+    最初の使用時に読み込む（ウィンドウを先に表示するため）。
     """
 
-    def __init__(self, ui):
+    def __init__(self, ui, data_model: DataModel = None, job_queue: Optional[JobQueue] = None):
         self.ui = ui
-        self.audio_filename = "record_audio_output.wav"      # 録音ファイルの固定名
+        self.data_model = data_model or DataModel()  # settings.json（モデル名など）
+        self.job_queue = job_queue or JobQueue()     # UI スレッド外で処理を実行するキュー
+        self.audio_filename = "record_audio_output.wav"      # 録音を保存するときのファイル名
         self.transcription_filename = "transcription_result.txt"  # 保存用テキスト名
-        self.transcribed_text = ""  # 文字起こし結果を保持（UI表示用にも使える）
+        # 録音ごとのセッション（作業フォルダ・録音・文字起こし結果・状態）。
+        # 録音・文字起こし・保存を段階ごとに並行して実行し、処理中のセッション数は max_sessions までにする
+        self.sessions = SessionManager(self.job_queue,
+                                       max_active=self.data_model.get("max_sessions", DEFAULT_MAX_ACTIVE))
+        # 録音が終わったら自動で文字起こし・保存まで進めるか（録音 N+1 と文字起こし N が並行する）
+        self.auto_pipeline = bool(self.data_model.get("auto_pipeline", False))
+        self._backend: Optional[str] = None        # 文字起こしのバックエンド（最初に使うときに決める）
+        self._backend_lock = threading.Lock()
+        self.vad_enabled = bool(self.data_model.get("vad_enabled", False))  # 無音を除いて文字起こしするか
+        self.keep_audio = bool(self.data_model.get("keep_audio", False))    # 保存時に録音も残すか
+        self.audio_codec = self.data_model.get("audio_codec", "wav")         # 残す録音の形式（wav, flac, opus）
+        self.naming_scheme = self.data_model.get("naming_scheme", "sequential")  # 保存ファイル名の付け方
+        # 文字起こしサーバー（transcription_server.py）の URL。空ならこのプロセスでモデルを読み込んで文字起こしする
+        self.transcription_server = self.data_model.get("transcription_server") or None
+        # 2 段階の文字起こし: model_name の下書きをすぐに表示し、refine_model_name で区間ごとに直していく
+        self.two_pass = bool(self.data_model.get("two_pass", False))
+        self.refine_model_name = self.data_model.get("refine_model_name", "whisper-large-v3-turbo")
+        # 下書きの平均対数確率がこれ以上の区間は直さない（refine.needs_refinement を参照）
+        self.refine_min_avg_logprob = float(self.data_model.get("refine_min_avg_logprob", -0.3))
+        # 結果表示に出しているセッション（下書きを直した区間を表示に反映するかの判断に使う）
+        self._displayed: Optional[Session] = None
+        # 常時録音: マイクを開いたままにして録音開始の待ち時間をなくし、直前 pre_roll_seconds 秒も録音に含める
+        self.warm_capture = bool(self.data_model.get("warm_capture", False))
+        self.pre_roll_seconds = float(self.data_model.get("pre_roll_seconds", 1.0))
+        self._capture = None  # record.WarmCapture（warm_up のスレッドで起動する）
+        self._capture_lock = threading.Lock()
+
+        # 処理時間の計測結果を JSON Lines で書き出す（settings.json の perf_log、空なら書き出さない）
+        instrumentation.get_instrumentation().set_export_path(self.data_model.get("perf_log") or None)
+
+    @property
+    def backend(self) -> str:
+        """文字起こしのバックエンド（settings.json の backend, num_threads, batch_size を反映したもの）"""
+        with self._backend_lock:
+            if self._backend is None:
+                from models import audio2text
+                self._backend = audio2text.apply_settings(self.data_model)
+            return self._backend
+
+    def _model_name(self) -> str:
+        from models import audio2text
+        return self.data_model.get("model_name", audio2text.DEFAULT_MODEL_NAME)
+
+    def warm_up(self) -> threading.Thread:
+        """
+        録音・文字起こし・保存のモジュールをバックグラウンドで読み込み、文字起こしモデルの読み込みを始める
+
+        Returns
+        -------
+        threading.Thread
+            モジュールを読み込むスレッド（モデルの読み込みはさらに別のスレッドで続く）
+        """
+        def _run():
+            from models import audio2text, live_transcribe, record, save  # noqa: F401
+            if self.warm_capture:
+                self._start_warm_capture()
+            # 文字起こしサーバーを使う場合は、このプロセスではモデルを読み込まない
+            if self.transcription_server is None:
+                audio2text.preload_model(self._model_name(), self.backend)
+
+        thread = threading.Thread(target=_run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _start_warm_capture(self):
+        """
+        常時録音（record.WarmCapture）を起動して返す（ffmpeg の起動を待つので UI スレッドでは呼ばない）
+
+        起動中に別のスレッドから呼ばれた場合は、その起動が終わるのを待つ（マイクを 2 回開かない）
+        """
+        with self._capture_lock:
+            if self._capture is None:
+                from models import record
+                self._capture = record.WarmCapture(pre_roll=self.pre_roll_seconds)
+            return self._capture.start()
+
+    # ==============================
+    # 🗂 セッション（録音ごとの作業フォルダと状態）
+    # ==============================
+    @property
+    def current_session(self) -> Optional[Session]:
+        """画面に表示中のセッション（文字起こし・保存ボタンの対象）"""
+        return self.sessions.current
+
+    def _new_session(self, **metadata) -> Optional[Session]:
+        try:
+            return self.sessions.create(**metadata)
+        except SessionLimitError as e:
+            self.ui.show_error(f"{e} 文字起こしが終わるまでお待ちください。")
+            return None
+
+    def _is_newest(self, session: Session) -> bool:
+        current = self.sessions.current
+        return current is None or session.id >= current.id
 
     # ==============================
     # 🎤 録音ボタン（録音だけ行う）
     # ==============================
-    def handle_record_audio(self):
+    def handle_record_audio(self, record_seconds: Optional[int] = None):
+        if record_seconds is None:
+            record_seconds = self.data_model.get("record_seconds", 10)
+        # 録音ごとに新しいセッションを作る（前の録音の文字起こし・保存は並行して続く）
+        session = self._new_session(record_seconds=record_seconds)
+        if session is None:
+            return
+        self.ui.update_status(f"録音を開始します...（セッション #{session.id}）")
+        self.ui.set_recording_active(True)
+        if self.warm_capture:
+            capture = self._capture
+            if capture is not None and capture.running:
+                self._start_warm_record(session, capture, record_seconds)
+            else:
+                # 常時録音がまだ起動していない（または止まった）場合は、録音ジョブの中で起動（起動中なら完了を待って）
+                # から録音する。録音のたびに起動する ffmpeg と同じマイクを同時に開かない
+                session.metadata["warm_capture"] = True
+                self.sessions.run(
+                    session, "record", self._capture_and_record_job, self._start_warm_capture, record_seconds,
+                    session.audio_path,
+                    description="録音",
+                    on_finished=lambda samples: self._on_record_finished(session, samples),
+                    on_failed=lambda message: self._on_failed("録音", message),
+                    on_cancelled=self._on_record_cancelled,
+                )
+            return
+        # 録音を残す設定なら、録音と同時に保存形式でエンコードしておく（保存時はコピーするだけ）
+        archive_path = session.archive_path(self.audio_codec) if self.keep_audio else None
+        self.sessions.run(
+            session, "record", self._record_job, record_seconds, session.audio_path, archive_path,
+            self.audio_codec,
+            description="録音",
+            on_finished=lambda samples: self._on_record_finished(session, samples),
+            on_failed=lambda message: self._on_failed("録音", message),
+            on_cancelled=self._on_record_cancelled,
+        )
+
+    @staticmethod
+    def _record_job(context: JobContext, record_seconds: int, audio_path: str, archive_path: Optional[str],
+                    codec: str):
+        # ワーカースレッドで実行される（UI を触らない）
+        # 16kHz モノラルでセッションの作業フォルダにメモリマップして録音し、そのまま文字起こしに渡す
+        from models import record
+        return record.record_audio_array(record_seconds, cancel_event=context.cancel_event, memmap_path=audio_path,
+                                         output_filename=archive_path, codec=codec)
+
+    def _start_warm_record(self, session: Session, capture, record_seconds: int):
+        # ボタンを押したこの時点で常時録音からの切り出しを始める（ジョブの開始を待たない）
         try:
-            self.ui.update_status("録音を開始します...")
-            record.record_audio(self.audio_filename, record_seconds=10)
-            self.ui.update_status(f"録音完了：{self.audio_filename} に保存しました。")
-            self.ui.enable_transcription_ui()
+            clip = capture.start_clip(record_seconds, memmap_path=session.audio_path)
         except Exception as e:
-            self.ui.show_error(f"録音でエラーが発生しました: {str(e)}")
+            self.sessions.close(session)
+            self._on_failed("録音", str(e))
+            return
+        # 録音は保存形式でエンコードしない（録音を残す場合は保存時に audio_codec でエンコードする）
+        session.metadata["pre_roll_seconds"] = clip.pre_roll_samples / capture.sample_rate
+        session.metadata["warm_capture"] = True
+        self.sessions.run(
+            session, "record", self._warm_record_job, capture, clip, record_seconds,
+            description="録音",
+            on_finished=lambda samples: self._on_record_finished(session, samples),
+            on_failed=lambda message: self._on_failed("録音", message),
+            # 開始前に中止された場合も切り出しを止める
+            on_cancelled=lambda: (clip.stop(), self._on_record_cancelled()),
+        )
+
+    @staticmethod
+    def _warm_record_job(context: JobContext, capture, clip, record_seconds: int):
+        # ワーカースレッドで実行される（UI を触らない）
+        # 録音スレッドがセッションの作業フォルダのメモリマップに直接書き込むので、録音が終わるまで待つだけ
+        from models import record
+        return record.record_warm_clip(capture, record_seconds, cancel_event=context.cancel_event, clip=clip)
+
+    @staticmethod
+    def _capture_and_record_job(context: JobContext, start_capture, record_seconds: int, audio_path: str):
+        # ワーカースレッドで実行される（UI を触らない）
+        from models import record
+        capture = start_capture()
+        context.check_cancelled()
+        return record.record_warm_clip(capture, record_seconds, cancel_event=context.cancel_event,
+                                       memmap_path=audio_path)
+
+    def _on_record_finished(self, session: Session, samples):
+        from models.audio_io import SAMPLE_RATE
+
+        session.samples = samples
+        session.metadata["audio_seconds"] = len(samples) / SAMPLE_RATE
+        # 録音と同時にエンコードした録音があれば、保存時にそれを使う
+        if self.keep_audio and not session.metadata.get("warm_capture"):
+            session.metadata["archive_path"] = session.archive_path(self.audio_codec)
+        self.sessions.current = session
+        self.ui.set_recording_active(False)
+        self.ui.update_status(f"録音完了：{len(samples) / SAMPLE_RATE:.1f}秒（セッション #{session.id}）")
+        self.ui.enable_transcription_ui()
+        if self.auto_pipeline:
+            self._start_transcription(session)
+
+    def _on_record_cancelled(self):
+        self.ui.set_recording_active(False)
+        self.ui.update_status("録音を中止しました。")
+
+    # ==============================
+    # 📝 ライブ文字起こし（録音しながら文字起こし）
+    # ==============================
+    def handle_live_transcription(self, record_seconds: Optional[int] = None):
+        if record_seconds is None:
+            record_seconds = self.data_model.get("record_seconds", 10)
+        session = self._new_session(record_seconds=record_seconds, live=True)
+        if session is None:
+            return
+        self.ui.update_status("録音しながら文字起こしします...")
+        self.ui.set_recording_active(True)
+        self.ui.begin_live_transcription()
+        self.sessions.current = session
+        self._displayed = session
+        self.sessions.run(
+            session, "record", self._live_job, record_seconds, self._model_name(), self.backend,
+            self.transcription_server,
+            description="ライブ文字起こし",
+            done_state="transcribed",
+            on_progress=self._on_live_segment,
+            on_finished=lambda result: self._on_live_finished(session, result),
+            on_failed=lambda message: self._on_failed("録音", message),
+            on_cancelled=self._on_record_cancelled,
+        )
+
+    @staticmethod
+    def _live_job(context: JobContext, record_seconds: int, model_name: str, backend: str,
+                  server_url: Optional[str]) -> dict:
+        from models import audio2text, record
+        from models.live_transcribe import LiveTranscriber
+
+        # 録音全体がリングバッファに収まるようにし、終了後に保存できるようにする
+        recorder = record.StreamingRecorder(
+            record_seconds=record_seconds, buffer_seconds=max(60.0, record_seconds + 1.0),
+        )
+        transcribe = AudioController._transcribe_fn(model_name, backend, server_url)
+        transcriber = LiveTranscriber(transcribe)
+        result = transcriber.run(recorder, context.report_progress, cancel_event=context.cancel_event)
+        result["samples"] = recorder.buffer.latest()
+        result["model"] = transcribe.model if server_url is not None else audio2text.model_key(model_name, backend)
+        return result
+
+    @staticmethod
+    def _transcribe_fn(model_name: str, backend: str, server_url: Optional[str]):
+        """
+        音声（float32）を受け取り、audio2text.transcribe_details と同じ形の結果を返す関数を返す
+
+        Notes
+        -----
+        - server_url を指定した場合は文字起こしサーバーで文字起こしし、このプロセスではモデルを読み込まない。
+          サーバーが返したモデル名を関数の model 属性に記録する（サーバーのバックエンドを含む）。
+        """
+        from models import audio2text
+
+        if server_url is None:
+            return lambda samples: audio2text.transcribe_details(samples, model_name=model_name, backend=backend)
+
+        from models import server_client
+
+        def transcribe(samples):
+            result = server_client.transcribe_samples(samples, server_url, model_name=model_name)
+            transcribe.model = result.get("model")
+            return result
+
+        transcribe.model = model_name
+        return transcribe
+
+    def _on_live_segment(self, segment: "LiveSegment"):
+        self.ui.show_live_segment(segment.text, segment.is_final, segment.start, segment.end)
+
+    def _on_live_finished(self, session: Session, result: dict):
+        self.ui.set_recording_active(False)
+        self.ui.enable_transcription_ui()
+        session.samples = result["samples"]
+        session.metadata["audio_seconds"] = result["audio_seconds"]
+        session.set_transcript({
+            "text": result["text"],
+            "model": result["model"],
+            "duration": result["audio_seconds"],
+            "decode_seconds": result["decode_seconds"],
+            "segments": [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in result["segments"]],
+        })
+        ttft = result["time_to_first_text"]
+        rtf = result["real_time_factor"]
+        ttft_text = f"{ttft:.2f}秒" if ttft is not None else "-"
+        rtf_text = f"{rtf:.2f}" if rtf is not None else "-"
+        self.ui.update_status(f"ライブ文字起こしが完了しました。（最初の文字まで: {ttft_text} / 実時間係数: {rtf_text}）")
 
     # ==============================
     # ✍ 文字起こしボタン（文字起こしだけ行う）
     # ==============================
     def handle_transcribe_audio(self):
-        try:
-            self.ui.update_status("文字起こしを開始します...")
-            self.transcribed_text = audio2text.audio_to_text(self.audio_filename)
-            
-            if not self.transcribed_text:
-                self.ui.show_error("文字起こしに失敗しました（内容が空です）。")
-                return
+        session = self.sessions.current
+        if session is None or session.samples is None:
+            self.ui.show_error("文字起こしする録音がありません。")
+            return
+        if session.is_running:
+            self.ui.update_status(f"セッション #{session.id} は処理中です。")
+            return
+        if not session.can_transition("transcribing"):
+            self.ui.show_error(f"セッション #{session.id} は文字起こしできません（{session.state}）。")
+            return
+        self._start_transcription(session)
 
-            # 成功時はUIに表示（表示機能がある前提）
-            self.ui.display_transcription(self.transcribed_text)
-            self.ui.update_status("文字起こしが完了しました。")
-        except Exception as e:
-            self.ui.show_error(f"文字起こしでエラーが発生しました: {str(e)}")
+    def _start_transcription(self, session: Session):
+        self.ui.update_status(f"文字起こしを開始します...（セッション #{session.id}）")
+        self.sessions.run(
+            session, "transcribe", self._transcribe_job, session.samples, self._model_name(), self.backend,
+            self.vad_enabled, self.transcription_server,
+            description="文字起こし",
+            on_progress=self.ui.update_status,
+            on_finished=lambda details: self._on_transcribe_finished(session, details),
+            on_failed=lambda message: self._on_failed("文字起こし", message),
+            on_cancelled=lambda: self.ui.update_status("文字起こしを中止しました。"),
+        )
+
+    @staticmethod
+    def _transcribe_job(context: JobContext, samples, model_name: str, backend: str, vad: bool,
+                        server_url: Optional[str]) -> dict:
+        if samples is None or len(samples) == 0:
+            return {"text": ""}
+        if server_url is not None:
+            # モデルは文字起こしサーバーが読み込んで、他のアプリと共有している
+            from models import server_client
+            context.report_progress(f"文字起こしサーバーに送っています（{server_url}）...")
+            return server_client.transcribe_samples(samples, server_url, model_name=model_name, vad=vad)
+
+        from models import audio2text
+        if not audio2text.is_model_loaded(model_name, backend):
+            context.report_progress(f"モデルを読み込んでいます（{model_name}）...")
+        context.check_cancelled()
+        # テキストだけでなく、保存時にストアへ登録する詳細（モデル・区間など）も受け取る
+        return audio2text.transcribe_details(samples, model_name=model_name, backend=backend, vad=vad)
+
+    def _on_transcribe_finished(self, session: Session, details: dict):
+        session.set_transcript(details)
+        if not session.text.strip():
+            self.ui.show_error(f"文字起こしに失敗しました（内容が空です）。（セッション #{session.id}）")
+            return
+
+        # 後から始めた録音の結果が表示されていなければ、この結果を表示する
+        if self._is_newest(session):
+            self.sessions.current = session
+            self._displayed = session
+            self.ui.display_transcription(session.text, details.get("segments"))
+            self.ui.update_status(f"文字起こしが完了しました。{self._vad_message(details)}（セッション #{session.id}）")
+        else:
+            self.ui.update_status(f"セッション #{session.id} の文字起こしが完了しました。{self._vad_message(details)}")
+        if self.two_pass and details.get("segments") and session.samples is not None:
+            self._start_refinement(session)
+        elif self.auto_pipeline:
+            self._start_save(session)
+
+    @staticmethod
+    def _vad_message(details: dict) -> str:
+        # 無音を除いて文字起こしした場合は、減らした秒数を伝える
+        report = details.get("vad")
+        if not report:
+            return ""
+        return (f"無音 {report['saved_seconds']:.1f}秒を除き、"
+                f"{report['original_seconds']:.1f}秒中 {report['speech_seconds']:.1f}秒を文字起こししました。")
+
+    # ==============================
+    # 🔍 2 段階の文字起こし（下書きを精度の高いモデルで直す）
+    # ==============================
+    def _start_refinement(self, session: Session):
+        self.ui.update_status(f"下書きを表示しました。{self.refine_model_name} で修正しています...（セッション #{session.id}）")
+        self.sessions.run(
+            session, "refine", self._refine_job, session.samples, session.details["segments"],
+            self.refine_model_name, self.backend, self.transcription_server, self.refine_min_avg_logprob,
+            description="下書きの修正",
+            on_progress=lambda update: self._on_segment_refined(session, update),
+            on_finished=lambda result: self._on_refine_finished(session, result),
+            on_failed=lambda message: self._on_refine_stopped(
+                session, f"下書きの修正でエラーが発生しました: {message}", is_error=True),
+            on_cancelled=lambda: self._on_refine_stopped(session, "下書きの修正を中止しました。"),
+        )
+
+    @staticmethod
+    def _refine_job(context: JobContext, samples, segments: list, model_name: str, backend: str,
+                    server_url: Optional[str], min_avg_logprob: float) -> dict:
+        from models import audio2text, refine
+
+        if server_url is not None:
+            # まとめて送り、サーバー側で 1 回のモデル呼び出しにまとめてもらう
+            from concurrent.futures import ThreadPoolExecutor
+            from models import server_client
+
+            def transcribe_clips(clips):
+                with ThreadPoolExecutor(max_workers=len(clips)) as executor:
+                    results = list(executor.map(
+                        lambda clip: server_client.transcribe_samples(clip, server_url, model_name=model_name), clips))
+                # サーバーが実際に使ったモデルを記録する（このプロセスのバックエンドとは限らない）
+                transcribe_clips.model = next((r["model"] for r in results if r.get("model")), transcribe_clips.model)
+                return results
+
+            transcribe_clips.model = model_name
+        else:
+            def transcribe_clips(clips):
+                return audio2text.transcribe_batch(clips, model_name=model_name, backend=backend)
+
+            transcribe_clips.model = audio2text.model_key(model_name, backend)
+
+        result = refine.refine_segments(
+            samples, segments, transcribe_clips,
+            on_refined=lambda index, text: context.report_progress((index, text)),
+            cancel_event=context.cancel_event, min_avg_logprob=min_avg_logprob,
+        )
+        context.check_cancelled()
+        result["model"] = transcribe_clips.model
+        return result
+
+    def _on_segment_refined(self, session: Session, update):
+        # 直した区間は、中止・失敗しても結果に残るよう、届いた時点でセッションに反映する
+        index, text = update
+        segments = session.details["segments"]
+        segments[index] = {**segments[index], "text": text, "refined": True}
+        session.details["text"] = transcript_text(session.details)
+        if self._displayed is session:
+            self.ui.replace_segment_text(index, text)
+
+    def _on_refine_finished(self, session: Session, result: dict):
+        session.set_transcript({**session.details, "text": result["text"], "segments": result["segments"],
+                                "model": result["model"], "draft_model": session.details.get("model")})
+        self.ui.update_status(
+            f"下書きを修正しました：{result['refined']} 区間（確かな {result['skipped']} 区間はそのまま、"
+            f"{result['seconds']:.1f}秒）（セッション #{session.id}）"
+        )
+        if self.auto_pipeline:
+            self._start_save(session)
+
+    def _on_refine_stopped(self, session: Session, message: str, is_error: bool = False):
+        # それまでに直した区間を含む結果（下書き）は残す
+        session.set_transcript(session.details)
+        if is_error:
+            self.ui.show_error(f"{message}（セッション #{session.id}）")
+        else:
+            self.ui.update_status(f"{message}（セッション #{session.id}）")
 
     # ==============================
     # 💾 保存ボタン（保存だけ行う）
     # ==============================
     def handle_save_transcription(self):
+        session = self.sessions.current
+        if session is None:
+            self.ui.show_error("保存する文字起こし結果がありません。")
+            return
+        if session.is_running:
+            self.ui.update_status(f"セッション #{session.id} は処理中です。")
+            return
+        if not session.can_transition("saving"):
+            self.ui.show_error(f"セッション #{session.id} は保存できません（{session.state}）。")
+            return
+        self._start_save(session)
+
+    def _start_save(self, session: Session):
+        self.ui.update_status(f"文字起こし結果を保存します...（セッション #{session.id}）")
+        self.sessions.run(
+            session, "save", self._save_job, session.text, session.details, session.samples, self.keep_audio,
+            session.metadata.get("archive_path"),
+            self.audio_filename, self.transcription_filename, self._model_name(), self.backend, self.vad_enabled,
+            self.naming_scheme, self.transcription_server, self.audio_codec,
+            description="保存",
+            on_progress=self.ui.update_status,
+            on_finished=lambda save_path: self._on_save_finished(session, save_path),
+            on_failed=lambda message: self._on_failed("保存", message),
+            on_cancelled=lambda: self.ui.update_status("保存を中止しました。"),
+        )
+
+    @staticmethod
+    def _save_job(context: JobContext, transcribed_text: str, details: Optional[dict], samples, keep_audio: bool,
+                  archive_path: Optional[str], audio_filename: str, transcription_filename: str,
+                  model_name: str, backend: str, vad: bool, naming_scheme: str, server_url: Optional[str],
+                  codec: str) -> str:
+        from models import save
+
+        if not transcribed_text and samples is not None:
+            # まだ文字起こししていなければここで行う（文字起こしボタンと同じく、サーバーの設定があればサーバーで）
+            details = AudioController._transcribe_job(context, samples, model_name, backend, vad, server_url)
+            transcribed_text = transcript_text(details)
+        save_path = save.save_text_to_file(transcribed_text, transcription_filename,
+                                           naming_scheme=naming_scheme, details=details)
+        # 録音は、残す設定のときだけ書き出す（録音時にエンコード済みのファイルがあればそれをコピーする）
+        if keep_audio and archive_path is not None:
+            save.save_audio_file(archive_path, audio_filename, naming_scheme=naming_scheme)
+        elif keep_audio and samples is not None:
+            # 常時録音・ライブ文字起こしの録音は、ここで保存形式にエンコードする
+            save.save_audio_to_file(samples, audio_filename, naming_scheme=naming_scheme, codec=codec)
+        return save_path
+
+    def _on_save_finished(self, session: Session, save_path: str):
+        session.metadata["save_path"] = save_path
+        self.ui.update_status(f"保存完了：{save_path}（セッション #{session.id}）")
+
+    # ==============================
+    # 🔍 検索（保存済みの文字起こし結果）
+    # ==============================
+    def handle_search(self, query: str):
+        # 索引を引くだけでミリ秒単位で終わるので、UI スレッドで直接実行する
+        import sqlite3
+        from models import transcript_store
+
+        start = time.perf_counter()
         try:
-            self.ui.update_status("文字起こし結果を保存します...")
-            save.save_transcription_to_file(self.audio_filename, self.transcription_filename)
-            self.ui.update_status(f"保存完了：{self.transcription_filename}")
-        except Exception as e:
-            self.ui.show_error(f"保存でエラーが発生しました: {str(e)}")
+            hits = transcript_store.get_default_store().search(query, limit=50)
+        except sqlite3.Error as e:
+            self.ui.show_error(f"検索でエラーが発生しました: {e}")
+            return
+        self.ui.show_search_results(hits)
+        if query.strip():
+            self.ui.update_status(f"検索結果：{len(hits)} 件（{(time.perf_counter() - start) * 1000:.1f} ミリ秒）")
+
+    def handle_open_transcript(self, transcript_id: int):
+        from models import transcript_store
+
+        entry = transcript_store.get_default_store().get(transcript_id)
+        if entry is None:
+            self.ui.show_error("文字起こし結果が見つかりません。")
+            return
+        self._displayed = None
+        self.ui.show_transcript(entry["text"], entry["segments"])
+        self.ui.update_status(f"保存済みの文字起こし結果：{entry['source_path'] or '-'}")
+
+    # ==============================
+    # ⏹ 中止ボタン
+    # ==============================
+    def handle_cancel(self):
+        # 最後に始めた処理中のセッションを中止する
+        for session in reversed(list(self.sessions.sessions.values())):
+            if session.is_running:
+                if self.sessions.cancel(session):
+                    self.ui.update_status(f"処理を中止しています...（セッション #{session.id}）")
+                return
+
+    def shutdown(self):
+        """アプリ終了時に実行中のジョブを中止し、終了を待つ（未保存の設定の書き込みと作業フォルダの削除もここで行う）"""
+        self.job_queue.cancel_all()
+        self.job_queue.wait_for_done()
+        if self._capture is not None:
+            self._capture.stop()
+        self.sessions.shutdown()
+        self.data_model.flush()
+
+    def _on_failed(self, action: str, message: str):
+        if action == "録音":
+            self.ui.set_recording_active(False)
+        self.ui.show_error(f"{action}でエラーが発生しました: {message}")
@@ -0,0 +1,294 @@
+# job_queue.py
+
+import itertools
+import threading
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from models import instrumentation
+
+
+class JobCancelled(Exception):
+    """ジョブが中止されたことを表す例外（ジョブ関数の中から送出してよい）"""
+
+
+class JobContext:
+    """
+    実行中のジョブに渡されるコンテキスト。
+
+    Notes
+    -----
+    - ジョブ関数は第 1 引数としてこのオブジェクトを受け取る。
+    - 進捗の通知（report_progress）と中止の確認（is_cancelled / check_cancelled）に使う。
+    - ワーカースレッドから呼ばれるため、ここから UI を直接操作してはいけない。
+    """
+
+    def __init__(self, job_id: int, signals: "_JobSignals") -> None:
+        self.job_id = job_id
+        self._signals = signals
+        self.cancel_event = threading.Event()
+
+    def report_progress(self, payload: Any) -> None:
+        """進捗を通知する（UI スレッドで on_progress が呼ばれる）"""
+        self._signals.progress.emit(self.job_id, payload)
+
+    def is_cancelled(self) -> bool:
+        """中止が要求されていれば True を返す"""
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """中止が要求されていれば JobCancelled を送出する"""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+
+class _JobSignals(QObject):
+    """ワーカースレッドから UI スレッドへ結果を届けるためのシグナル（キューごとに 1 つ、ジョブ ID で区別する）"""
+    started = Signal(int)
+    progress = Signal(int, object)
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+    cancelled = Signal(int)
+    measured = Signal(int, object)
+
+
+class _JobRunnable(QRunnable):
+    """QThreadPool 上でジョブ関数を実行する QRunnable"""
+
+    def __init__(self, context: JobContext, fn: Callable[..., Any], args: tuple, kwargs: dict,
+                 description: str = "") -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.context = context
+        self.description = description
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> None:
+        signals = self.context._signals
+        job_id = self.context.job_id
+        if self.context.is_cancelled():
+            signals.cancelled.emit(job_id)
+            return
+
+        signals.started.emit(job_id)
+        # ジョブ 1 件を 1 回の実行として計測する（録音・デコード・保存などの区間はこの中で記録される）
+        run = None
+        try:
+            with instrumentation.get_instrumentation().run(self.description or "ジョブ") as run:
+                result = self.fn(self.context, *self.args, **self.kwargs)
+        except JobCancelled:
+            signals.cancelled.emit(job_id)
+            return
+        except Exception as e:
+            traceback.print_exc()
+            signals.failed.emit(job_id, str(e))
+            return
+        finally:
+            if run is not None:
+                signals.measured.emit(job_id, run.summary())
+
+        # 実行中に中止された場合は結果を捨てる
+        if self.context.is_cancelled():
+            signals.cancelled.emit(job_id)
+        else:
+            signals.finished.emit(job_id, result)
+
+
+class _Job:
+    """JobQueue が管理するジョブ 1 件分の情報"""
+
+    def __init__(self, runnable: _JobRunnable, description: str,
+                 on_progress: Optional[Callable[[Any], None]],
+                 on_finished: Optional[Callable[[Any], None]],
+                 on_failed: Optional[Callable[[str], None]],
+                 on_cancelled: Optional[Callable[[], None]]) -> None:
+        self.runnable = runnable
+        self.description = description
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        self.on_cancelled = on_cancelled
+
+
+class JobQueue(QObject):
+    """
+    録音・文字起こし・保存などの重い処理を UI スレッドの外で実行するジョブキュー。
+
+    Notes
+    -----
+    - QThreadPool でジョブを実行し、進捗・完了・失敗・中止を Qt のシグナルで通知する。
+    - on_progress / on_finished などのコールバックは必ず UI スレッドで呼ばれるため、
+      その中から UI を操作してよい。
+    - 中止は協調的に行う。開始前のジョブはキューから取り除き、実行中のジョブには
+      JobContext.cancel_event で中止を伝える（結果は破棄される）。
+    """
+
+    # ジョブ状態の通知（引数: ジョブID, ...）
+    job_started = Signal(int, str)
+    job_progress = Signal(int, object)
+    job_finished = Signal(int, object)
+    job_failed = Signal(int, str)
+    job_cancelled = Signal(int)
+    # ジョブの処理時間の内訳（引数: ジョブID, Run.summary() の辞書）
+    job_measured = Signal(int, object)
+    # 実行中・待機中のジョブがあるかどうか
+    busy_changed = Signal(bool)
+
+    def __init__(self, max_workers: int = 2, parent: Optional[QObject] = None) -> None:
+        """
+        Parameters
+        ----------
+        max_workers : int
+            同時に実行するジョブ数の上限（デフォルト: 2）
+        parent : QObject, optional
+            親オブジェクト
+        """
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_workers)
+        self._jobs: Dict[int, _Job] = {}
+        self._ids = itertools.count(1)
+
+        # シグナルは UI スレッドで作成し、受け取り側（self）も UI スレッドにあるので
+        # ワーカースレッドからの emit はキュー接続で UI スレッドに届く。
+        # すべてのジョブで共有し（ジョブごとに作ると QObject が残り続ける）、ジョブ ID で区別する
+        self._signals = _JobSignals(self)
+        self._signals.started.connect(self._on_started)
+        self._signals.progress.connect(self._on_progress)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._signals.cancelled.connect(self._on_cancelled)
+        self._signals.measured.connect(self.job_measured)
+
+    # ---------------------------------------------------------
+    # ジョブの投入
+    # ---------------------------------------------------------
+    def submit(self, fn: Callable[..., Any], *args: Any, description: str = "",
+               on_progress: Optional[Callable[[Any], None]] = None,
+               on_finished: Optional[Callable[[Any], None]] = None,
+               on_failed: Optional[Callable[[str], None]] = None,
+               on_cancelled: Optional[Callable[[], None]] = None,
+               **kwargs: Any) -> int:
+        """
+        ジョブをキューに追加する。
+
+        Parameters
+        ----------
+        fn : Callable[..., Any]
+            実行する関数。第 1 引数に JobContext を受け取る。
+        *args, **kwargs : Any
+            fn に渡す引数
+        description : str
+            ジョブの説明（ステータス表示用）
+        on_progress, on_finished, on_failed, on_cancelled : Callable, optional
+            UI スレッドで呼ばれるコールバック
+
+        Returns
+        -------
+        int
+            ジョブID
+        """
+        job_id = next(self._ids)
+        context = JobContext(job_id, self._signals)
+        runnable = _JobRunnable(context, fn, args, kwargs, description)
+        self._jobs[job_id] = _Job(runnable, description, on_progress, on_finished, on_failed, on_cancelled)
+
+        was_busy = len(self._jobs) > 1
+        self._pool.start(runnable)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        return job_id
+
+    # ---------------------------------------------------------
+    # 中止
+    # ---------------------------------------------------------
+    def cancel(self, job_id: int) -> bool:
+        """
+        ジョブの中止を要求する。
+
+        Parameters
+        ----------
+        job_id : int
+            中止するジョブID
+
+        Returns
+        -------
+        bool
+            該当するジョブがあれば True
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.runnable.context.cancel_event.set()
+        # まだ開始していなければキューから取り除く
+        if self._pool.tryTake(job.runnable):
+            self._on_cancelled(job_id)
+        return True
+
+    def cancel_all(self) -> None:
+        """すべてのジョブの中止を要求する"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def is_busy(self) -> bool:
+        """実行中・待機中のジョブがあれば True を返す"""
+        return bool(self._jobs)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """すべてのジョブの終了を待つ（アプリ終了時に使う）"""
+        return self._pool.waitForDone(msecs)
+
+    # ---------------------------------------------------------
+    # ワーカースレッドからの通知（UI スレッドで実行される）
+    # ---------------------------------------------------------
+    def _finish(self, job_id: int) -> Optional[_Job]:
+        job = self._jobs.pop(job_id, None)
+        if job is not None and not self._jobs:
+            self.busy_changed.emit(False)
+        return job
+
+    @Slot(int)
+    def _on_started(self, job_id: int) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            self.job_started.emit(job_id, job.description)
+
+    @Slot(int, object)
+    def _on_progress(self, job_id: int, payload: Any) -> None:
+        job = self._jobs.get(job_id)
+        if job is None or job.runnable.context.is_cancelled():
+            return
+        self.job_progress.emit(job_id, payload)
+        if job.on_progress is not None:
+            job.on_progress(payload)
+
+    @Slot(int, object)
+    def _on_finished(self, job_id: int, result: Any) -> None:
+        job = self._finish(job_id)
+        if job is None:
+            return
+        self.job_finished.emit(job_id, result)
+        if job.on_finished is not None:
+            job.on_finished(result)
+
+    @Slot(int, str)
+    def _on_failed(self, job_id: int, message: str) -> None:
+        job = self._finish(job_id)
+        if job is None:
+            return
+        self.job_failed.emit(job_id, message)
+        if job.on_failed is not None:
+            job.on_failed(message)
+
+    @Slot(int)
+    def _on_cancelled(self, job_id: int) -> None:
+        job = self._finish(job_id)
+        if job is None:
+            return
+        self.job_cancelled.emit(job_id)
+        if job.on_cancelled is not None:
+            job.on_cancelled()
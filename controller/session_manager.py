@@ -0,0 +1,459 @@
+# session_manager.py
+
+import collections
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from controller.job_queue import JobQueue
+
+# セッションの作業フォルダを作る場所（この下にプロセスごとのフォルダを作る）
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), "oop2-guiapp-sessions")
+
+# 処理中のセッション数の上限（これを超える録音の開始は断る）
+DEFAULT_MAX_ACTIVE = 3
+
+# 処理を終えたセッションを残しておく数（古いものから作業フォルダごと片付ける）
+DEFAULT_KEEP_FINISHED = 5
+
+# 段階ごとに同時に実行するジョブの数（マイクとモデルはそれぞれ 1 つずつしか使わない）
+# refine は 2 段階の文字起こしで精度の高いモデルが下書きを直す段階（次の録音の下書きを待たせない）
+DEFAULT_LANES = {"record": 1, "transcribe": 1, "refine": 1, "save": 1}
+
+# セッションの状態と、そこから移れる状態
+TRANSITIONS = {
+    "created": {"recording", "closed"},
+    "recording": {"recorded", "transcribed", "failed", "cancelled"},
+    "recorded": {"transcribing", "saving", "closed"},
+    "transcribing": {"transcribed", "recorded", "failed"},
+    "transcribed": {"transcribing", "refining", "saving", "closed"},
+    "refining": {"transcribed"},
+    "saving": {"saved", "recorded", "transcribed", "failed"},
+    "saved": {"transcribing", "saving", "closed"},
+    # 文字起こし・保存で失敗したセッションは録音が残っているので、やり直せる（Session.can_transition を参照）
+    "failed": {"transcribing", "saving", "closed"},
+    "cancelled": {"closed"},
+    "closed": set(),
+}
+
+# ジョブの実行中（または待機中）の状態
+RUNNING_STATES = {"recording", "transcribing", "refining", "saving"}
+
+
+class SessionLimitError(Exception):
+    """処理中のセッションが上限に達していて、新しいセッションを始められないことを表す例外"""
+
+
+class Session:
+    """
+    1 回の録音（とその文字起こし・保存）の作業単位。
+
+    Attributes
+    ----------
+    id : int
+        セッション番号（作成順）
+    workspace : str
+        このセッション専用の作業フォルダ（録音のメモリマップ、メタデータ、文字起こし結果を置く）
+    state : str
+        状態（TRANSITIONS を参照）
+    samples : np.ndarray or None
+        録音した音声（16kHz モノラル float32、workspace の audio.npy にメモリマップしたもの）
+    text : str
+        文字起こし結果
+    details : dict or None
+        文字起こしの詳細（audio2text.transcribe_details の戻り値）
+    metadata : dict
+        録音時間・モデル名・保存先などの情報（workspace の session.json に書き出す）
+    """
+
+    def __init__(self, session_id: int, workspace: str, **metadata: Any) -> None:
+        self.id = session_id
+        self.workspace = workspace
+        self.state = "created"
+        self.samples = None
+        self.text = ""
+        self.details: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.job_id: Optional[int] = None
+        self.metadata: Dict[str, Any] = {"created_at": time.time(), **metadata}
+        self._resume_state: Optional[str] = None
+        self._write_metadata()
+
+    @property
+    def audio_path(self) -> str:
+        """録音を書き込むファイル（セッションごとに別のパス）"""
+        return os.path.join(self.workspace, "audio.npy")
+
+    def archive_path(self, codec: str) -> str:
+        """録音と同時に保存形式（codec）でエンコードするファイル"""
+        from models.record import codec_extension
+        return os.path.join(self.workspace, f"audio.{codec_extension(codec)}")
+
+    @property
+    def transcript_path(self) -> str:
+        """文字起こし結果を書き出すファイル"""
+        return os.path.join(self.workspace, "transcript.txt")
+
+    @property
+    def is_running(self) -> bool:
+        """ジョブを実行中、または実行を待っていれば True"""
+        return self.state in RUNNING_STATES
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == "closed"
+
+    def can_transition(self, state: str) -> bool:
+        """state に移れれば True を返す"""
+        if state not in TRANSITIONS[self.state]:
+            return False
+        # 失敗したセッションをやり直せるのは、録音が残っている場合（文字起こし・保存で失敗した場合）だけ
+        return not (self.state == "failed" and state in RUNNING_STATES and self.samples is None)
+
+    def transition(self, state: str) -> None:
+        """
+        状態を変える（移れない状態を指定すると ValueError）
+
+        Parameters
+        ----------
+        state : str
+            新しい状態
+        """
+        if not self.can_transition(state):
+            raise ValueError(f"セッション #{self.id} は {self.state} から {state} に移れません。")
+        if state in RUNNING_STATES:
+            # 中止されたときに戻る状態
+            self._resume_state = self.state
+        self.state = state
+        if state != "closed":
+            self._write_metadata()
+
+    def set_transcript(self, details: dict) -> None:
+        """
+        文字起こし結果を記録し、作業フォルダにも書き出す
+
+        区間があれば、画面の表示と同じく 1 区間 1 行にしたテキストを記録する
+        （保存するテキストと表示しているテキストを揃えるため）
+        """
+        self.text = transcript_text(details)
+        self.details = {**details, "text": self.text}
+        with open(self.transcript_path, "w", encoding="utf-8") as f:
+            f.write(self.text)
+
+    def _write_metadata(self) -> None:
+        metadata = {
+            "id": self.id, "state": self.state, "updated_at": time.time(), "error": self.error,
+            **self.metadata,
+        }
+        with open(os.path.join(self.workspace, "session.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=4, ensure_ascii=False, default=str)
+
+    def __repr__(self) -> str:
+        return f"Session(id={self.id}, state={self.state!r}, workspace={self.workspace!r})"
+
+
+class _PendingJob:
+    """段階の空きを待っているジョブ"""
+
+    def __init__(self, session: Session, fn: Callable[..., Any], args: tuple, kwargs: dict,
+                 on_cancelled: Optional[Callable[[], None]]) -> None:
+        self.session = session
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_cancelled = on_cancelled
+
+
+class SessionManager:
+    """
+    録音ごとのセッション（作業フォルダ・状態）を作成し、段階ごとのジョブの実行を管理するクラス。
+
+    Notes
+    -----
+    - 録音・文字起こし・保存はそれぞれ別の段階として実行し、段階ごとに同時実行数を制限する（lanes）。
+      マイクとモデルを奪い合わずに、録音 N+1 と文字起こし N を並行して進められる。
+    - 処理中のセッションが max_active に達すると create() は SessionLimitError を送出する（背圧）。
+    - 処理を終えたセッションは新しいものから keep_finished 件だけ残し、古いものは作業フォルダごと削除する。
+      終了時（shutdown）と、前回異常終了したプロセスの作業フォルダも削除する。
+    - コールバックは JobQueue と同じく UI スレッドで呼ばれる。
+    """
+
+    def __init__(self, job_queue: JobQueue, max_active: int = DEFAULT_MAX_ACTIVE,
+                 keep_finished: int = DEFAULT_KEEP_FINISHED, root: Optional[str] = None,
+                 lanes: Optional[Dict[str, int]] = None) -> None:
+        """
+        Parameters
+        ----------
+        job_queue : JobQueue
+            ジョブを実行するキュー
+        max_active : int
+            処理中のセッション数の上限
+        keep_finished : int
+            処理を終えたセッションを残しておく数
+        root : str, optional
+            作業フォルダを作る場所（デフォルト: DEFAULT_ROOT）
+        lanes : Dict[str, int], optional
+            段階ごとの同時実行数（デフォルト: DEFAULT_LANES）
+        """
+        self.job_queue = job_queue
+        self.max_active = max(int(max_active), 1)
+        self.keep_finished = max(int(keep_finished), 0)
+        self.lanes = dict(lanes or DEFAULT_LANES)
+        self.sessions: "collections.OrderedDict[int, Session]" = collections.OrderedDict()
+        # 画面に表示中のセッション（片付けの対象にしない）
+        self.current: Optional[Session] = None
+        self._ids = itertools.count(1)
+        self._running: Dict[str, int] = {lane: 0 for lane in self.lanes}
+        self._waiting: Dict[str, Deque[_PendingJob]] = {lane: collections.deque() for lane in self.lanes}
+
+        root = root or DEFAULT_ROOT
+        os.makedirs(root, exist_ok=True)
+        _remove_stale_workspaces(root)
+        self.root = os.path.join(root, str(os.getpid()))
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------------------------------------------------------
+    # セッションの作成・参照
+    # ---------------------------------------------------------
+    def active_count(self) -> int:
+        """処理中（ジョブの実行中・待機中）のセッション数を返す"""
+        return sum(1 for session in self.sessions.values() if session.state == "created" or session.is_running)
+
+    def can_create(self) -> bool:
+        """新しいセッションを始められれば True を返す"""
+        return self.active_count() < self.max_active
+
+    def create(self, **metadata: Any) -> Session:
+        """
+        新しいセッションと作業フォルダを作る
+
+        Parameters
+        ----------
+        **metadata : Any
+            セッションに記録する情報（録音時間など）
+
+        Returns
+        -------
+        Session
+            作成したセッション
+
+        Raises
+        ------
+        SessionLimitError
+            処理中のセッションが上限に達している場合
+        """
+        if not self.can_create():
+            raise SessionLimitError(f"処理中のセッションが上限（{self.max_active} 件）に達しています。")
+        session_id = next(self._ids)
+        workspace = tempfile.mkdtemp(prefix=f"session-{session_id}-", dir=self.root)
+        session = Session(session_id, workspace, **metadata)
+        self.sessions[session_id] = session
+        return session
+
+    def get(self, session_id: int) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    # ---------------------------------------------------------
+    # ジョブの実行
+    # ---------------------------------------------------------
+    def run(self, session: Session, lane: str, fn: Callable[..., Any], *args: Any, description: str = "",
+            on_progress: Optional[Callable[[Any], None]] = None,
+            on_finished: Optional[Callable[[Any], None]] = None,
+            on_failed: Optional[Callable[[str], None]] = None,
+            on_cancelled: Optional[Callable[[], None]] = None, done_state: Optional[str] = None,
+            **kwargs: Any) -> None:
+        """
+        セッションの段階（録音・文字起こし・保存）を実行する。段階が空いていなければ空くまで待つ。
+
+        Parameters
+        ----------
+        session : Session
+            対象のセッション
+        lane : str
+            段階（"record", "transcribe", "refine", "save"）。セッションの状態は
+            "recording" / "transcribing" / "refining" / "saving" になり、完了すると
+            "recorded" / "transcribed" / "transcribed" / "saved" になる
+        fn : Callable[..., Any]
+            実行する関数（JobQueue.submit と同じく、第 1 引数に JobContext を受け取る）
+        *args, **kwargs : Any
+            fn に渡す引数
+        description : str
+            ジョブの説明
+        on_progress, on_finished, on_failed, on_cancelled : Callable, optional
+            UI スレッドで呼ばれるコールバック
+        done_state : str, optional
+            完了後の状態を変える場合に指定する（録音しながら文字起こしした場合の "transcribed" など）
+        """
+        running, done = _LANE_STATES[lane]
+        done = done_state or done
+        session.transition(running)
+        kwargs.update(description=f"{description} #{session.id}", on_progress=on_progress,
+                      on_finished=self._wrap(session, lane, done, on_finished),
+                      on_failed=self._wrap_failed(session, lane, on_failed),
+                      on_cancelled=self._wrap_cancelled(session, lane, on_cancelled))
+        self._waiting[lane].append(_PendingJob(session, fn, args, kwargs, on_cancelled))
+        self._dispatch(lane)
+
+    def _dispatch(self, lane: str) -> None:
+        """段階に空きがあれば、待っているジョブを投入する"""
+        waiting = self._waiting[lane]
+        while waiting and self._running[lane] < self.lanes[lane]:
+            pending = waiting.popleft()
+            self._running[lane] += 1
+            pending.session.job_id = self.job_queue.submit(pending.fn, *pending.args, **pending.kwargs)
+
+    def _release(self, session: Session, lane: str) -> None:
+        session.job_id = None
+        self._running[lane] -= 1
+        self._dispatch(lane)
+
+    def _wrap(self, session: Session, lane: str, done: str,
+              callback: Optional[Callable[[Any], None]]) -> Callable[[Any], None]:
+        def _on_finished(result: Any) -> None:
+            self._release(session, lane)
+            session.transition(done)
+            if callback is not None:
+                callback(result)
+            self._cleanup()
+        return _on_finished
+
+    def _wrap_failed(self, session: Session, lane: str,
+                     callback: Optional[Callable[[str], None]]) -> Callable[[str], None]:
+        def _on_failed(message: str) -> None:
+            self._release(session, lane)
+            if lane in _KEEP_RESULT_ON_FAILURE:
+                # 下書きを直す段階の失敗では、下書きの文字起こし結果を残す
+                self._return_to_resume_state(session)
+            else:
+                session.error = message
+                session.transition("failed")
+            if callback is not None:
+                callback(message)
+            self._cleanup()
+        return _on_failed
+
+    def _wrap_cancelled(self, session: Session, lane: str,
+                        callback: Optional[Callable[[], None]]) -> Callable[[], None]:
+        def _on_cancelled() -> None:
+            self._release(session, lane)
+            self._return_to_resume_state(session)
+            if callback is not None:
+                callback()
+            self._cleanup()
+        return _on_cancelled
+
+    @staticmethod
+    def _return_to_resume_state(session: Session) -> None:
+        # 録音の中止は録音が無いので終わり、文字起こし・保存の中止は前の状態に戻す
+        if session.state == "recording":
+            session.transition("cancelled")
+        else:
+            session.transition(session._resume_state)
+
+    # ---------------------------------------------------------
+    # 中止・片付け
+    # ---------------------------------------------------------
+    def cancel(self, session: Session) -> bool:
+        """
+        セッションのジョブを中止する（待機中ならキューから取り除く）
+
+        Returns
+        -------
+        bool
+            中止するジョブがあれば True
+        """
+        for waiting in self._waiting.values():
+            for pending in list(waiting):
+                if pending.session is session:
+                    # 投入前のジョブなので段階の空きは変わらない
+                    waiting.remove(pending)
+                    self._return_to_resume_state(session)
+                    if pending.on_cancelled is not None:
+                        pending.on_cancelled()
+                    self._cleanup()
+                    return True
+        if session.job_id is not None:
+            return self.job_queue.cancel(session.job_id)
+        return False
+
+    def close(self, session: Session) -> None:
+        """セッションを終え、作業フォルダを削除する（実行中なら何もしない）"""
+        if session.is_running or session.is_closed:
+            return
+        session.transition("closed")
+        session.samples = None
+        shutil.rmtree(session.workspace, ignore_errors=True)
+        self.sessions.pop(session.id, None)
+
+    def _cleanup(self) -> None:
+        """処理を終えたセッションのうち、古いものを keep_finished 件を超えた分だけ片付ける"""
+        finished = [session for session in self.sessions.values()
+                    if not session.is_running and session.state != "created" and session is not self.current]
+        # 失敗・中止したセッションは結果が無いので、すぐに片付ける
+        for session in [s for s in finished if s.state in ("failed", "cancelled")]:
+            self.close(session)
+            finished.remove(session)
+        for session in finished[:max(len(finished) - self.keep_finished, 0)]:
+            self.close(session)
+
+    def shutdown(self) -> None:
+        """すべてのセッションの作業フォルダを削除する（アプリ終了時、ジョブの終了を待った後に呼ぶ）"""
+        for session in list(self.sessions.values()):
+            session.samples = None
+        self.sessions.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """セッションの一覧（番号と状態）を返す"""
+        return [{"id": session.id, "state": session.state} for session in self.sessions.values()]
+
+
+# 段階 → (実行中の状態, 完了後の状態)
+_LANE_STATES = {
+    "record": ("recording", "recorded"),
+    "transcribe": ("transcribing", "transcribed"),
+    "refine": ("refining", "transcribed"),
+    "save": ("saving", "saved"),
+}
+
+# 失敗してもセッションを失敗にしない段階（前の状態に戻す）
+_KEEP_RESULT_ON_FAILURE = {"refine"}
+
+
+def transcript_text(details: dict) -> str:
+    """
+    保存・表示する文字起こし結果のテキストを返す
+
+    区間があれば 1 区間 1 行（結果表示の 1 行が 1 区間になり、2 段階の文字起こしで行ごとに置き換えられる）、
+    無ければ文字起こし結果の "text" をそのまま返す
+    """
+    segments = details.get("segments")
+    if not segments:
+        return details.get("text", "")
+    return "".join(segment["text"].strip() + "\n" for segment in segments)
+
+
+def _remove_stale_workspaces(root: str) -> None:
+    """異常終了などで残った、もう動いていないプロセスの作業フォルダを削除する"""
+    for entry in os.scandir(root):
+        if not entry.is_dir() or not entry.name.isdigit():
+            continue
+        pid = int(entry.name)
+        if pid == os.getpid() or _process_exists(pid):
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 権限が無いなど（プロセスは存在する）
+        return True
+    return True
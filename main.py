@@ -1,49 +1,108 @@
 import sys
+import threading
+
+# 起動時間の計測（--profile-startup）。他のモジュールより先に計測を始める
+from startup_profile import StartupProfiler
+
+profiler = StartupProfiler(enabled="--profile-startup" in sys.argv)
+
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
 
 # 各モジュールのインポート
+# ※ コントローラーとモデル（ffmpeg, numpy, mlx_whisper など）はウィンドウを表示した後に読み込む
 from window.gui_main import MainWindow
-from controller.controller import AudioController
 
 # ※ 注意: 実行するには record.py, audio2text.py, save.py が存在する必要があります。
 # テスト用にダミーが必要な場合は、空のファイルを作成してください。
 
 def main():
     # 1. アプリケーションの作成
-    app = QApplication(sys.argv)
-    
+    app = QApplication([arg for arg in sys.argv if arg != "--profile-startup"])
+
     # 2. メインウィンドウの作成 (View)
+    # 重いモジュールを読み込む前に表示し、すぐに画面に描画させる
     window = MainWindow()
-    
-    # 3. コントローラーの作成 (Controller)
+    window.show()
+    app.processEvents()
+    profiler.mark("ウィンドウ表示")
+
+    # 3. コントローラーの作成 (Controller) はイベントループが始まってから行う
+    QTimer.singleShot(0, lambda: start_controller(app, window))
+
+    # 4. アプリケーションの開始
+    sys.exit(app.exec())
+
+
+def start_controller(app, window):
+    """
+    ウィンドウの表示後に、コントローラーを作成してシグナルを接続する（起動の 2 段階目）
+    """
+    from controller.controller import AudioController
+    from controller.job_queue import JobQueue
+    from controller.session_manager import DEFAULT_LANES
+    from models.data_model import DataModel
+
     # ウィンドウ(View)をコントローラーに渡し、コントローラーがUIを操作できるようにする
-    controller = AudioController(ui=window)
-    
+    data_model = DataModel()
+    # 録音・文字起こし・下書きの修正・保存は JobQueue でUIスレッドの外で実行する。
+    # 段階ごとの同時実行数の合計だけスレッドを用意し、他の段階が実行中でも録音がスレッド待ちで遅れないようにする
+    job_queue = JobQueue(max_workers=sum(DEFAULT_LANES.values()))
+    controller = AudioController(ui=window, data_model=data_model, job_queue=job_queue)
+
     # ==========================================
     # 🔗 シグナルとスロットの接続 (Binding)
     # ==========================================
-    
+
     # --- A. 録音ボタンが押されたとき ---
     # Widgetのシグナル(seconds) -> Controllerの録音処理へ
-    # ※ controller.handle_record_audioは引数を取らない仕様になっているため、lambdaで調整するか、
-    # controller側を修正する必要があります。ここでは一旦lambdaで呼び出します。
     window.recording_settings.recording_start_requested.connect(
-        lambda seconds: controller.handle_record_audio()
+        controller.handle_record_audio
     )
-    
+
+    # --- A'. ライブ文字起こしボタンが押されたとき ---
+    window.recording_settings.live_transcription_requested.connect(
+        controller.handle_live_transcription
+    )
+
     # --- B. 文字起こしボタンが押されたとき ---
     window.process_save.transcribe_requested.connect(
         controller.handle_transcribe_audio
     )
-    
+
     # --- C. 保存ボタンが押されたとき ---
     window.process_save.save_requested.connect(
         controller.handle_save_transcription
     )
 
-    # 4. アプリケーションの開始
-    window.show()
-    sys.exit(app.exec())
+    # --- D. 中止ボタンが押されたとき ---
+    window.process_save.cancel_requested.connect(
+        controller.handle_cancel
+    )
+
+    # --- E. 保存済みの文字起こしを検索したとき ---
+    window.transcript_search.search_requested.connect(
+        controller.handle_search
+    )
+    window.transcript_search.transcript_selected.connect(
+        controller.handle_open_transcript
+    )
+
+    # --- F. 処理中の表示・処理時間の表示とアプリ終了時の後片付け ---
+    job_queue.busy_changed.connect(window.set_busy)
+    job_queue.job_measured.connect(lambda job_id, summary: window.show_perf_run(summary))
+    app.aboutToQuit.connect(controller.shutdown)
+    profiler.mark("コントローラー準備")
+
+    # 録音・文字起こしのモジュールと文字起こしモデルをバックグラウンドで読み込んでおく
+    # （最初の録音・文字起こしを速くするため）
+    warm_up = controller.warm_up()
+    if profiler.enabled:
+        def _report():
+            warm_up.join()
+            profiler.mark("ML モジュール読み込み")
+            profiler.report()
+        threading.Thread(target=_report, name="startup-profile", daemon=True).start()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,25 +1,339 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import mlx_whisper
 import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from models import instrumentation
+from models.audio_io import SAMPLE_RATE, load_audio
+from models.model_registry import ModelRegistry
+from models.transcriber import Transcriber, create_transcriber, resolve_backend
+from models.transcript_cache import TranscriptCache, get_default_cache
+from models.vad import transcribe_speech_only
+
+# settings.json の model_name が無い場合に使うモデル
+DEFAULT_MODEL_NAME = "whisper-base-mlx"
+
+# settings.json の backend が無い場合に使うバックエンド（実行環境から自動で選ぶ）
+DEFAULT_BACKEND = "auto"
+
+# 区間の確かさの項目（2 段階の文字起こしで、文字起こしし直す区間を選ぶのに使う。refine.needs_refinement を参照）
+CONFIDENCE_KEYS = ("avg_logprob", "no_speech_prob")
+
+# バックエンドごとのオプション（num_threads, batch_size など）
+_backend_options: Dict[str, Dict[str, Any]] = {}
+
+
+def _registry_key(model_name: Optional[str], backend: Optional[str]) -> str:
+    return f"{resolve_backend(backend or DEFAULT_BACKEND)}:{model_name or DEFAULT_MODEL_NAME}"
+
+
+def model_key(model_name: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """キャッシュや文字起こしストアに記録するモデルの識別名（"バックエンド:モデル名"）を返す"""
+    return _registry_key(model_name, backend)
+
+
+def _load_transcriber(key: str) -> Transcriber:
+    """レジストリのキー（"バックエンド:モデル名"）からバックエンドを作成し、モデルを読み込む"""
+    backend, model_name = key.split(":", 1)
+    return create_transcriber(backend, model_name, **_backend_options.get(backend, {})).load()
+
+
+# 読み込み済みモデルのレジストリ（base と large-v3-turbo を切り替えても再読み込みしない）
+_registry = ModelRegistry(_load_transcriber, capacity=2, on_evict=lambda transcriber: transcriber.close())
+
+
+def get_registry() -> ModelRegistry:
+    """モデルレジストリを返す"""
+    return _registry
+
+
+def configure_backend(backend: str, **options: Any) -> None:
+    """
+    バックエンドのオプションを設定する（読み込み済みのモデルは破棄され、次回の使用時に読み込み直す）
+
+    Parameters
+    ----------
+    backend : str
+        バックエンド名（"mlx", "cpu", "stub", "auto"）
+    **options : Any
+        num_threads, batch_size など
+    """
+    backend = resolve_backend(backend)
+    _backend_options[backend] = dict(options)
+    for key in _registry.loaded_names():
+        if key.startswith(f"{backend}:"):
+            _registry.evict(key)
+
+
+def apply_settings(data_model: Any) -> str:
+    """
+    settings.json のバックエンド設定（backend, num_threads, batch_size）を反映する
+
+    Parameters
+    ----------
+    data_model : DataModel
+        設定を読み取る DataModel
+
+    Returns
+    -------
+    str
+        使用するバックエンド名
+    """
+    backend = resolve_backend(data_model.get("backend", DEFAULT_BACKEND))
+    options = {}
+    if data_model.get("num_threads"):
+        options["num_threads"] = int(data_model.get("num_threads"))
+    if data_model.get("batch_size"):
+        options["batch_size"] = int(data_model.get("batch_size"))
+    if options:
+        configure_backend(backend, **options)
+    return backend
+
+
+def get_transcriber(model_name: Optional[str] = None, backend: Optional[str] = None) -> Transcriber:
+    """
+    読み込み済みのバックエンドを返す（未読み込みならここで読み込む）
+
+    Parameters
+    ----------
+    model_name : str, optional
+        モデル名（デフォルト: DEFAULT_MODEL_NAME）
+    backend : str, optional
+        バックエンド名（デフォルト: DEFAULT_BACKEND）
+    """
+    return _registry.get(_registry_key(model_name, backend))
+
+
+def is_model_loaded(model_name: Optional[str] = None, backend: Optional[str] = None) -> bool:
+    """モデルが読み込み済みかどうかを返す"""
+    return _registry.is_loaded(_registry_key(model_name, backend))
+
+
+def preload_model(model_name: Optional[str] = None, backend: Optional[str] = None) -> threading.Thread:
+    """
+    バックグラウンドでモデルを読み込んでおく（起動時に main.py から呼ぶ）
+
+    Parameters
+    ----------
+    model_name : str, optional
+        読み込むモデル名（デフォルト: DEFAULT_MODEL_NAME）
+    backend : str, optional
+        バックエンド名（デフォルト: DEFAULT_BACKEND）
+
+    Returns
+    -------
+    threading.Thread
+        読み込みを行うスレッド
+    """
+    return _registry.preload(_registry_key(model_name, backend))
+
+
+def transcribe(audio: Union[str, np.ndarray], model_name: Optional[str] = None,
+               backend: Optional[str] = None, vad: bool = False, **decode_options: Any) -> Dict[str, Any]:
+    """
+    音声ファイルまたは音声データを文字起こしし、結果と処理時間を返す
+
+    Parameters
+    ----------
+    audio : str or np.ndarray
+        文字起こしを行う音声ファイルのパス、または 16kHz モノラルの float32 配列
+    model_name : str, optional
+        使用するモデル名（デフォルト: DEFAULT_MODEL_NAME）
+    backend : str, optional
+        使用するバックエンド（デフォルト: DEFAULT_BACKEND）
+    vad : bool
+        True の場合は無音を取り除き、発話区間だけを文字起こしする（区間の時刻は元の録音基準）
+    **decode_options : Any
+        バックエンドの transcribe にそのまま渡すオプション（language など）
+
+    Returns
+    -------
+    Dict[str, Any]
+        バックエンドの文字起こし結果に以下を加えた辞書
+        - "load_seconds": 今回の呼び出しでモデル読み込みにかかった秒数（読み込み済みなら 0）
+        - "decode_seconds": 文字起こし（デコード）にかかった秒数
+        - "vad": 無音除去の結果（vad=True の場合のみ、vad.transcribe_speech_only を参照）
+    """
+    key = _registry_key(model_name, backend)
+    was_loaded = _registry.is_loaded(key)
+    # 文字起こし中に他のスレッドがモデルを破棄しても、終わるまで閉じないように借りる
+    with _registry.lease(key) as transcriber:
+        load_seconds = 0.0 if was_loaded else _registry.load_seconds.get(key, 0.0)
+
+        start = time.perf_counter()
+        if vad:
+            samples = load_audio(audio) if isinstance(audio, str) else audio
+            result = transcribe_speech_only(samples, lambda speech: _decode(transcriber, speech, decode_options))
+        else:
+            result = _decode(transcriber, audio, decode_options)
+        decode_seconds = time.perf_counter() - start
+
+    result["load_seconds"] = load_seconds
+    result["decode_seconds"] = decode_seconds
+    print(f"モデル読み込み: {load_seconds:.2f}秒 / デコード: {decode_seconds:.2f}秒")
+    return result
+
+
+def transcribe_batch(samples_list: List[np.ndarray], model_name: Optional[str] = None,
+                     backend: Optional[str] = None, **decode_options: Any) -> List[Dict[str, Any]]:
+    """
+    複数の音声データをまとめて文字起こしする（文字起こしサーバーが同時に届いた要求をまとめるのに使う）
+
+    Parameters
+    ----------
+    samples_list : List[np.ndarray]
+        16kHz モノラルの float32 配列のリスト
+    model_name : str, optional
+        使用するモデル名（デフォルト: DEFAULT_MODEL_NAME）
+    backend : str, optional
+        使用するバックエンド（デフォルト: DEFAULT_BACKEND）
+    **decode_options : Any
+        バックエンドの transcribe_batch にそのまま渡すオプション
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        samples_list と同じ順番の文字起こし結果
+    """
+    audio_seconds = sum(len(samples) for samples in samples_list) / SAMPLE_RATE
+    with _registry.lease(_registry_key(model_name, backend)) as transcriber:
+        with instrumentation.span("decode", model=transcriber.model_name, audio_seconds=audio_seconds,
+                                  batch_size=len(samples_list)):
+            return transcriber.transcribe_batch(samples_list, **decode_options)
+
+
+def _decode(transcriber: Transcriber, audio: Union[str, np.ndarray], decode_options: Dict[str, Any]) -> Dict[str, Any]:
+    """モデルを呼び出し、デコード時間と音声の長さ（実時間係数の計算用）を計測する"""
+    with instrumentation.span("decode", model=transcriber.model_name) as attrs:
+        result = transcriber.transcribe(audio, **decode_options)
+        if isinstance(audio, str):
+            segments = result.get("segments") or []
+            attrs["audio_seconds"] = float(segments[-1]["end"]) if segments else None
+        else:
+            attrs["audio_seconds"] = len(audio) / SAMPLE_RATE
+    return result
+
+
+def plain_segments(segments: Any) -> List[Dict[str, Any]]:
+    """区間のリストから JSON にできる項目（start, end, text と確かさ）だけを取り出す"""
+    return [
+        {"start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"],
+         **{key: float(seg[key]) for key in CONFIDENCE_KEYS if seg.get(key) is not None}}
+        for seg in segments or []
+    ]
+
+
+def _cached_result(audio: Union[str, np.ndarray], model_name: Optional[str], cache: Optional[TranscriptCache],
+                   use_cache: bool, backend: Optional[str], vad: bool,
+                   decode_options: Dict[str, Any], need_hash: bool = False) -> Dict[str, Any]:
+    """
+    キャッシュを確認し、無ければ文字起こししてキャッシュに保存する（transcribe_details を参照）
+
+    音声のハッシュはキャッシュを使う場合か need_hash が True の場合だけ計算し、
+    それ以外は "audio_hash" を None にする（長い音声ではハッシュの計算も無視できないため）
+    """
+    model_key = _registry_key(model_name, backend)
+    cache = cache or get_default_cache()
+    audio_hash = None
+    if use_cache or need_hash:
+        audio_hash = cache.hash_file(audio) if isinstance(audio, str) else cache.hash_array(audio)
+    duration = None if isinstance(audio, str) else len(audio) / SAMPLE_RATE
+
+    # 同じ音声・同じ設定の結果がキャッシュにあれば、モデルを呼ばずに返す
+    key = None
+    if use_cache:
+        key = cache.make_key(audio_hash, model_key, {**decode_options, "vad": vad})
+        entry = cache.get_entry(key)
+        instrumentation.count("cache_miss" if entry is None else "cache_hit")
+        if entry is not None:
+            print("キャッシュ済みの文字起こし結果を使用します。")
+            return {
+                "text": entry["text"], "segments": entry.get("segments", []), "audio_hash": audio_hash,
+                "model": model_key, "duration": entry.get("duration", duration),
+                "load_seconds": 0.0, "decode_seconds": 0.0, "vad": entry.get("vad"), "cached": True,
+            }
+
+    result = transcribe(audio, model_name=model_name, backend=backend, vad=vad, **decode_options)
+    segments = plain_segments(result.get("segments"))
+    if duration is None:
+        duration = result["vad"]["original_seconds"] if vad else (segments[-1]["end"] if segments else None)
+    details = {
+        "text": result["text"], "segments": segments, "audio_hash": audio_hash, "model": model_key,
+        "duration": duration, "load_seconds": result["load_seconds"], "decode_seconds": result["decode_seconds"],
+        "vad": result.get("vad"), "cached": False,
+    }
+    if key is not None:
+        cache.put(key, result["text"], model_name=model_key, options=decode_options, segments=segments,
+                  duration=duration, load_seconds=details["load_seconds"],
+                  decode_seconds=details["decode_seconds"], vad=details["vad"])
+    print(f"文字起こしが完了:\n{result["text"]}。")
+    return details
+
+
+def transcribe_details(audio: Union[str, np.ndarray], model_name: Optional[str] = None,
+                       cache: Optional[TranscriptCache] = None, use_cache: bool = True,
+                       backend: Optional[str] = None, vad: bool = False, **decode_options: Any) -> Dict[str, Any]:
+    """
+    キャッシュを使って文字起こしし、テキストと一緒に保存用の情報を返す
+
+    Parameters
+    ----------
+    audio : str or np.ndarray
+        音声ファイルのパス、または 16kHz モノラルの float32 配列
+    model_name : str, optional
+        使用するモデル名（デフォルト: DEFAULT_MODEL_NAME）
+    cache : TranscriptCache, optional
+        使用するキャッシュ（デフォルト: アプリ全体で共有するキャッシュ）
+    use_cache : bool
+        False の場合はキャッシュを読まずに必ず文字起こしする
+    backend : str, optional
+        使用するバックエンド（デフォルト: DEFAULT_BACKEND）
+    vad : bool
+        True の場合は無音を取り除いてから文字起こしする
+    **decode_options : Any
+        バックエンドの transcribe にそのまま渡すオプション
+
+    Returns
+    -------
+    Dict[str, Any]
+        "text", "segments", "audio_hash", "model", "duration", "load_seconds", "decode_seconds",
+        "vad"（無音除去の結果。vad=False の場合は None）、"cached"（キャッシュから返した場合は True）を含む辞書。
+        save.save_text_to_file の details に渡すと、文字起こしストアに一緒に登録される
+    """
+    return _cached_result(audio, model_name, cache, use_cache, backend, vad, decode_options, need_hash=True)
+
 
 # 音声ファイルを指定して文字起こし
-def audio_to_text(audio_file_path: str) -> str:
+def audio_to_text(audio_file_path: str, model_name: Optional[str] = None,
+                  cache: Optional[TranscriptCache] = None, use_cache: bool = True,
+                  backend: Optional[str] = None, vad: bool = False, **decode_options: Any) -> str:
     print(f"文字起こしを開始: {audio_file_path}")
     # 音声ファイルが存在しない場合は空文字を返す
     if not os.path.exists(audio_file_path):
         print(f"音声ファイルが見つかりません: {audio_file_path}")
         return ""
-    result = mlx_whisper.transcribe(
-      audio_file_path, path_or_hf_repo="whisper-base-mlx"
-    )
-    print(f"文字起こしが完了:\n{result["text"]}。")
-    return result["text"]
+    return _cached_result(audio_file_path, model_name, cache, use_cache, backend, vad, decode_options)["text"]
+
+
+# メモリ上の音声（16kHz モノラル float32）を文字起こし
+def samples_to_text(samples: np.ndarray, model_name: Optional[str] = None,
+                    cache: Optional[TranscriptCache] = None, use_cache: bool = True,
+                    backend: Optional[str] = None, vad: bool = False, **decode_options: Any) -> str:
+    print(f"文字起こしを開始: メモリ上の音声（{len(samples) / SAMPLE_RATE:.1f}秒）")
+    # 音声が空の場合は空文字を返す
+    if len(samples) == 0:
+        print("音声が空です。")
+        return ""
+    return _cached_result(samples, model_name, cache, use_cache, backend, vad, decode_options)["text"]
 
 if __name__ == "__main__":
     audio_file = "record_audio_output.wav"
     script_dir = os.path.dirname(os.path.abspath(__file__))
     audio_file = os.path.join(script_dir, audio_file)
     text = audio_to_text(audio_file_path=audio_file)
-    print(text)
\ No newline at end of file
+    print(text)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import wave
+from typing import Iterator
+
+import ffmpeg
+import numpy as np
+
+from models import instrumentation
+
+# Whisper が入力として想定しているサンプリングレート
+SAMPLE_RATE = 16000
+
+# stream_audio が 1 回に返す長さ(秒)
+STREAM_CHUNK_SECONDS = 1.0
+
+
+def stream_audio(path: str, sample_rate: int = SAMPLE_RATE,
+                 chunk_seconds: float = STREAM_CHUNK_SECONDS) -> Iterator[np.ndarray]:
+    """
+    音声ファイルを ffmpeg でデコードしながら、モノラル float32 のチャンクを順に返す
+
+    Parameters
+    ----------
+    path : str
+        音声ファイルのパス（WAV, FLAC, Opus など ffmpeg が読める形式なら何でもよい）
+    sample_rate : int
+        変換後のサンプリングレート（デフォルト: 16000）
+    chunk_seconds : float
+        1 チャンクの長さ(秒)。最後のチャンクは短い場合がある
+
+    Yields
+    ------
+    np.ndarray
+        -1.0〜1.0 の float32 のサンプル列
+
+    Notes
+    -----
+    - ファイル全体の PCM を一度にメモリへ読み込まないため、圧縮ファイルでも使用メモリはチャンク分だけになる。
+    - 途中でジェネレーターを閉じると ffmpeg も終了する。
+    """
+    process = (
+        ffmpeg
+        .input(path)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    scratch = np.empty(max(int(sample_rate * chunk_seconds), 1), dtype=np.int16)
+    scratch_bytes = memoryview(scratch).cast('B')
+    try:
+        while True:
+            # パイプは要求より少なく返すことがあるので、チャンクが埋まるか終わりまで読む
+            filled = 0
+            while filled < len(scratch_bytes):
+                n_bytes = process.stdout.readinto(scratch_bytes[filled:])
+                if not n_bytes:
+                    break
+                filled += n_bytes
+            n = filled // 2
+            if n:
+                yield np.multiply(scratch[:n], 1.0 / 32768.0, dtype=np.float32)
+            if filled < len(scratch_bytes):
+                break
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"音声の読み込みに失敗しました: {path}\n{stderr.decode(errors='replace')}")
+    finally:
+        if process.poll() is None:
+            process.terminate()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+
+
+def load_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    音声ファイルを読み込み、モノラル float32 の配列に変換する
+
+    Parameters
+    ----------
+    path : str
+        音声ファイルのパス（ffmpeg が読める形式なら何でもよい）
+    sample_rate : int
+        変換後のサンプリングレート（デフォルト: 16000）
+
+    Returns
+    -------
+    np.ndarray
+        -1.0〜1.0 の float32 のサンプル列
+
+    Notes
+    -----
+    - stream_audio でデコードしながら float32 に変換するため、int16 の PCM 全体を一度に持たない。
+    """
+    with instrumentation.span("resample", sample_rate=sample_rate) as attrs:
+        chunks = list(stream_audio(path, sample_rate, chunk_seconds=30.0))
+        samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        attrs["audio_seconds"] = len(samples) / sample_rate
+    return samples
+
+
+def save_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    float32 の音声を 16bit PCM の WAV ファイルに保存する
+
+    Parameters
+    ----------
+    path : str
+        保存先のパス
+    samples : np.ndarray
+        -1.0〜1.0 の float32 のサンプル列
+    sample_rate : int
+        サンプリングレート
+    """
+    pcm = np.clip(np.asarray(samples) * 32768.0, -32768, 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
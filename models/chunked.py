@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from models.audio_io import SAMPLE_RATE, stream_audio
+from models.live_transcribe import LiveSegment, LiveTranscriber
+
+# 1 回に文字起こしする長さ（Whisper の入力は 30 秒）
+WINDOW_SECONDS = 30.0
+
+# 窓どうしの重なり（境界で切れた単語を次の窓で拾い直すため）
+OVERLAP_SECONDS = 2.0
+
+
+# ==========================================================
+# WAV のメモリマップ読み込み
+# ==========================================================
+def read_wav_header(path: str) -> Tuple[int, int, int, int, int]:
+    """
+    WAV ファイルのヘッダーを読み、PCM データの位置と形式を返す
+
+    Parameters
+    ----------
+    path : str
+        WAV ファイルのパス
+
+    Returns
+    -------
+    Tuple[int, int, int, int, int]
+        (データの開始位置[バイト], データのバイト数, サンプリングレート, チャンネル数, ビット数)
+
+    Raises
+    ------
+    ValueError
+        RIFF/WAVE 形式でない、または PCM でない場合
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"WAV ファイルではありません: {path}")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"data チャンクが見つかりません: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + size % 2, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"fmt チャンクが見つかりません: {path}")
+                audio_format, channels, sample_rate, _, _, bits = fmt
+                if audio_format != 1:
+                    raise ValueError(f"PCM 以外の WAV には対応していません: {path}")
+                data_offset = f.tell()
+                # 録音中に書かれたファイルなどでサイズが不正な場合は、ファイル末尾までをデータとみなす
+                file_size = os.fstat(f.fileno()).st_size
+                size = min(size, file_size - data_offset)
+                return data_offset, size, sample_rate, channels, bits
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+
+
+class MemmapWavReader:
+    """
+    16kHz モノラル 16bit の WAV を、必要な範囲だけメモリマップして読むクラス。
+
+    Notes
+    -----
+    - 窓ごとにその範囲だけをメモリマップし、float32 に変換したらすぐに解放する。
+      ファイル全体を読み込まないため、何時間の録音でも使用メモリは窓 1 つ分で一定になる。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data_offset, data_size, self.sample_rate, self.channels, self.bits = read_wav_header(path)
+        if self.sample_rate != SAMPLE_RATE or self.channels != 1 or self.bits != 16:
+            raise ValueError(
+                f"16kHz モノラル 16bit の WAV ではありません（{self.sample_rate}Hz, "
+                f"{self.channels}ch, {self.bits}bit）: {path}"
+            )
+        self.num_samples = data_size // 2
+
+    @property
+    def duration(self) -> float:
+        """音声の長さ(秒)"""
+        return self.num_samples / self.sample_rate
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """
+        サンプル範囲 [start, stop) を float32 で返す
+
+        Parameters
+        ----------
+        start : int
+            開始サンプル
+        stop : int
+            終了サンプル
+
+        Returns
+        -------
+        np.ndarray
+            -1.0〜1.0 の float32 のサンプル列
+        """
+        start = max(start, 0)
+        stop = min(stop, self.num_samples)
+        if stop <= start:
+            return np.zeros(0, dtype=np.float32)
+        mapped = np.memmap(self.path, dtype="<i2", mode="r",
+                           offset=self.data_offset + start * 2, shape=(stop - start,))
+        try:
+            return mapped.astype(np.float32) / 32768.0
+        finally:
+            # マップを解放し、読み込んだページが常駐し続けないようにする
+            del mapped
+
+
+def iter_blocks(path: str, block_seconds: float = WINDOW_SECONDS - OVERLAP_SECONDS) -> Iterator[np.ndarray]:
+    """
+    音声ファイルを先頭から順に、連続したブロックに分けて返す
+
+    Parameters
+    ----------
+    path : str
+        音声ファイルのパス。16kHz モノラル 16bit の WAV はメモリマップで読み、
+        それ以外の形式は ffmpeg でストリーミング変換しながら読む
+    block_seconds : float
+        ブロックの長さ(秒)（ffmpeg で読む場合は、変換された単位のまま返すので長さはそろわない）
+
+    Yields
+    ------
+    np.ndarray
+        float32 のサンプル列（つなげると音声全体になる）
+    """
+    try:
+        reader = MemmapWavReader(path)
+    except (ValueError, struct.error):
+        reader = None
+
+    if reader is not None:
+        block = max(int(block_seconds * SAMPLE_RATE), 1)
+        for start in range(0, reader.num_samples, block):
+            yield reader.read(start, start + block)
+        return
+
+    # WAV 以外（FLAC, Opus, 44.1kHz の WAV など）は ffmpeg でデコードしながら返す
+    yield from stream_audio(path)
+
+
+def transcribe_chunked(path: str, transcribe_fn: Callable[[np.ndarray], Dict[str, Any]],
+                       on_segment: Optional[Callable[[LiveSegment], None]] = None,
+                       window_seconds: float = WINDOW_SECONDS, overlap_seconds: float = OVERLAP_SECONDS,
+                       prefetch: int = 2, cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    長い音声ファイルを窓ごとに文字起こしする
+
+    Parameters
+    ----------
+    path : str
+        音声ファイルのパス
+    transcribe_fn : Callable[[np.ndarray], Dict[str, Any]]
+        float32 の音声を受け取り、"segments" を含む辞書を返す関数（audio2text.transcribe と同じ形式）
+    on_segment : Callable[[LiveSegment], None], optional
+        確定した区間を受け取る関数（区間の時刻は音声ファイルの先頭基準）
+    window_seconds : float
+        窓の長さ(秒)
+    overlap_seconds : float
+        窓どうしの重なり(秒)
+    prefetch : int
+        先読みしておくブロック（窓の長さ - 重なり）の数
+    cancel_event : threading.Event, optional
+        セットされると処理を途中で終了する
+
+    Returns
+    -------
+    Dict[str, Any]
+        "text", "audio_seconds", "decode_seconds", "windows" を含む辞書
+
+    Notes
+    -----
+    - 音声の読み込み・変換は別スレッドで行い、モデルの実行と重ねる（パイプライン処理）。
+      先読みは prefetch ブロックまでなので、使用メモリは音声の長さに依存しない。
+    - 窓の最後の区間は途中で切れている可能性があるので確定させず（LiveTranscriber と同じ）、
+      次の窓をその区間の開始 - overlap_seconds から始めて文字起こしし直す。最後の窓だけは最後の区間も確定させる。
+    - 窓の重なりで 2 回出てきた区間は、時刻と文字列の重なりで取り除く（LiveTranscriber と同じ方法）。
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    if overlap >= window:
+        raise ValueError("overlap_seconds は window_seconds より短くしてください。")
+    # 確定させなかった区間から次の窓を始めても、窓は少なくともこれだけ進める（同じ窓を繰り返さない）
+    min_advance = max(window // 2, 1)
+
+    blocks: "queue.Queue" = queue.Queue(maxsize=max(prefetch, 1))
+    done = object()
+    errors = []
+
+    def _produce() -> None:
+        try:
+            for block in iter_blocks(path, (window - overlap) / SAMPLE_RATE):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                blocks.put(block)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            blocks.put(done)
+
+    producer = threading.Thread(target=_produce, name="chunked-reader", daemon=True)
+    producer.start()
+
+    # 最後の区間を確定させずに持ち越せるのは、窓の先頭から min_advance 秒以降に始まる区間だけ
+    # （それより前に始まる区間は、次の窓に収まらないので確定させる）
+    merger = LiveTranscriber(transcribe_fn, step_seconds=min_advance / SAMPLE_RATE,
+                             overlap_seconds=overlap_seconds, max_window_seconds=window_seconds)
+    buffer = np.zeros(0, dtype=np.float32)  # buffer_start サンプル目からの、読み込み済みの音声
+    buffer_start = 0
+    window_start = 0
+    finished = False
+    count = 0
+    start_time = time.perf_counter()
+    while not (cancel_event is not None and cancel_event.is_set()):
+        # 窓 1 つ分がそろうか、音声の終わりまで読み込む
+        while not finished and buffer_start + len(buffer) < window_start + window:
+            block = blocks.get()
+            if block is done:
+                finished = True
+            else:
+                buffer = np.concatenate((buffer, block))
+        samples = buffer[window_start - buffer_start:window_start + window - buffer_start]
+        final = finished and buffer_start + len(buffer) <= window_start + window
+        if len(samples) == 0 and count > 0:
+            break
+
+        held = None
+        for segment in merger.process_window(samples, window_start / SAMPLE_RATE, final=final):
+            if not segment.is_final:
+                held = segment
+            elif on_segment is not None:
+                on_segment(segment)
+        count += 1
+        print(f"窓 {count} を文字起こししました（{(window_start + len(samples)) / SAMPLE_RATE:.0f}秒まで）")
+        if final:
+            break
+
+        if held is None:
+            next_start = window_start + window - overlap
+        else:
+            next_start = max(int(held.start * SAMPLE_RATE) - overlap, window_start + min_advance)
+        # 次の窓より前の音声は使わないので捨てる
+        buffer = buffer[next_start - buffer_start:]
+        buffer_start = next_start
+        window_start = next_start
+
+    # 中止した場合は、読み込みスレッドが終わるまでキューを空にする
+    while producer.is_alive():
+        try:
+            blocks.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    producer.join()
+    if errors:
+        raise errors[0]
+
+    return {
+        "text": merger.committed_text,
+        "audio_seconds": (buffer_start + len(buffer)) / SAMPLE_RATE,
+        "decode_seconds": merger.decode_seconds,
+        "wall_seconds": time.perf_counter() - start_time,
+        "windows": count,
+    }
@@ -1,6 +1,238 @@
+import atexit
+import copy
 import json
 import os
-from typing import Any, Dict
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+# 最後の変更からこの秒数だけ変更が無ければファイルに書き込む
+WRITE_DELAY_SECONDS = 0.5
+
+# 変更が続いていても、最初の変更からこの秒数が経てば書き込む
+MAX_WRITE_DELAY_SECONDS = 2.0
+
+# ファイルが他のプロセスに書き換えられていないか確認する間隔（get のたびに stat しないため）
+CHECK_INTERVAL_SECONDS = 1.0
+
+
+class _SettingsStore:
+    """
+    1 つの設定ファイルの内容をメモリに保持し、プロセス内の DataModel で共有するクラス。
+
+    Notes
+    -----
+    - 変更はメモリ上の辞書に反映し、ファイルへの書き込みはバックグラウンドのスレッドがまとめて行う
+      （最後の変更から WRITE_DELAY_SECONDS 後、遅くとも MAX_WRITE_DELAY_SECONDS 後）。
+    - 書き込みは一時ファイルに書いてから os.replace で置き換えるため、途中で落ちても壊れたファイルは残らない。
+    - 他のプロセスによる書き換えは、ファイルの更新時刻とサイズで検出する（確認は CHECK_INTERVAL_SECONDS ごと）。
+      未保存の変更がある項目は、読み込み直した内容より優先する。
+    - 読み込み直したファイルが壊れている（書き込み途中・手で編集中など）場合は、メモリ上の設定をそのまま使う。
+      デフォルト設定で作り直すのは、最初の読み込みでファイルがない・壊れている場合だけ。
+    - data を直接書き換えた項目も、最後に読み書きした内容と比べて未保存の変更として扱う。
+    """
+
+    def __init__(self, path: str, defaults: Dict[str, Any]) -> None:
+        self.path = path
+        self.data: Dict[str, Any] = {}
+        self._defaults = defaults
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._stamp: Optional[Tuple[int, int]] = None   # 最後に読み書きしたときの (更新時刻, サイズ)
+        self._checked_at = 0.0
+        self._pending: Set[str] = set()                  # まだファイルに書いていない項目
+        self._synced: Optional[Dict[str, Any]] = None    # 最後に読み書きした内容（直接の書き換えを見つけるため）
+        self._first_change_at: Optional[float] = None
+        self._last_change_at = 0.0
+        self._batch_depth = 0
+        self._writer: Optional[threading.Thread] = None
+        self.reload()
+
+    # ---------------------------------------------------------
+    # 読み込み・変更の検出
+    # ---------------------------------------------------------
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> None:
+        """設定ファイルを読み込み直す（未保存の変更は残す）"""
+        with self._lock:
+            data = self._read()
+            if data is None:
+                if self._synced is not None:
+                    # 読み込み済みなら、壊れたファイルで設定を消さない（次の確認で読み直す）
+                    print(f"設定ファイルを読み込めなかったため、現在の設定を使い続けます: {self.path}")
+                    return
+                # 最初の読み込みでファイルがない・JSON が壊れている場合 → デフォルト設定で生成
+                data = dict(self._defaults)
+                self._merge(data)
+                self._write_file()
+                return
+            self._merge(data)
+            self._synced = copy.deepcopy(self.data)
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """設定ファイルを読む。ファイルがない・壊れている場合は None を返す"""
+        stamp = self._file_stamp()
+        if stamp is None:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        self._stamp = stamp
+        self._checked_at = time.monotonic()
+        return data
+
+    def _merge(self, data: Dict[str, Any]) -> None:
+        """読み込んだ内容に未保存の変更を重ね、共有の辞書を置き換えずに更新する"""
+        self._collect_direct_edits()
+        for key in self._pending:
+            if key in self.data:
+                data[key] = self.data[key]
+            else:
+                data.pop(key, None)
+        self.data.clear()
+        self.data.update(data)
+
+    def _collect_direct_edits(self) -> None:
+        """data を直接書き換えた項目を、未保存の変更に加える"""
+        if self._synced is None:
+            return
+        missing = object()
+        for key in set(self.data) | set(self._synced):
+            if self.data.get(key, missing) != self._synced.get(key, missing):
+                self._pending.add(key)
+
+    def check_for_changes(self) -> None:
+        """前回の確認から CHECK_INTERVAL_SECONDS 以上経っていれば、ファイルの書き換えを確認する"""
+        now = time.monotonic()
+        if now - self._checked_at < CHECK_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            if self._file_stamp() != self._stamp:
+                self.reload()
+
+    # ---------------------------------------------------------
+    # 変更・書き込み
+    # ---------------------------------------------------------
+    def set(self, key: str, value: Any) -> None:
+        """値を変更して未保存として記録し、バックグラウンドでの書き込みを予約する"""
+        with self._lock:
+            self.data[key] = value
+            self._pending.add(key)
+            now = time.monotonic()
+            if self._first_change_at is None:
+                self._first_change_at = now
+            self._last_change_at = now
+            if self._batch_depth == 0:
+                self._schedule()
+
+    def begin_batch(self) -> None:
+        with self._lock:
+            self._batch_depth += 1
+
+    def end_batch(self) -> None:
+        with self._lock:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._pending:
+                self._schedule()
+
+    def _schedule(self) -> None:
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_behind, name="settings-writer", daemon=True)
+            self._writer.start()
+        self._changed.notify_all()
+
+    def _write_behind(self) -> None:
+        """変更が落ち着くまで待ってから書き込む（バックグラウンドのスレッドで実行）"""
+        with self._lock:
+            while self._pending:
+                if self._batch_depth > 0:
+                    self._changed.wait()
+                    continue
+                now = time.monotonic()
+                due = min(self._last_change_at + WRITE_DELAY_SECONDS,
+                          self._first_change_at + MAX_WRITE_DELAY_SECONDS)
+                if now < due:
+                    self._changed.wait(due - now)
+                    continue
+                try:
+                    self.write()
+                except OSError as e:
+                    print(f"設定ファイルの保存に失敗しました: {self.path}（{e}）")
+                    return
+            self._writer = None
+
+    def write(self) -> None:
+        """現在の設定をすぐにファイルへ書き込む（一時ファイル + os.replace）"""
+        with self._lock:
+            # 前回の読み書きの後に他のプロセスが書き換えていれば、その内容に未保存の変更を重ねて書く
+            self._collect_direct_edits()
+            if self._file_stamp() != self._stamp:
+                data = self._read()
+                if data is not None:
+                    self._merge(data)
+            self._write_file()
+
+    def _write_file(self) -> None:
+        with self._lock:
+            folder = os.path.dirname(os.path.abspath(self.path))
+            tmp_path = os.path.join(folder, f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._synced = copy.deepcopy(self.data)
+            self._stamp = self._file_stamp()
+            self._checked_at = time.monotonic()
+            self._pending.clear()
+            self._first_change_at = None
+
+    def flush(self) -> None:
+        """未保存の変更があれば、待たずにすぐ書き込む"""
+        with self._lock:
+            self._collect_direct_edits()
+            if self._pending:
+                self.write()
+            self._changed.notify_all()
+
+
+# 設定ファイルごとの共有ストア（同じファイルを開く DataModel は同じ内容を見る）
+_stores: Dict[str, _SettingsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(path: str, defaults: Dict[str, Any]) -> _SettingsStore:
+    key = os.path.normcase(os.path.abspath(path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _SettingsStore(path, defaults)
+            _stores[key] = store
+        return store
+
+
+@atexit.register
+def _flush_all() -> None:
+    """終了時に未保存の設定を書き込む"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        try:
+            store.flush()
+        except OSError:
+            pass
 
 
 class DataModel:
@@ -12,6 +244,9 @@ class DataModel:
     - 設定ファイル（settings.json）の読み取り・書き込みを担当する。
     - GUI や Controller から直接ファイルを扱わないようにするため、
       設定関連の処理は必ずこのクラスを経由する。
+    - 同じ設定ファイルを使う DataModel はプロセス内で内容を共有する（ファイルの読み込みは 1 回だけ）。
+    - set() はメモリ上の値だけを変え、ファイルへの書き込みはバックグラウンドでまとめて行う。
+      複数の項目をまとめて変える場合は `with model.batch(): ...` を使う。
     """
 
     def __init__(self, settings_path: str = "settings.json") -> None:
@@ -25,47 +260,44 @@ class DataModel:
         # settings.json のパスを保持する
         self.settings_path = settings_path
 
-        # 設定内容を保持する辞書
-        self.settings: Dict[str, Any] = {}
+        # 設定内容を保持するストア（同じファイルなら他の DataModel と共有する）
+        # アプリ起動時（最初の 1 回だけ）に設定ファイルを読み込む
+        self._store = _get_store(settings_path, self._default_settings())
 
-        # アプリ起動時に設定ファイルを読み込む
-        self.load_settings()
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """設定内容を保持する辞書（直接書き換えた場合は save_settings を呼ぶ）"""
+        return self._store.data
 
     # ---------------------------------------------------------
     # 設定ファイルの読み込み
     # ---------------------------------------------------------
     def load_settings(self) -> None:
         """
-        JSON の設定ファイルを読み込み、`self.settings` に展開する。
+        JSON の設定ファイルを読み込み直し、`self.settings` に展開する。
 
         Notes
         -----
         - ファイルがない場合はデフォルト設定を生成する。
+        - 他のプロセスによる書き換えは get() のときに自動で取り込むので、通常は呼ぶ必要はない。
         """
 
-        if not os.path.exists(self.settings_path):
-            # ファイルがない場合 → デフォルト設定で新規作成
-            self.settings = self._default_settings()
-            self.save_settings()
-            return
-
-        try:
-            with open(self.settings_path, "r", encoding="utf-8") as f:
-                self.settings = json.load(f)
-        except json.JSONDecodeError:
-            # JSON が壊れている場合 → デフォルト設定で再生成
-            self.settings = self._default_settings()
-            self.save_settings()
+        self._store.reload()
 
     # ---------------------------------------------------------
     # 設定ファイルの保存
     # ---------------------------------------------------------
     def save_settings(self) -> None:
         """
-        現在の設定 (`self.settings`) を JSON ファイルに保存する。
+        現在の設定 (`self.settings`) をすぐに JSON ファイルに保存する。
+        """
+        self._store.write()
+
+    def flush(self) -> None:
+        """
+        未保存の変更があれば、バックグラウンドの書き込みを待たずにすぐ保存する（アプリ終了時など）。
         """
-        with open(self.settings_path, "w", encoding="utf-8") as f:
-            json.dump(self.settings, f, indent=4, ensure_ascii=False)
+        self._store.flush()
 
     # ---------------------------------------------------------
     # デフォルト設定（最初に自動生成される設定）
@@ -107,10 +339,11 @@ class DataModel:
             設定値
         """
 
-        return self.settings.get(key, default)
+        self._store.check_for_changes()
+        return self._store.data.get(key, default)
 
     # ---------------------------------------------------------
-    # 設定値を変更する（変更したら save_settings を呼ぶ）
+    # 設定値を変更する（ファイルへの保存はバックグラウンドで行う）
     # ---------------------------------------------------------
     def set(self, key: str, value: Any) -> None:
         """
@@ -124,5 +357,22 @@ class DataModel:
             新しい値
         """
 
-        self.settings[key] = value
-        self.save_settings()
+        self._store.set(key, value)
+
+    @contextmanager
+    def batch(self) -> Iterator["DataModel"]:
+        """
+        複数の設定値をまとめて変更する（ブロックを抜けたときに 1 回だけ保存を予約する）。
+
+        Examples
+        --------
+        >>> with model.batch():
+        ...     model.set("record_seconds", 30)
+        ...     model.set("model_name", "whisper-large-v3-turbo")
+        """
+
+        self._store.begin_batch()
+        try:
+            yield self
+        finally:
+            self._store.end_batch()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# 画面に表示するために残しておく実行の数
+DEFAULT_HISTORY = 20
+
+
+@dataclass
+class SpanRecord:
+    """
+    計測した区間 1 つ分の記録。
+
+    Attributes
+    ----------
+    name : str
+        区間の名前（"record", "resample", "model_load", "decode", "vad", "refine", "save", "store"）
+    start : float
+        実行の開始からの開始時刻(秒)
+    seconds : float
+        かかった時間(秒)
+    attrs : Dict[str, Any]
+        付加情報（音声の長さ、モデル名など）
+    """
+    name: str
+    start: float
+    seconds: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Run:
+    """
+    1 回の処理（録音、文字起こし、保存など）の計測結果をまとめるクラス。
+    """
+
+    def __init__(self, run_id: int, name: str) -> None:
+        self.id = run_id
+        self.name = name
+        self.started_at = time.time()
+        self.status = "running"
+        self.seconds = 0.0
+        self.spans: List[SpanRecord] = []
+        self.counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        段階ごとの合計時間・カウンター・実時間係数をまとめた辞書を返す
+
+        Returns
+        -------
+        Dict[str, Any]
+            "id", "name", "status", "started_at", "seconds", "stages"（段階名 → 合計秒数）,
+            "counters", "audio_seconds", "real_time_factor",
+            "vad_saved_seconds"（無音除去で文字起こしせずに済んだ秒数。無音除去をしていなければ None）を含む辞書
+        """
+        with self._lock:
+            stages: Dict[str, float] = {}
+            audio_seconds = 0.0
+            vad_saved_seconds: Optional[float] = None
+            for span in self.spans:
+                stages[span.name] = stages.get(span.name, 0.0) + span.seconds
+                if span.name == "decode":
+                    audio_seconds += span.attrs.get("audio_seconds") or 0.0
+                elif span.name == "vad":
+                    vad_saved_seconds = (vad_saved_seconds or 0.0) + (span.attrs.get("saved_seconds") or 0.0)
+            counters = dict(self.counters)
+        decode = stages.get("decode", 0.0)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "stages": stages,
+            "counters": counters,
+            "audio_seconds": audio_seconds,
+            # デコード時間 / 音声の長さ（1 より小さければ実時間より速い）
+            "real_time_factor": decode / audio_seconds if audio_seconds > 0 else None,
+            "vad_saved_seconds": vad_saved_seconds,
+        }
+
+
+class Instrumentation:
+    """
+    処理時間の区間（span）とカウンターを記録し、JSON Lines に書き出すクラス。
+
+    Notes
+    -----
+    - run() で囲んだ処理の中で span() / count() を呼ぶと、その実行の記録になる。
+      実行はスレッドごとに管理する。実行を持たないスレッド（ライブ文字起こしの録音スレッドなど）の
+      記録は、実行中の実行が 1 つだけならそれに加える。
+    - export_path を指定すると、区間と実行の記録を 1 行 1 件の JSON で追記する。
+    - 実行の結果を画面に届けるのは JobQueue（job_measured シグナル）が行う。
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY, export_path: Optional[str] = None) -> None:
+        self.history: Deque[Dict[str, Any]] = collections.deque(maxlen=history)
+        self.export_path = export_path
+        self._local = threading.local()
+        self._active: List[Run] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._export_file = None
+
+    # ---------------------------------------------------------
+    # 設定
+    # ---------------------------------------------------------
+    def set_export_path(self, path: Optional[str]) -> None:
+        """記録を書き出す JSON Lines ファイルを設定する（None で書き出さない）"""
+        with self._lock:
+            if self._export_file is not None:
+                self._export_file.close()
+                self._export_file = None
+            self.export_path = path
+
+    # ---------------------------------------------------------
+    # 計測
+    # ---------------------------------------------------------
+    def current_run(self) -> Optional[Run]:
+        """このスレッドの実行を返す（無ければ、実行中の実行が 1 つだけならそれを返す）"""
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            return run
+        with self._lock:
+            return self._active[0] if len(self._active) == 1 else None
+
+    @contextmanager
+    def run(self, name: str) -> Iterator[Run]:
+        """
+        1 回の処理を計測する
+
+        Parameters
+        ----------
+        name : str
+            処理の名前（"文字起こし" など）
+
+        Yields
+        ------
+        Run
+            計測中の実行
+        """
+        run = Run(next(self._ids), name)
+        previous = getattr(self._local, "run", None)
+        self._local.run = run
+        with self._lock:
+            self._active.append(run)
+        try:
+            yield run
+            run.status = "ok"
+        except BaseException as e:
+            run.status = type(e).__name__
+            raise
+        finally:
+            run.seconds = run.elapsed()
+            self._local.run = previous
+            with self._lock:
+                self._active.remove(run)
+            summary = run.summary()
+            self.history.append(summary)
+            self._export({"type": "run", **summary})
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        区間の処理時間を計測する
+
+        Parameters
+        ----------
+        name : str
+            区間の名前（"decode" など）
+        **attrs : Any
+            付加情報
+
+        Yields
+        ------
+        Dict[str, Any]
+            付加情報の辞書（処理の中で音声の長さなどを書き足してよい）
+        """
+        run = self.current_run()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            seconds = time.perf_counter() - start
+            record = SpanRecord(name, start - run._start if run is not None else 0.0, seconds, attrs)
+            if run is not None:
+                with run._lock:
+                    run.spans.append(record)
+            self._export({"type": "span", "run": run.id if run is not None else None, "name": name,
+                          "start": record.start, "seconds": seconds, "attrs": attrs})
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        カウンター（キャッシュのヒット数など）を増やす
+
+        Parameters
+        ----------
+        name : str
+            カウンターの名前（"cache_hit" など）
+        n : int
+            増やす数
+        """
+        run = self.current_run()
+        if run is not None:
+            with run._lock:
+                run.counters[name] = run.counters.get(name, 0) + n
+        self._export({"type": "count", "run": run.id if run is not None else None, "name": name, "n": n})
+
+    def recent_runs(self) -> List[Dict[str, Any]]:
+        """直近の実行の summary() を古い順に返す"""
+        return list(self.history)
+
+    # ---------------------------------------------------------
+    # 書き出し
+    # ---------------------------------------------------------
+    def _export(self, record: Dict[str, Any]) -> None:
+        if self.export_path is None:
+            return
+        line = json.dumps({"time": time.time(), **record}, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                if self._export_file is None:
+                    self._export_file = open(self.export_path, "a", encoding="utf-8")
+                self._export_file.write(line + "\n")
+                self._export_file.flush()
+            except OSError as e:
+                print(f"計測結果の書き出しに失敗しました: {self.export_path}（{e}）")
+                self.export_path = None
+
+
+# アプリ全体で共有する計測
+_default = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    """アプリ全体で共有する計測を返す"""
+    return _default
+
+
+def span(name: str, **attrs: Any):
+    """アプリ全体で共有する計測で区間を計測する（Instrumentation.span を参照）"""
+    return _default.span(name, **attrs)
+
+
+def count(name: str, n: int = 1) -> None:
+    """アプリ全体で共有する計測のカウンターを増やす（Instrumentation.count を参照）"""
+    _default.count(name, n)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from models.record import SAMPLE_RATE, StreamingRecorder
+
+
+@dataclass
+class LiveSegment:
+    """
+    ライブ文字起こしで得られた区間。
+
+    Attributes
+    ----------
+    text : str
+        区間のテキスト（確定済みテキストとの重複は取り除かれている）
+    start : float
+        録音開始からの開始時刻(秒)
+    end : float
+        録音開始からの終了時刻(秒)
+    is_final : bool
+        True なら確定、False なら暫定（次の結果で置き換えられる）
+    """
+    text: str
+    start: float
+    end: float
+    is_final: bool
+
+
+def merge_overlap(committed: str, text: str, min_overlap: int = 2) -> str:
+    """
+    確定済みテキストの末尾と重複している text の先頭部分を取り除く
+
+    Parameters
+    ----------
+    committed : str
+        確定済みのテキスト
+    text : str
+        新しく得られたテキスト
+    min_overlap : int
+        重複とみなす最小の文字数
+
+    Returns
+    -------
+    str
+        重複を取り除いた text
+    """
+    text = text.strip()
+    tail = committed[-len(text):] if text else ""
+    for k in range(min(len(tail), len(text)), min_overlap - 1, -1):
+        if tail.endswith(text[:k]):
+            return text[k:].strip()
+    return text
+
+
+class LiveTranscriber:
+    """
+    録音を続けながら、重なりのある音声窓を順に文字起こしするクラス。
+
+    Notes
+    -----
+    - 窓は「確定済みの位置 - overlap_seconds」から現在までの音声（最大 max_window_seconds 秒）。
+      step_seconds 秒ぶん新しい音声が届くたびに文字起こしする。
+    - 窓内の区間のうち最後の 1 つを除いたものを確定（final）とし、最後の区間は暫定（partial）として返す。
+      最後の区間は録音中の発話で途切れている可能性があるため、次の窓で確定させる。
+    - 窓の境界で重複した区間は、時刻と文字列の重なり（merge_overlap）で取り除く。
+    - 最初のテキストが出るまでの時間（time_to_first_text）と実時間係数（real_time_factor =
+      文字起こし時間 / 音声の長さ）を計測する。
+    """
+
+    def __init__(self, transcribe_fn: Callable[[np.ndarray], Dict[str, Any]],
+                 sample_rate: int = SAMPLE_RATE, step_seconds: float = 2.0,
+                 overlap_seconds: float = 1.0, max_window_seconds: float = 30.0) -> None:
+        """
+        Parameters
+        ----------
+        transcribe_fn : Callable[[np.ndarray], Dict[str, Any]]
+            float32 の音声を受け取り、"segments"（start, end, text）を含む辞書を返す関数
+            （audio2text.transcribe と同じ形式）
+        sample_rate : int
+            音声のサンプリングレート
+        step_seconds : float
+            新しい音声がこの秒数だけ届くたびに文字起こしする
+        overlap_seconds : float
+            確定済みの位置からさかのぼって窓に含める秒数
+        max_window_seconds : float
+            1 回に文字起こしする音声の最大長(秒)
+        """
+        self.transcribe_fn = transcribe_fn
+        self.sample_rate = sample_rate
+        self.step_seconds = step_seconds
+        self.overlap_seconds = overlap_seconds
+        self.max_window_seconds = max_window_seconds
+
+        self.committed_text = ""       # 確定済みのテキスト
+        self.committed_until = 0.0     # 確定済みの区間の終了時刻(秒)
+        self.segments: List[LiveSegment] = []  # 確定済みの区間
+
+        # 計測用
+        self.decode_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.time_to_first_text: Optional[float] = None
+        self._started_at: Optional[float] = None
+
+    # ---------------------------------------------------------
+    # 1 つの窓の文字起こし
+    # ---------------------------------------------------------
+    def process_window(self, samples: np.ndarray, window_start: float, final: bool = False) -> List[LiveSegment]:
+        """
+        音声窓を文字起こしし、新しく確定した区間と暫定の区間を返す
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            窓の音声（float32）
+        window_start : float
+            窓の開始時刻(秒)
+        final : bool
+            True の場合は最後の区間も確定させる（録音終了時）
+
+        Returns
+        -------
+        List[LiveSegment]
+            確定した区間（is_final=True）と、あれば暫定の区間（is_final=False、最後の要素）
+        """
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+
+        start = time.perf_counter()
+        result = self.transcribe_fn(samples)
+        self.decode_seconds += time.perf_counter() - start
+
+        window_end = window_start + len(samples) / self.sample_rate
+        window_full = window_end - window_start >= self.max_window_seconds - self.step_seconds
+        raw_segments = [s for s in result.get("segments", []) if s.get("text", "").strip()]
+
+        events: List[LiveSegment] = []
+        for i, seg in enumerate(raw_segments):
+            abs_start = window_start + float(seg["start"])
+            abs_end = min(window_start + float(seg["end"]), window_end)
+            # 前の窓で確定済みの区間は飛ばす
+            if abs_end <= self.committed_until + 0.1:
+                continue
+            is_last = i == len(raw_segments) - 1
+            # 窓が最大長に達していても、最後の区間が窓の先頭から step_seconds 秒以降に始まっていれば
+            # 次の窓（確定済みの位置 - overlap_seconds から）に収まるので、確定させずに次の窓で確定させる
+            is_final = final or not is_last or (window_full and abs_start < window_start + self.step_seconds)
+            text = merge_overlap(self.committed_text, seg["text"])
+            if not text:
+                if is_final:
+                    self.committed_until = abs_end
+                continue
+            segment = LiveSegment(text, max(abs_start, self.committed_until), abs_end, is_final)
+            if is_final:
+                self.committed_text += text
+                self.committed_until = abs_end
+                self.segments.append(segment)
+            events.append(segment)
+
+        if events and self.time_to_first_text is None:
+            self.time_to_first_text = time.perf_counter() - self._started_at
+        return events
+
+    def window_start_for(self, now: float) -> float:
+        """現在時刻 now(秒) に対して、次に文字起こしする窓の開始時刻を返す"""
+        return max(self.committed_until - self.overlap_seconds, now - self.max_window_seconds, 0.0)
+
+    # ---------------------------------------------------------
+    # 録音と並行して文字起こしする
+    # ---------------------------------------------------------
+    def run(self, recorder: StreamingRecorder, on_segment: Callable[[LiveSegment], None],
+            cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        recorder で録音しながら文字起こしを行い、区間が得られるたびに on_segment を呼ぶ
+
+        Parameters
+        ----------
+        recorder : StreamingRecorder
+            録音に使うレコーダー（buffer_seconds は max_window_seconds より長くする）
+        on_segment : Callable[[LiveSegment], None]
+            確定・暫定の区間を受け取る関数
+        cancel_event : threading.Event, optional
+            セットされると録音と文字起こしを終了する
+
+        Returns
+        -------
+        Dict[str, Any]
+            "text", "segments", "audio_seconds", "decode_seconds",
+            "time_to_first_text", "real_time_factor" を含む辞書
+        """
+        sr = self.sample_rate
+        buffer = recorder.buffer
+        self._started_at = time.perf_counter()
+
+        # 録音は別スレッドで行い、文字起こしが遅れてもマイクの読み取りを止めない
+        capture_error: List[BaseException] = []
+
+        def _capture() -> None:
+            try:
+                for _ in recorder.chunks():
+                    pass
+            except BaseException as e:
+                capture_error.append(e)
+
+        capture_thread = threading.Thread(target=_capture, name="live-capture", daemon=True)
+        capture_thread.start()
+
+        last_decoded = 0
+        step = int(self.step_seconds * sr)
+        try:
+            while capture_thread.is_alive():
+                if cancel_event is not None and cancel_event.is_set():
+                    recorder.stop()
+                    break
+                total = buffer.total_written
+                if total - last_decoded < step:
+                    time.sleep(0.05)
+                    continue
+                now = total / sr
+                window_start = self.window_start_for(now)
+                samples = buffer.since(int(window_start * sr))
+                last_decoded = total
+                for segment in self.process_window(samples, now - len(samples) / sr):
+                    on_segment(segment)
+        finally:
+            recorder.stop()
+            capture_thread.join()
+
+        if capture_error:
+            raise capture_error[0]
+
+        # 録音終了後に残りを確定させる
+        total = buffer.total_written
+        self.audio_seconds = total / sr
+        if not (cancel_event is not None and cancel_event.is_set()) and total > 0:
+            now = total / sr
+            samples = buffer.since(int(self.window_start_for(now) * sr))
+            if len(samples):
+                for segment in self.process_window(samples, now - len(samples) / sr, final=True):
+                    on_segment(segment)
+
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, Any]:
+        """計測結果と確定済みのテキストを返す"""
+        rtf = self.decode_seconds / self.audio_seconds if self.audio_seconds > 0 else None
+        return {
+            "text": self.committed_text,
+            "segments": list(self.segments),
+            "audio_seconds": self.audio_seconds,
+            "decode_seconds": self.decode_seconds,
+            "time_to_first_text": self.time_to_first_text,
+            "real_time_factor": rtf,
+        }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from models import instrumentation
+
+
+class ModelRegistry:
+    """
+    読み込み済みの文字起こしモデルを保持するレジストリ。
+
+    Notes
+    -----
+    - モデル名（settings.json の `model_name`）をキーにして、一度読み込んだモデルを使い回す。
+    - 保持数が `capacity` を超えた場合は、最も長く使われていないモデルから破棄する（LRU）。
+    - 読み込み時間はモデルごとに `load_seconds` に記録する。
+    - 読み込みはロックの外で行う（読み込み中も、読み込み済みのモデルはすぐに取得できる）。
+      同じモデルを同時に要求された場合は、最初の要求の読み込みを待つ。
+    - 文字起こし中のモデルは `lease()` で借りる。借りられている間に破棄された場合は、
+      すべて返されるまで `on_evict` を呼ばない。
+    """
+
+    def __init__(self, loader: Callable[[str], Any], capacity: int = 2,
+                 on_evict: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Parameters
+        ----------
+        loader : Callable[[str], Any]
+            モデル名を受け取り、モデルを読み込んで返す関数
+        capacity : int
+            同時に保持するモデル数の上限（デフォルト: 2）
+        on_evict : Callable[[Any], None], optional
+            モデルを破棄するときに呼ぶ関数（メモリの解放など）
+        """
+        if capacity < 1:
+            raise ValueError("capacity は 1 以上を指定してください。")
+
+        self.loader = loader
+        self.capacity = capacity
+        self.on_evict = on_evict
+
+        # モデル名 → モデル（末尾ほど最近使われたもの）
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+
+        # モデル名 → 読み込みにかかった秒数
+        self.load_seconds: Dict[str, float] = {}
+
+        # モデル名 → 読み込み中のモデル（同じモデルを二重に読み込まないため）
+        self._loading: Dict[str, Future] = {}
+
+        # id(モデル) → 借りられている数、破棄を待っているモデル
+        self._leases: Dict[int, int] = {}
+        self._retiring: Dict[int, Any] = {}
+
+        self._lock = threading.RLock()
+
+    # ---------------------------------------------------------
+    # モデルの取得（未読み込みなら読み込む）
+    # ---------------------------------------------------------
+    def get(self, model_name: str) -> Any:
+        """
+        モデルを取得する。未読み込みの場合はここで読み込む。
+
+        Parameters
+        ----------
+        model_name : str
+            モデル名（HuggingFace のリポジトリ名またはローカルパス）
+
+        Returns
+        -------
+        Any
+            読み込み済みのモデル
+        """
+        return self._acquire(model_name, lease=False)
+
+    @contextmanager
+    def lease(self, model_name: str) -> Iterator[Any]:
+        """
+        モデルを借りる（ブロックを抜けるまで、破棄されてもモデルを閉じない）
+
+        Examples
+        --------
+        >>> with registry.lease("whisper-base-mlx") as model:
+        ...     model.transcribe(samples)
+        """
+        model = self._acquire(model_name, lease=True)
+        try:
+            yield model
+        finally:
+            self._return(model)
+
+    def _acquire(self, model_name: str, lease: bool) -> Any:
+        with self._lock:
+            if model_name in self._models:
+                self._models.move_to_end(model_name)
+                model = self._models[model_name]
+                if lease:
+                    self._leases[id(model)] = self._leases.get(id(model), 0) + 1
+                return model
+            future = self._loading.get(model_name)
+            loading = future is None
+            if loading:
+                future = self._loading[model_name] = Future()
+
+        if not loading:
+            # 他のスレッドが読み込み中なら、その結果を待つ（読み込み済みなら破棄されていても読み込み直す）
+            future.result()
+            return self._acquire(model_name, lease)
+
+        try:
+            model = self._load(model_name)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[model_name]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[model_name]
+            self._models[model_name] = model
+            if lease:
+                self._leases[id(model)] = self._leases.get(id(model), 0) + 1
+            evicted = []
+            while len(self._models) > self.capacity:
+                evicted_name, evicted_model = self._models.popitem(last=False)
+                evicted.append((evicted_name, evicted_model))
+        future.set_result(model)
+        for evicted_name, evicted_model in evicted:
+            self._retire(evicted_model)
+            print(f"モデルを解放しました: {evicted_name}")
+        return model
+
+    def _load(self, model_name: str) -> Any:
+        print(f"モデルを読み込みます: {model_name}")
+        start = time.perf_counter()
+        with instrumentation.span("model_load", model=model_name):
+            model = self.loader(model_name)
+        elapsed = time.perf_counter() - start
+        self.load_seconds[model_name] = elapsed
+        print(f"モデルの読み込みが完了しました（{elapsed:.2f}秒）: {model_name}")
+        return model
+
+    def _return(self, model: Any) -> None:
+        with self._lock:
+            count = self._leases.pop(id(model)) - 1
+            if count > 0:
+                self._leases[id(model)] = count
+                return
+            # 借りている間に破棄されていれば、ここで閉じる
+            retired = self._retiring.pop(id(model), None)
+        if retired is not None:
+            self._release(retired)
+
+    def _retire(self, model: Any) -> None:
+        """破棄したモデルを閉じる（借りられていれば、すべて返されるまで待つ）"""
+        with self._lock:
+            if self._leases.get(id(model)):
+                self._retiring[id(model)] = model
+                return
+        self._release(model)
+
+    def _release(self, model: Any) -> None:
+        if self.on_evict is not None:
+            self.on_evict(model)
+
+    # ---------------------------------------------------------
+    # バックグラウンドでの事前読み込み
+    # ---------------------------------------------------------
+    def preload(self, model_name: str) -> threading.Thread:
+        """
+        別スレッドでモデルを読み込み、最初の文字起こしの待ち時間をなくす。
+
+        Parameters
+        ----------
+        model_name : str
+            事前に読み込むモデル名
+
+        Returns
+        -------
+        threading.Thread
+            読み込みを行うスレッド（デーモンスレッド）
+        """
+        def _run() -> None:
+            try:
+                self.get(model_name)
+            except Exception as e:
+                print(f"モデルの事前読み込みに失敗しました: {e}")
+
+        thread = threading.Thread(target=_run, name=f"preload-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------------------------------------------------------
+    # 状態の確認・解放
+    # ---------------------------------------------------------
+    def is_loaded(self, model_name: str) -> bool:
+        """モデルが読み込み済みかどうかを返す"""
+        with self._lock:
+            return model_name in self._models
+
+    def evict(self, model_name: str) -> Optional[Any]:
+        """指定したモデルを破棄する。保持していなければ None を返す"""
+        with self._lock:
+            model = self._models.pop(model_name, None)
+        if model is not None:
+            self._retire(model)
+        return model
+
+    def clear(self) -> None:
+        """保持しているモデルをすべて破棄する"""
+        with self._lock:
+            models: List[Any] = list(self._models.values())
+            self._models.clear()
+        for model in models:
+            self._retire(model)
+
+    def loaded_names(self) -> list:
+        """保持しているモデル名を古い順に返す"""
+        with self._lock:
+            return list(self._models)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import itertools
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, Set, Tuple
+
+# ファイル名の付け方
+#   "sequential": result.txt, result(1).txt, result(2).txt ...（従来どおり）
+#   "timestamp" : result_20250601-153012.txt（同じ秒に重なった場合は result_20250601-153012(1).txt）
+#   "uuid"      : result_3f2a9c1b7d4e.txt
+NAMING_SCHEMES = ("sequential", "timestamp", "uuid")
+DEFAULT_SCHEME = "sequential"
+
+# "ベース名(番号).拡張子" を分解する正規表現
+_NAME_PATTERN = re.compile(r"^(?P<base>.*?)(?:\((?P<index>\d+)\))?\.(?P<ext>[^.]+)$")
+
+
+class FolderIndex:
+    """
+    フォルダ内の既存ファイル名を覚えておき、重複しない名前を O(1) で払い出すクラス。
+
+    Notes
+    -----
+    - 作成時に os.scandir で 1 回だけフォルダを走査し、「ベース名・拡張子」ごとに
+      使用済みの番号を記録する。以後は払い出した名前を追加していくだけで、再走査はしない。
+    - 名前は os.open(O_CREAT | O_EXCL) で空ファイルを作ることで確保する。
+      別のプロセスが同じ名前を先に作っていた場合は失敗するので、次の番号を試す。
+      このため、索引が古くても同じ名前を 2 回払い出すことはない。
+    - 索引を作った後に削除されたファイルの名前は再利用されない（必要なら refresh() を呼ぶ）。
+    - 索引を使うのは "sequential" の名前だけ。日時・UUID を付けた名前は毎回ベース名が変わり、
+      覚えておいても再利用されないので、索引に加えずに確保する（claim_filename を参照）。
+    """
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._used: Dict[Tuple[str, str], Set[int]] = {}
+        self._next: Dict[Tuple[str, str], int] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """フォルダを走査し直して索引を作り直す"""
+        used: Dict[Tuple[str, str], Set[int]] = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                match = _NAME_PATTERN.match(entry.name)
+                if match is None:
+                    continue
+                index = int(match.group("index")) if match.group("index") else 0
+                used.setdefault((match.group("base"), match.group("ext")), set()).add(index)
+        with self._lock:
+            self._used = used
+            self._next = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(indices) for indices in self._used.values())
+
+    def peek(self, basename: str, ext: str) -> str:
+        """
+        次に claim() で払い出される候補のファイル名を返す（ファイルは作らず、確保もしない）
+
+        Parameters
+        ----------
+        basename : str
+            ファイル名のベース
+        ext : str
+            拡張子（"." なし）
+
+        Returns
+        -------
+        str
+            現在フォルダに無いファイル名（フォルダ名は含まない）
+        """
+        key = (basename, ext)
+        with self._lock:
+            used = self._used.get(key, set())
+            i = self._next.get(key, 0)
+            while True:
+                while i in used:
+                    i += 1
+                filename = f"{basename}.{ext}" if i == 0 else f"{basename}({i}).{ext}"
+                # 索引を作った後に別のプロセスが作ったファイルは飛ばす
+                if not os.path.exists(os.path.join(self.folder, filename)):
+                    return filename
+                i += 1
+
+    def claim(self, basename: str, ext: str) -> str:
+        """
+        重複しないファイル名を決め、空ファイルを作って確保する
+
+        Parameters
+        ----------
+        basename : str
+            ファイル名のベース
+        ext : str
+            拡張子（"." なし）
+
+        Returns
+        -------
+        str
+            確保したファイル名（フォルダ名は含まない）
+        """
+        key = (basename, ext)
+        with self._lock:
+            used = self._used.setdefault(key, set())
+            i = self._next.get(key, 0)
+            while True:
+                # 次の候補は前回の続きから探す（番号は増える一方なので全体で O(1) に近い）
+                while i in used:
+                    i += 1
+                filename = f"{basename}.{ext}" if i == 0 else f"{basename}({i}).{ext}"
+                try:
+                    fd = os.open(os.path.join(self.folder, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                except FileExistsError:
+                    # 索引を作った後に別のプロセスが作ったファイル
+                    used.add(i)
+                    continue
+                os.close(fd)
+                used.add(i)
+                self._next[key] = i + 1
+                return filename
+
+
+# フォルダごとの索引（アプリ全体で共有する）
+_indexes: Dict[str, FolderIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_folder_index(folder: str) -> FolderIndex:
+    """
+    フォルダの索引を返す（初めて使うフォルダならここで走査する）
+
+    Parameters
+    ----------
+    folder : str
+        フォルダのパス
+
+    Returns
+    -------
+    FolderIndex
+        フォルダの索引
+    """
+    key = os.path.normcase(os.path.abspath(folder))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FolderIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def claim_filename(folder: str, basename: str = "result", ext: str = "txt",
+                   scheme: str = DEFAULT_SCHEME) -> str:
+    """
+    フォルダ内で重複しないファイル名を決め、空ファイルを作って確保する
+
+    Parameters
+    ----------
+    folder : str
+        ファイルを保存するフォルダ（存在している必要がある）
+    basename : str, optional
+        ファイル名のベース（デフォルト: "result"）
+    ext : str, optional
+        拡張子（デフォルト: "txt"）
+    scheme : str, optional
+        名前の付け方（"sequential", "timestamp", "uuid"、NAMING_SCHEMES を参照）
+
+    Returns
+    -------
+    str
+        確保したファイル名（フォルダ名は含まない）
+
+    Raises
+    ------
+    ValueError
+        scheme が不明な場合
+    """
+    basename = _scheme_basename(basename, scheme)
+    if scheme != "sequential":
+        # 日時・UUID を付けた名前はほぼ重ならないので、索引を使わず（増え続けないように）作るだけで確保する
+        return _claim_untracked(folder, basename, ext)
+    return get_folder_index(folder).claim(basename, ext)
+
+
+def unique_filename(folder: str, basename: str = "result", ext: str = "txt",
+                    scheme: str = DEFAULT_SCHEME) -> str:
+    """
+    フォルダ内で重複しないファイル名を返す（claim_filename と違い、ファイルを作らない）
+
+    Parameters
+    ----------
+    folder, basename, ext, scheme
+        claim_filename と同じ
+
+    Returns
+    -------
+    str
+        現在フォルダに無いファイル名（フォルダ名は含まない）。確保はしないので、
+        同時に保存する場合は claim_filename を使う
+    """
+    basename = _scheme_basename(basename, scheme)
+    if scheme != "sequential":
+        return next(name for name in _candidates(basename, ext) if not os.path.exists(os.path.join(folder, name)))
+    return get_folder_index(folder).peek(basename, ext)
+
+
+def _candidates(basename: str, ext: str) -> Iterator[str]:
+    """basename.ext, basename(1).ext, basename(2).ext ... の順に名前を返す"""
+    yield f"{basename}.{ext}"
+    for i in itertools.count(1):
+        yield f"{basename}({i}).{ext}"
+
+
+def _claim_untracked(folder: str, basename: str, ext: str) -> str:
+    """索引を使わずに、空ファイルを作って名前を確保する（同じ名前があれば次の番号を試す）"""
+    for filename in _candidates(basename, ext):
+        try:
+            fd = os.open(os.path.join(folder, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return filename
+
+
+def _scheme_basename(basename: str, scheme: str) -> str:
+    """名前の付け方に合わせてベース名に日時・UUID を付ける"""
+    if scheme == "timestamp":
+        return f"{basename}_{time.strftime('%Y%m%d-%H%M%S')}"
+    if scheme == "uuid":
+        return f"{basename}_{uuid.uuid4().hex[:12]}"
+    if scheme != "sequential":
+        raise ValueError(f"不明なファイル名の付け方です: {scheme}（{', '.join(NAMING_SCHEMES)} のいずれか）")
+    return basename
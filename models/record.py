@@ -2,9 +2,82 @@
 # -*- coding: utf-8 -*-
 
 
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
 import ffmpeg
 
-def record_audio(output_filename: str, record_seconds: int = 10) -> None:
+from models import instrumentation
+from models.audio_io import SAMPLE_RATE
+
+# ==========================================================
+# 録音を保存する形式
+# ==========================================================
+# 形式名 → (ffmpeg の出力オプション, 拡張子)
+# - wav : 非圧縮（16bit PCM）。どのツールでも読めるが、1 分で約 1.9MB になる
+# - flac: 可逆圧縮。音声は元の WAV とまったく同じに戻る（話し声ならおよそ半分の大きさ）
+# - opus: 非可逆圧縮（24kbps）。保管用。1 分で約 0.2MB になり、文字起こしの精度はほぼ変わらない
+STORAGE_CODECS: Dict[str, Any] = {
+    "wav": ({"acodec": "pcm_s16le"}, "wav"),
+    "flac": ({"acodec": "flac", "compression_level": 5}, "flac"),
+    "opus": ({"acodec": "libopus", "audio_bitrate": "24k", "application": "voip"}, "opus"),
+}
+DEFAULT_CODEC = "wav"
+
+
+def codec_extension(codec: str) -> str:
+    """保存形式の拡張子を返す（"flac" → "flac"）"""
+    return _codec(codec)[1]
+
+
+def codec_filename(filename: str, codec: str) -> str:
+    """ファイル名の拡張子を保存形式のものに置き換える（"a.wav", "opus" → "a.opus"）"""
+    return f"{os.path.splitext(filename)[0]}.{codec_extension(codec)}"
+
+
+def _codec(codec: str):
+    if codec not in STORAGE_CODECS:
+        raise ValueError(f"未対応の保存形式です: {codec}（{', '.join(STORAGE_CODECS)} のいずれか）")
+    return STORAGE_CODECS[codec]
+
+
+def _encoded_output(stream, filename: str, codec: str, sample_rate: int, **kwargs: Any):
+    """録音と同時に保存形式へエンコードする ffmpeg の出力を作る"""
+    options, _ = _codec(codec)
+    return stream.output(filename, ac=1, ar=sample_rate, **options, **kwargs)
+
+
+def encode_samples(samples, filename: str, codec: str = DEFAULT_CODEC, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    メモリ上の音声（float32）を保存形式でエンコードしてファイルに書き出す
+    （常時録音など、録音と同時にエンコードしなかった録音を保存するときに使う）
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        -1.0〜1.0 の float32 のサンプル列
+    filename : str
+        書き出すファイル名
+    codec : str
+        保存形式（STORAGE_CODECS のいずれか）
+    sample_rate : int
+        samples のサンプリングレート
+    """
+    import numpy as np
+
+    stream = ffmpeg.input('pipe:', format='f32le', ac=1, ar=sample_rate)
+    (
+        _encoded_output(stream, filename, codec, sample_rate)
+        .global_args('-loglevel', 'error')
+        .overwrite_output()
+        .run(input=np.ascontiguousarray(samples, dtype='<f4').tobytes())
+    )
+
+
+def record_audio(output_filename: str, record_seconds: int = 10,
+                 cancel_event: Optional[threading.Event] = None, codec: str = DEFAULT_CODEC) -> None:
     """
     マイクから音声を録音して指定されたファイルに保存する関数
 
@@ -14,19 +87,598 @@ def record_audio(output_filename: str, record_seconds: int = 10) -> None:
             録音した音声を保存するファイル名
         record_seconds : int
             録音時間(単位:秒, デフォルト:10秒)
+        cancel_event : threading.Event, optional
+            セットされると録音を途中で終了する（それまでの音声は保存される）
+        codec : str, optional
+            保存形式（"wav", "flac", "opus"、STORAGE_CODECS を参照）。
+            エンコードは録音中に ffmpeg が行う（録音後に変換し直すことはない）
     """
     # 録音処理
     try:
         print(f"{record_seconds}秒間、マイクからの録音を開始します...")
-        (
-            ffmpeg
-            .input(':0', format='avfoundation', t=record_seconds)
-            .output(output_filename, acodec='pcm_s16le', ar='44100', ac=1)
-            .run(overwrite_output=True)
+        process = (
+            _encoded_output(ffmpeg.input(':0', format='avfoundation', t=record_seconds),
+                            output_filename, codec, SAMPLE_RATE)
+            .run_async(pipe_stdin=True, overwrite_output=True)
         )
+        # 終了を待つ間に中止が要求されたら、ffmpeg に "q" を送って録音を止める
+        while process.poll() is None:
+            if cancel_event is not None and cancel_event.is_set():
+                process.communicate(b"q")
+                print("録音を中止しました。")
+                break
+            time.sleep(0.05)
+        if process.wait() != 0 and not (cancel_event is not None and cancel_event.is_set()):
+            print(f"エラーが発生しました: ffmpeg が終了コード {process.returncode} で終了しました")
+            return
         print(f"録音が完了しました。{output_filename}に保存されました。")
 
     except ffmpeg.Error as e:
         print(f"エラーが発生しました: {e.stderr.decode()}")
     except Exception as e:
-        print(f"予期せぬエラー: {e}")
\ No newline at end of file
+        print(f"予期せぬエラー: {e}")
+
+# ==========================================================
+# ストリーミング録音（ffmpeg の出力をチャンク単位で受け取る）
+# ==========================================================
+
+
+def microphone_input(device: str = ':0', input_format: str = 'avfoundation'):
+    """
+    マイクを入力とする ffmpeg の入力ストリームを返す
+
+    Parameters
+    ----------
+    device : str
+        入力デバイス名（デフォルト: ':0'）
+    input_format : str
+        入力フォーマット（macOS: 'avfoundation', Linux: 'pulse' / 'alsa' など）
+    """
+    return ffmpeg.input(device, format=input_format)
+
+
+def file_input(path: str, realtime: bool = False):
+    """
+    音声ファイルを入力とする ffmpeg の入力ストリームを返す（マイクの代わりに使える）
+
+    Parameters
+    ----------
+    path : str
+        音声ファイルのパス
+    realtime : bool
+        True の場合は実時間の速さで読み込む（ffmpeg の -re、録音の再現用）
+    """
+    if realtime:
+        return ffmpeg.input(path, re=None)
+    return ffmpeg.input(path)
+
+
+def sine_input(frequency: float = 440.0, sample_rate: int = 44100, realtime: bool = False):
+    """
+    lavfi のサイン波を入力とする ffmpeg の入力ストリームを返す（マイクの無い環境での確認用）
+
+    Parameters
+    ----------
+    frequency : float
+        サイン波の周波数(Hz)
+    sample_rate : int
+        生成するサンプリングレート
+    realtime : bool
+        True の場合は実時間の速さで生成する
+    """
+    kwargs = {'re': None} if realtime else {}
+    return ffmpeg.input(f'sine=frequency={frequency}:sample_rate={sample_rate}', format='lavfi', **kwargs)
+
+
+class StreamingRecorder:
+    """
+    ffmpeg をサブプロセスとして起動し、PCM を標準出力から一定サイズずつ受け取る録音クラス。
+
+    Notes
+    -----
+    - chunks() はチャンク（float32, -1.0〜1.0）を順に返すジェネレーター。
+      録音の終了を待たずに後段（文字起こしなど）の処理を始められる。
+    - 直近 `buffer_seconds` 秒だけをリングバッファ（`self.buffer`）に保持するため、
+      長時間の録音でもメモリ使用量は一定になる。
+    - 入力は microphone_input / file_input / sine_input などで差し替えられる。
+    """
+
+    def __init__(self, source=None, record_seconds: Optional[float] = None,
+                 sample_rate: int = SAMPLE_RATE, chunk_seconds: float = 0.5,
+                 buffer_seconds: float = 30.0, output_filename: Optional[str] = None,
+                 cancel_event: Optional[threading.Event] = None, codec: str = DEFAULT_CODEC) -> None:
+        """
+        Parameters
+        ----------
+        source : ffmpeg の入力ストリーム, optional
+            録音の入力（デフォルト: microphone_input()）
+        record_seconds : float, optional
+            録音時間(秒)。None の場合は入力が終わるか stop() まで録音する
+        sample_rate : int
+            出力のサンプリングレート（デフォルト: 16000）
+        chunk_seconds : float
+            1 チャンクの長さ(秒)
+        buffer_seconds : float
+            リングバッファに保持する長さ(秒)
+        output_filename : str, optional
+            指定した場合、録音を codec の形式でファイルへ書き出す
+        cancel_event : threading.Event, optional
+            セットされると録音を終了する
+        codec : str, optional
+            output_filename の保存形式（"wav", "flac", "opus"）。WAV 以外は同じ ffmpeg が録音と同時にエンコードする
+        """
+        from models.ring_buffer import AudioRingBuffer
+
+        self.source = source
+        self.record_seconds = record_seconds
+        self.sample_rate = sample_rate
+        self.chunk_samples = max(int(sample_rate * chunk_seconds), 1)
+        self.buffer = AudioRingBuffer(max(int(sample_rate * buffer_seconds), self.chunk_samples))
+        self.output_filename = output_filename
+        self.codec = codec
+        _codec(codec)
+        self.cancel_event = cancel_event or threading.Event()
+
+    def stop(self) -> None:
+        """録音を終了する（別スレッドから呼んでよい）"""
+        self.cancel_event.set()
+
+    def _start_process(self):
+        source = self.source if self.source is not None else microphone_input()
+        duration = {'t': self.record_seconds} if self.record_seconds is not None else {}
+        outputs = [source.output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=self.sample_rate, **duration)]
+        if self.output_filename is not None and self.codec != "wav":
+            # 圧縮形式は ffmpeg の 2 つ目の出力として、録音と同時にエンコードする
+            outputs.append(_encoded_output(source, self.output_filename, self.codec, self.sample_rate, **duration))
+        return (
+            ffmpeg.merge_outputs(*outputs)
+            .global_args('-loglevel', 'error')
+            .run_async(pipe_stdout=True, overwrite_output=True)
+        )
+
+    def chunks(self):
+        """
+        録音した音声をチャンク単位で返すジェネレーター
+
+        Yields
+        ------
+        np.ndarray
+            float32 のサンプル列（最後のチャンクは短い場合がある）
+        """
+        import wave
+        import numpy as np
+
+        chunk_bytes = self.chunk_samples * 2  # s16le は 1 サンプル 2 バイト
+        process = self._start_process()
+        writer = None
+        if self.output_filename is not None and self.codec == "wav":
+            writer = wave.open(self.output_filename, 'wb')
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(self.sample_rate)
+        try:
+            while not self.cancel_event.is_set():
+                raw = process.stdout.read(chunk_bytes)
+                if not raw:
+                    break
+                raw = raw[:len(raw) - len(raw) % 2]
+                if writer is not None:
+                    writer.writeframes(raw)
+                samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+                self.buffer.write(samples)
+                yield samples
+        finally:
+            if process.poll() is None:
+                process.terminate()
+            # 終了するまで出力を読み捨てる（パイプを先に閉じると ffmpeg が書き込みエラーになる）
+            process.stdout.read()
+            process.stdout.close()
+            process.wait()
+            if writer is not None:
+                writer.close()
+
+    def run(self, callback) -> int:
+        """
+        録音が終わるまでチャンクごとに callback を呼ぶ
+
+        Parameters
+        ----------
+        callback : Callable[[np.ndarray], None]
+            チャンクを受け取る関数
+
+        Returns
+        -------
+        int
+            録音したサンプル数
+        """
+        for samples in self.chunks():
+            callback(samples)
+        return self.buffer.total_written
+
+
+# ==========================================================
+# メモリ上への録音（WAV ファイルを経由しない）
+# ==========================================================
+def record_audio_array(record_seconds: float = 10, source=None, sample_rate: int = SAMPLE_RATE,
+                       cancel_event: Optional[threading.Event] = None,
+                       memmap_path: Optional[str] = None, output_filename: Optional[str] = None,
+                       codec: str = DEFAULT_CODEC):
+    """
+    16kHz モノラルで録音し、float32 の配列として返す
+
+    Parameters
+    ----------
+    record_seconds : float
+        録音時間(秒)
+    source : ffmpeg の入力ストリーム, optional
+        録音の入力（デフォルト: microphone_input()）
+    sample_rate : int
+        サンプリングレート（デフォルト: 16000、Whisper の入力と同じ）
+    cancel_event : threading.Event, optional
+        セットされると録音を途中で終了する（それまでの音声を返す）
+    memmap_path : str, optional
+        指定した場合はこのファイルにメモリマップした配列に録音する（長時間の録音用）
+    output_filename : str, optional
+        指定した場合は録音を codec の形式でこのファイルにも保存する（保管用）
+    codec : str, optional
+        output_filename の保存形式（"wav", "flac", "opus"、STORAGE_CODECS を参照）
+
+    Returns
+    -------
+    np.ndarray
+        -1.0〜1.0 の float32 のサンプル列（そのまま audio2text.transcribe に渡せる）
+
+    Notes
+    -----
+    - ffmpeg の出力をあらかじめ確保したバッファに直接読み込み、float32 に変換して書き込む。
+      ファイルへの書き出しと、文字起こし時の再読み込み・再変換（ffmpeg の 2 回目の起動）が不要になる。
+    - output_filename を指定した場合は、同じ ffmpeg が録音と同時に保存形式へエンコードする。
+
+    Raises
+    ------
+    RuntimeError
+        ffmpeg がエラーで終了した場合（マイクが無い・使用中など）
+    """
+    import numpy as np
+
+    _codec(codec)
+
+    total = int(record_seconds * sample_rate)
+    if memmap_path is not None:
+        out = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=np.float32, shape=(total,))
+    else:
+        out = np.empty(total, dtype=np.float32)
+
+    source = source if source is not None else microphone_input()
+    print(f"{record_seconds}秒間、マイクからの録音を開始します...")
+    outputs = [source.output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate, t=record_seconds)]
+    if output_filename is not None:
+        outputs.append(_encoded_output(source, output_filename, codec, sample_rate, t=record_seconds))
+    process = (
+        ffmpeg.merge_outputs(*outputs)
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True, overwrite_output=True)
+    )
+
+    # 0.1 秒ずつ読み込み、int16 → float32 の変換は出力先に直接書き込む
+    scratch = np.empty(max(sample_rate // 10, 1), dtype=np.int16)
+    scratch_bytes = memoryview(scratch).cast('B')
+    position = 0
+    eof = False
+    terminated = False
+    with instrumentation.span("record") as attrs:
+        try:
+            while position < total:
+                if cancel_event is not None and cancel_event.is_set():
+                    print("録音を中止しました。")
+                    break
+                want = min(len(scratch), total - position) * 2
+                n_bytes = process.stdout.readinto(scratch_bytes[:want])
+                if not n_bytes:
+                    eof = True
+                    break
+                n = n_bytes // 2
+                np.multiply(scratch[:n], 1.0 / 32768.0, out=out[position:position + n], casting='unsafe')
+                position += n
+        finally:
+            if not eof and process.poll() is None:
+                # 中止した場合・必要な長さを読み終えた場合は、こちらから止める（終了コードは見ない）
+                terminated = True
+                process.terminate()
+            process.stdout.read()
+            process.stdout.close()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            process.wait()
+        attrs["audio_seconds"] = position / sample_rate
+
+    if process.returncode != 0 and not terminated:
+        raise RuntimeError(f"録音に失敗しました: ffmpeg が終了コード {process.returncode} で終了しました\n"
+                           f"{stderr.decode(errors='replace')}")
+
+    print(f"録音が完了しました。（{position / sample_rate:.1f}秒）")
+    return out[:position]
+
+
+# ==========================================================
+# 常に録音し続ける入力（録音開始の待ち時間をなくす）
+# ==========================================================
+# 録音開始より前の音声を録音に含める長さ(秒)
+DEFAULT_PRE_ROLL_SECONDS = 1.0
+
+# 常時録音で ffmpeg の出力を読み込む単位(秒)（録音開始から最初のサンプルが届くまでの最大の遅れになる）
+WARM_CHUNK_SECONDS = 0.01
+
+
+class WarmClip:
+    """
+    WarmCapture から切り出す 1 回分の録音。
+
+    Attributes
+    ----------
+    started_at : float
+        録音を始めた時刻（time.perf_counter）
+    pre_roll_samples : int
+        録音の先頭に含めた、録音開始より前のサンプル数
+    first_sample_latency : float or None
+        録音開始から、開始後の最初のサンプルが届くまでの時間(秒)（まだ届いていなければ None）
+    """
+
+    def __init__(self, capture: "WarmCapture", out, pre_roll, max_samples: int) -> None:
+        self._capture = capture
+        self._out = out
+        self.max_samples = max_samples
+        self.started_at = time.perf_counter()
+        self.pre_roll_samples = len(pre_roll)
+        self.first_sample_latency: Optional[float] = None
+        out[:len(pre_roll)] = pre_roll
+        self._position = len(pre_roll)
+        self._first_sample = threading.Event()
+        self._done = threading.Event()
+        if self._position >= max_samples:
+            self._done.set()
+
+    def __len__(self) -> int:
+        return self._position
+
+    def _write(self, samples) -> None:
+        """録音スレッドから呼ばれ、届いたサンプルを書き足す（WarmCapture のロックの中で呼ばれる）"""
+        n = min(len(samples), self.max_samples - self._position)
+        if n <= 0:
+            return
+        self._out[self._position:self._position + n] = samples[:n]
+        self._position += n
+        if self.first_sample_latency is None:
+            self.first_sample_latency = time.perf_counter() - self.started_at
+            self._first_sample.set()
+        if self._position >= self.max_samples:
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """max_samples まで録音し終えるか入力が止まるまで待つ（終わっていれば True）"""
+        return self._done.wait(timeout)
+
+    def wait_first_sample(self, timeout: Optional[float] = None) -> bool:
+        """録音開始後の最初のサンプルが届くまで待つ（届いていれば True）"""
+        return self._first_sample.wait(timeout)
+
+    @property
+    def samples(self):
+        """これまでに録音したサンプル（コピーではなく録音先の配列の先頭部分）"""
+        return self._out[:self._position]
+
+    def stop(self):
+        """
+        録音を止めて、録音したサンプルを返す
+
+        Returns
+        -------
+        np.ndarray
+            pre_roll を含む float32 のサンプル列（録音先の配列の先頭部分。コピーしない）
+        """
+        self._capture._finish_clip(self)
+        return self.samples
+
+
+class WarmCapture:
+    """
+    ffmpeg を起動したままにして入力を読み続け、直近の音声をリングバッファに保持するクラス。
+
+    Notes
+    -----
+    - 録音ボタンのたびに ffmpeg を起動して入力デバイスを開くと、起動の間（数百ミリ秒）の音声が
+      失われ、録音開始までの時間もばらつく。常時録音しておけば start_clip() の時点ですぐに録音が始まり、
+      直前 pre_roll 秒の音声も録音の先頭に含められる。
+    - 録音は start_clip() で確保した配列（メモリマップも可）に録音スレッドが直接書き込む。
+      WarmClip.stop() はその配列の先頭部分をそのまま返す（録音終了時のコピーや連結は無い）。
+    - 入力が止まった場合（デバイスが外れたなど）は、次の start_clip() で ffmpeg を起動し直す。
+    """
+
+    def __init__(self, source=None, sample_rate: int = SAMPLE_RATE,
+                 pre_roll: float = DEFAULT_PRE_ROLL_SECONDS, chunk_seconds: float = WARM_CHUNK_SECONDS) -> None:
+        """
+        Parameters
+        ----------
+        source : ffmpeg の入力ストリーム, optional
+            録音の入力（デフォルト: microphone_input()、確認用に sine_input / file_input も使える）
+        sample_rate : int
+            サンプリングレート（デフォルト: 16000）
+        pre_roll : float
+            録音開始より前の音声を録音に含める長さ(秒)の上限（リングバッファの大きさになる）
+        chunk_seconds : float
+            ffmpeg の出力を読み込む単位(秒)
+        """
+        from models.ring_buffer import AudioRingBuffer
+
+        self.source = source
+        self.sample_rate = sample_rate
+        self.pre_roll = pre_roll
+        self.chunk_samples = max(int(sample_rate * chunk_seconds), 1)
+        self.buffer = AudioRingBuffer(max(int(sample_rate * pre_roll), self.chunk_samples))
+        self.error: Optional[str] = None
+        self._clips = []
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """ffmpeg が入力を読み続けていれば True"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "WarmCapture":
+        """ffmpeg を起動して常時録音を始める（すでに録音中なら何もしない）。自分自身を返す"""
+        with self._lock:
+            if self.running:
+                return self
+            source = self.source if self.source is not None else microphone_input()
+            # パイプへの出力をためずに 1 パケットずつ書き出させる（録音開始の遅れを chunk_seconds 程度にする）
+            self._process = (
+                source.output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=self.sample_rate,
+                              flush_packets=1)
+                .global_args('-loglevel', 'error')
+                .run_async(pipe_stdout=True)
+            )
+            self.error = None
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, args=(self._process,), name="warm-capture",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """常時録音を終える（録音中のクリップはそこまでで終わる）"""
+        self._stopping.set()
+        with self._lock:
+            process, thread = self._process, self._thread
+        if process is not None and process.poll() is None:
+            process.terminate()
+        if thread is not None:
+            thread.join()
+
+    def _run(self, process) -> None:
+        import numpy as np
+
+        scratch = np.empty(self.chunk_samples, dtype=np.int16)
+        scratch_bytes = memoryview(scratch).cast('B')
+        samples = np.empty(self.chunk_samples, dtype=np.float32)
+        try:
+            while True:
+                n_bytes = process.stdout.readinto(scratch_bytes)
+                if not n_bytes:
+                    break
+                n = n_bytes // 2
+                np.multiply(scratch[:n], 1.0 / 32768.0, out=samples[:n], casting='unsafe')
+                # リングバッファとクリップへの書き込みを 1 つのロックで行い、
+                # start_clip() の直前の音声（pre_roll）と直後の音声の間でサンプルが抜けたり重なったりしないようにする
+                with self._lock:
+                    self.buffer.write(samples[:n])
+                    for clip in self._clips:
+                        clip._write(samples[:n])
+        finally:
+            if process.poll() is None:
+                process.terminate()
+            process.stdout.close()
+            if process.wait() != 0 and not self._stopping.is_set():
+                self.error = f"ffmpeg が終了コード {process.returncode} で終了しました"
+                print(f"常時録音が止まりました: {self.error}")
+            with self._lock:
+                # 録音中のクリップは、入力が止まった時点で終わりにする
+                for clip in self._clips:
+                    clip._done.set()
+                self._clips = []
+
+    def start_clip(self, max_seconds: float, pre_roll: Optional[float] = None,
+                   memmap_path: Optional[str] = None) -> "WarmClip":
+        """
+        録音を始める（直前 pre_roll 秒の音声を先頭に含める）
+
+        Parameters
+        ----------
+        max_seconds : float
+            録音する長さ(秒)の上限（pre_roll を含まない）
+        pre_roll : float, optional
+            録音開始より前の音声を含める長さ(秒)（デフォルト: 作成時の pre_roll）
+        memmap_path : str, optional
+            指定した場合はこのファイルにメモリマップした配列に録音する
+
+        Returns
+        -------
+        WarmClip
+            録音（stop() で止めて、録音したサンプルを受け取る）
+        """
+        import numpy as np
+
+        self.start()
+        pre_roll = self.pre_roll if pre_roll is None else min(pre_roll, self.pre_roll)
+        max_samples = int((max_seconds + pre_roll) * self.sample_rate)
+        if memmap_path is not None:
+            out = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=np.float32, shape=(max_samples,))
+        else:
+            out = np.empty(max_samples, dtype=np.float32)
+        with self._lock:
+            clip = WarmClip(self, out, self.buffer.latest(int(pre_roll * self.sample_rate)), max_samples)
+            if not clip.wait(0):
+                self._clips.append(clip)
+        return clip
+
+    def _finish_clip(self, clip: "WarmClip") -> None:
+        with self._lock:
+            if clip in self._clips:
+                self._clips.remove(clip)
+        clip._done.set()
+
+
+def record_warm_clip(capture: WarmCapture, record_seconds: float, cancel_event: Optional[threading.Event] = None,
+                     memmap_path: Optional[str] = None, pre_roll: Optional[float] = None,
+                     clip: Optional[WarmClip] = None):
+    """
+    常時録音から record_seconds 秒（と直前 pre_roll 秒）を録音し、float32 の配列として返す
+
+    Parameters
+    ----------
+    capture : WarmCapture
+        常時録音
+    record_seconds : float
+        録音時間(秒)
+    cancel_event : threading.Event, optional
+        セットされると録音を途中で終了する（それまでの音声を返す）
+    memmap_path : str, optional
+        指定した場合はこのファイルにメモリマップした配列に録音する
+    pre_roll : float, optional
+        録音開始より前の音声を含める長さ(秒)（デフォルト: capture の pre_roll）
+    clip : WarmClip, optional
+        すでに始めた録音（録音ボタンを押した時点で start_clip() したもの）。指定しない場合はここで始める
+
+    Returns
+    -------
+    np.ndarray
+        -1.0〜1.0 の float32 のサンプル列（record_audio_array と同じく、そのまま文字起こしに渡せる）
+
+    Raises
+    ------
+    RuntimeError
+        録音の途中で常時録音の ffmpeg がエラーで終了した場合
+    """
+    if clip is None:
+        clip = capture.start_clip(record_seconds, pre_roll=pre_roll, memmap_path=memmap_path)
+    with instrumentation.span("record", warm=True) as attrs:
+        while not clip.wait(0.05):
+            if cancel_event is not None and cancel_event.is_set():
+                print("録音を中止しました。")
+                break
+            if not capture.running:
+                break
+        samples = clip.stop()
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        if capture.error is not None and len(samples) < clip.max_samples and not cancelled:
+            # 録音の途中で入力が止まった（マイクが外れた・使用中など）
+            raise RuntimeError(f"録音に失敗しました: {capture.error}")
+        attrs["audio_seconds"] = len(samples) / capture.sample_rate
+        attrs["pre_roll_seconds"] = clip.pre_roll_samples / capture.sample_rate
+        attrs["first_sample_latency"] = clip.first_sample_latency
+
+    print(f"録音が完了しました。（{len(samples) / capture.sample_rate:.1f}秒、"
+          f"うち録音開始前 {clip.pre_roll_samples / capture.sample_rate:.1f}秒）")
+    return samples
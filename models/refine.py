@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from models import instrumentation
+from models.audio_io import SAMPLE_RATE
+
+# 下書きの後に、区間ごとに文字起こしし直す（精度を上げる）モデル
+DEFAULT_REFINE_MODEL_NAME = "whisper-large-v3-turbo"
+
+# 下書きの平均対数確率がこれ以上で、無音の確率が DEFAULT_MAX_NO_SPEECH_PROB 以下の区間は十分に確か
+# なので文字起こしし直さない
+DEFAULT_MIN_AVG_LOGPROB = -0.3
+DEFAULT_MAX_NO_SPEECH_PROB = 0.2
+
+# 1 回にまとめて文字起こしし直す区間の数（まとめるほど速いが、画面に反映されるまでの間隔が空く）
+DEFAULT_BATCH_SIZE = 4
+
+# 区間を切り出すときに前後に付ける余白(秒)（語の頭と末尾が切れないようにする）
+CLIP_PADDING_SECONDS = 0.1
+
+
+def needs_refinement(segment: Dict[str, Any], min_avg_logprob: float = DEFAULT_MIN_AVG_LOGPROB,
+                     max_no_speech_prob: float = DEFAULT_MAX_NO_SPEECH_PROB) -> bool:
+    """
+    下書きの区間を文字起こしし直すべきかどうかを返す
+
+    Parameters
+    ----------
+    segment : Dict[str, Any]
+        下書きの区間（"avg_logprob", "no_speech_prob" があれば確かさの判断に使う）
+    min_avg_logprob : float
+        これより平均対数確率が低い区間は文字起こしし直す
+    max_no_speech_prob : float
+        これより無音の確率が高い区間は文字起こしし直す（無音からの誤認識の可能性がある）
+
+    Returns
+    -------
+    bool
+        文字起こしし直す場合は True（確かさが記録されていない区間も True）
+    """
+    avg_logprob = segment.get("avg_logprob")
+    no_speech_prob = segment.get("no_speech_prob")
+    if avg_logprob is None or no_speech_prob is None:
+        return True
+    return avg_logprob < min_avg_logprob or no_speech_prob > max_no_speech_prob
+
+
+def refine_segments(samples: np.ndarray, segments: List[Dict[str, Any]],
+                    transcribe_clips: Callable[[List[np.ndarray]], List[Dict[str, Any]]],
+                    on_refined: Optional[Callable[[int, str], None]] = None,
+                    cancel_event: Optional[threading.Event] = None,
+                    min_avg_logprob: float = DEFAULT_MIN_AVG_LOGPROB,
+                    max_no_speech_prob: float = DEFAULT_MAX_NO_SPEECH_PROB,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    下書きの区間を、精度の高いモデルで区間ごとに文字起こしし直す
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        録音全体（16kHz モノラル float32）
+    segments : List[Dict[str, Any]]
+        下書きの区間（"start", "end", "text"。時刻は録音全体の基準）
+    transcribe_clips : Callable[[List[np.ndarray]], List[Dict[str, Any]]]
+        切り出した区間の音声のリストを受け取り、同じ順番の文字起こし結果（"text" を含む辞書）を返す関数
+        （audio2text.transcribe_batch など）
+    on_refined : Callable[[int, str], None], optional
+        区間を文字起こしし直すたびに、区間の番号と新しいテキストを受け取る関数
+    cancel_event : threading.Event, optional
+        セットされると、それまでの結果で終了する
+    min_avg_logprob, max_no_speech_prob : float
+        文字起こしし直す区間の判断基準（needs_refinement を参照）
+    batch_size : int
+        1 回にまとめて文字起こしし直す区間の数
+
+    Returns
+    -------
+    Dict[str, Any]
+        - "text": 文字起こしし直した全文
+        - "segments": 区間のリスト（文字起こしし直した区間はテキストを置き換え、"refined" を True にしたもの）
+        - "refined", "skipped": 文字起こしし直した区間・確かなので飛ばした区間の数
+        - "seconds": かかった時間(秒)
+
+    Notes
+    -----
+    - 精度の高いモデルが何も返さなかった区間は、下書きのテキストを残す。
+    """
+    start_time = time.perf_counter()
+    segments = [dict(segment) for segment in segments]
+    targets = [i for i, segment in enumerate(segments)
+               if segment["end"] > segment["start"]
+               and needs_refinement(segment, min_avg_logprob, max_no_speech_prob)]
+    skipped = len(segments) - len(targets)
+    padding = int(CLIP_PADDING_SECONDS * SAMPLE_RATE)
+
+    refined = 0
+    for first in range(0, len(targets), max(batch_size, 1)):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        group = targets[first:first + max(batch_size, 1)]
+        clips = []
+        for i in group:
+            begin = max(int(segments[i]["start"] * SAMPLE_RATE) - padding, 0)
+            end = min(int(segments[i]["end"] * SAMPLE_RATE) + padding, len(samples))
+            clips.append(np.ascontiguousarray(samples[begin:max(end, begin + 1)], dtype=np.float32))
+        with instrumentation.span("refine", segments=len(group)):
+            results = transcribe_clips(clips)
+        for i, result in zip(group, results):
+            text = " ".join(result.get("text", "").split())
+            if not text:
+                continue
+            # 区間の先頭の空白（英語などの単語の区切り）は下書きに合わせる
+            draft = segments[i]["text"]
+            segments[i]["text"] = (" " if draft[:1].isspace() else "") + text
+            segments[i]["refined"] = True
+            refined += 1
+            if on_refined is not None:
+                on_refined(i, segments[i]["text"])
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "refined": refined,
+        "skipped": skipped,
+        "seconds": time.perf_counter() - start_time,
+    }
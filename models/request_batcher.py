@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import statistics
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+# 1 回のモデル呼び出しにまとめる要求の数の上限
+DEFAULT_MAX_BATCH_SIZE = 8
+
+# 最初の要求が届いてから、同じ条件の要求を待つ時間(秒)
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+
+# 処理待ちにできる要求の数の上限（超えたら QueueFullError で断る）
+DEFAULT_MAX_QUEUE = 32
+
+# 処理速度の計算に使う直近の時間(秒)
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+
+class QueueFullError(RuntimeError):
+    """処理待ちの要求が上限に達していて、新しい要求を受け付けられない"""
+
+
+class _Request:
+    """処理待ちの要求 1 件"""
+
+    def __init__(self, key: Hashable, payload: Any, weight: float) -> None:
+        self.key = key
+        self.payload = payload
+        self.weight = weight
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class RequestBatcher:
+    """
+    同時に届いた要求をまとめて 1 回の処理（モデル呼び出し）で実行するクラス。
+
+    Notes
+    -----
+    - submit() した要求は 1 つのワーカースレッドが順に処理する。先頭の要求が届いてから
+      max_wait 秒までは同じ key（モデル・言語など）の要求を待ち、max_batch_size 件まで
+      まとめて process(key, payloads) に渡す。
+    - 処理待ちが max_queue 件に達している間の submit() は QueueFullError になる（バックプレッシャー）。
+      呼び出し側は少し待ってから送り直す。
+    - metrics() で処理待ちの数・処理速度・待ち時間などを取得できる。
+    """
+
+    def __init__(self, process: Callable[[Hashable, List[Any]], List[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait: float = DEFAULT_MAX_WAIT_SECONDS,
+                 max_queue: int = DEFAULT_MAX_QUEUE) -> None:
+        """
+        Parameters
+        ----------
+        process : Callable[[Hashable, List[Any]], List[Any]]
+            key と要求の内容のリストを受け取り、同じ順番の結果のリストを返す関数
+        max_batch_size : int
+            1 回にまとめる要求の数の上限
+        max_wait : float
+            同じ key の要求を待つ時間(秒)
+        max_queue : int
+            処理待ちにできる要求の数の上限
+        """
+        if max_batch_size < 1 or max_queue < 1:
+            raise ValueError("max_batch_size と max_queue は 1 以上を指定してください。")
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._started_at = time.time()
+
+        # 計測（metrics() で返す）
+        self._in_flight = 0
+        self._max_depth = 0
+        self._counts = {"requests": 0, "completed": 0, "failed": 0, "rejected": 0, "batches": 0}
+        # 完了した要求の (完了時刻, 待ち時間, 全体の時間, 重み) と、処理したバッチの大きさ
+        self._completed: Deque[Tuple[float, float, float, float]] = collections.deque(maxlen=1000)
+        self._batch_sizes: Deque[int] = collections.deque(maxlen=1000)
+
+        self._worker = threading.Thread(target=self._run, name="request-batcher", daemon=True)
+        self._worker.start()
+
+    # ---------------------------------------------------------
+    # 要求の受け付け
+    # ---------------------------------------------------------
+    def submit(self, key: Hashable, payload: Any, weight: float = 0.0) -> Future:
+        """
+        要求を処理待ちに加える
+
+        Parameters
+        ----------
+        key : Hashable
+            まとめて処理できる要求を見分けるキー（モデル名・言語など）
+        payload : Any
+            process に渡す要求の内容（音声など）
+        weight : float
+            処理速度の計算に使う量（音声の長さ(秒)など）
+
+        Returns
+        -------
+        Future
+            結果を受け取る Future
+
+        Raises
+        ------
+        QueueFullError
+            処理待ちが max_queue 件に達している場合
+        RuntimeError
+            close() の後に呼んだ場合
+        """
+        request = _Request(key, payload, weight)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("要求の受け付けは終了しています。")
+            if len(self._pending) >= self.max_queue:
+                self._counts["rejected"] += 1
+                raise QueueFullError(f"処理待ちが上限（{self.max_queue}件）に達しています。")
+            self._pending.append(request)
+            self._counts["requests"] += 1
+            self._max_depth = max(self._max_depth, len(self._pending))
+            self._cond.notify()
+        return request.future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """新しい要求を断り、処理待ちの要求を処理し終えるまで待つ"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join(timeout)
+
+    # ---------------------------------------------------------
+    # ワーカースレッド
+    # ---------------------------------------------------------
+    def _next_batch(self) -> List[_Request]:
+        """同じ key の要求を max_wait 秒まで待ってまとめ、処理待ちから取り出す（終了時は空）"""
+        with self._cond:
+            while not self._pending:
+                if self._closed:
+                    return []
+                self._cond.wait()
+
+            first = self._pending[0]
+            # 先頭の要求がすでに待っていた時間も含めて max_wait 秒までにする
+            deadline = first.enqueued_at + self.max_wait
+            while True:
+                batch = [r for r in self._pending if r.key == first.key][:self.max_batch_size]
+                remaining = deadline - time.perf_counter()
+                if len(batch) >= self.max_batch_size or remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+
+            taken = set(map(id, batch))
+            self._pending = [r for r in self._pending if id(r) not in taken]
+            self._in_flight = len(batch)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            # 呼び出し側が待つのをやめた要求は処理しない
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+            with self._cond:
+                self._in_flight = 0
+
+    def _process(self, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            results = self.process(batch[0].key, [r.payload for r in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"結果の数（{len(results)}）が要求の数（{len(batch)}）と一致しません。")
+        except Exception as e:
+            with self._cond:
+                self._counts["failed"] += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        with self._cond:
+            self._counts["completed"] += len(batch)
+            self._counts["batches"] += 1
+            self._batch_sizes.append(len(batch))
+            for request in batch:
+                self._completed.append((time.time(), started - request.enqueued_at,
+                                        finished - request.enqueued_at, request.weight))
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    # ---------------------------------------------------------
+    # 計測
+    # ---------------------------------------------------------
+    def queue_depth(self) -> int:
+        """処理待ちの要求の数"""
+        with self._cond:
+            return len(self._pending)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        処理待ちの数・処理速度・待ち時間をまとめた辞書を返す
+
+        Returns
+        -------
+        Dict[str, Any]
+            - "queue_depth", "max_queue_depth", "in_flight": 処理待ち・これまでの最大・処理中の要求の数
+            - "requests", "completed", "failed", "rejected", "batches": これまでの件数
+            - "mean_batch_size": 1 回にまとめた要求の数の平均
+            - "requests_per_second", "weight_per_second": 直近 THROUGHPUT_WINDOW_SECONDS 秒の処理速度
+              （weight は音声の長さなので、weight_per_second は 1 秒あたりに処理した音声の秒数）
+            - "queue_wait_p50", "latency_p50", "latency_p95": 待ち時間・全体の時間(秒)
+        """
+        now = time.time()
+        with self._cond:
+            counts = dict(self._counts)
+            depth = len(self._pending)
+            max_depth = self._max_depth
+            in_flight = self._in_flight
+            completed = list(self._completed)
+            batch_sizes = list(self._batch_sizes)
+
+        window = min(THROUGHPUT_WINDOW_SECONDS, max(now - self._started_at, 1e-9))
+        recent = [c for c in completed if now - c[0] <= window]
+        latencies = sorted(c[2] for c in completed)
+        return {
+            "queue_depth": depth,
+            "max_queue_depth": max_depth,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            **counts,
+            "mean_batch_size": statistics.fmean(batch_sizes) if batch_sizes else None,
+            "requests_per_second": len(recent) / window,
+            "weight_per_second": sum(c[3] for c in recent) / window,
+            "queue_wait_p50": statistics.median(c[1] for c in completed) if completed else None,
+            "latency_p50": statistics.median(latencies) if latencies else None,
+            "latency_p95": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else None,
+        }
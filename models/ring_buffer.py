@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    固定サイズのリングバッファ（直近の音声サンプルだけを保持する）。
+
+    Notes
+    -----
+    - 書き込んだサンプル数が容量を超えると、古いサンプルから上書きされる。
+      長時間録音してもメモリ使用量は `capacity` で頭打ちになる。
+    - 書き込みと読み出しは別スレッドから行ってよい（内部でロックする）。
+    """
+
+    def __init__(self, capacity: int, dtype: type = np.float32) -> None:
+        """
+        Parameters
+        ----------
+        capacity : int
+            保持するサンプル数の上限
+        dtype : type
+            サンプルの型（デフォルト: np.float32）
+        """
+        if capacity < 1:
+            raise ValueError("capacity は 1 以上を指定してください。")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        # これまでに書き込んだサンプル数の合計（上書きされた分も含む）
+        self.total_written = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """現在保持しているサンプル数"""
+        return min(self.total_written, self.capacity)
+
+    # ---------------------------------------------------------
+    # 書き込み
+    # ---------------------------------------------------------
+    def write(self, samples: np.ndarray) -> None:
+        """
+        サンプルを書き込む
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            1 次元のサンプル列
+        """
+        samples = np.asarray(samples, dtype=self._data.dtype).ravel()
+        with self._lock:
+            n = len(samples)
+            # 容量を超える分は上書きされるので、末尾の capacity 個だけを書き込む
+            tail = samples[-self.capacity:]
+            start = (self.total_written + n - len(tail)) % self.capacity
+            end = start + len(tail)
+            if end <= self.capacity:
+                self._data[start:end] = tail
+            else:
+                first = self.capacity - start
+                self._data[start:] = tail[:first]
+                self._data[:len(tail) - first] = tail[first:]
+            self.total_written += n
+
+    # ---------------------------------------------------------
+    # 読み出し
+    # ---------------------------------------------------------
+    def latest(self, n: int = None) -> np.ndarray:
+        """
+        直近 n サンプルを古い順に並べたコピーを返す
+
+        Parameters
+        ----------
+        n : int, optional
+            取得するサンプル数（デフォルト: 保持しているすべて）
+
+        Returns
+        -------
+        np.ndarray
+            直近のサンプル列
+        """
+        with self._lock:
+            return self._latest_locked(n)
+
+    def since(self, position: int) -> np.ndarray:
+        """
+        書き込み位置 `position`（total_written 基準）以降のサンプルを返す
+
+        Parameters
+        ----------
+        position : int
+            取得を開始する位置。上書き済みの範囲は切り捨てられる。
+
+        Returns
+        -------
+        np.ndarray
+            position 以降のサンプル列
+        """
+        with self._lock:
+            return self._latest_locked(max(self.total_written - position, 0))
+
+    def _latest_locked(self, n: int = None) -> np.ndarray:
+        available = min(self.total_written, self.capacity)
+        n = available if n is None else min(n, available)
+        if n == 0:
+            return self._data[:0].copy()
+        end = self.total_written % self.capacity
+        start = end - n
+        if start >= 0:
+            return self._data[start:end].copy()
+        return np.concatenate((self._data[start:], self._data[:end]))
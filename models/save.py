@@ -2,9 +2,16 @@
 # -*- coding: utf-8 -*-
 
 from models import audio2text
+from models import instrumentation
+from models import naming
 import os
+import shutil
+import sqlite3
+from typing import Any, Dict, List, Optional
 
-def save_transcription_to_file(audio_file_path: str, output_filename: str, output_dir: str = "../outputs") -> None:
+def save_transcription_to_file(audio_file_path: str, output_filename: str, output_dir: str = "../outputs",
+                               model_name: Optional[str] = None, backend: Optional[str] = None,
+                               vad: bool = False, naming_scheme: str = naming.DEFAULT_SCHEME) -> None:
     """
     指定された音声ファイルを文字起こしした結果を指定されたフォルダ内のテキストファイルに保存する
 
@@ -16,32 +23,265 @@ def save_transcription_to_file(audio_file_path: str, output_filename: str, outpu
         文字起こし結果を保存するテキストファイル名（拡張子なしでも可）
     output_dir : str, optional
         保存先フォルダ（デフォルト: "outputs"）
+    model_name : str, optional
+        使用するモデル名（デフォルト: audio2text.DEFAULT_MODEL_NAME）
+    backend : str, optional
+        使用するバックエンド（デフォルト: audio2text.DEFAULT_BACKEND）
+    vad : bool, optional
+        True の場合は無音を取り除いてから文字起こしする
+    naming_scheme : str, optional
+        ファイル名の付け方（"sequential", "timestamp", "uuid"、naming.NAMING_SCHEMES を参照）
+
+    Notes
+    -----
+    - 文字起こしは audio2text.audio_to_text のキャッシュを経由するため、
+      すでに文字起こし済みの音声ではモデルを再実行しない。
+    - 文字起こし結果が手元にある場合は save_text_to_file を使う。
+    - 保存した結果は、モデル名や区間と一緒に文字起こしストア（transcript_store）にも登録する。
     """
     # 音声ファイルの存在確認
     if not os.path.exists(audio_file_path):
         print(f"音声ファイルが見つかりません: {audio_file_path}")
         return
 
-    # フォルダが存在しなければ作成
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    folder_path = os.path.join(script_dir, output_dir)
-    os.makedirs(folder_path, exist_ok=True)
-
     # 音声ファイルを文字起こし
-    text = audio2text.audio_to_text(audio_file_path)
+    details = audio2text.transcribe_details(audio_file_path, model_name=model_name, backend=backend, vad=vad)
 
-    # ファイル名を重複しない形で作成
-    output_filename = get_unique_filename(folder_path, os.path.splitext(output_filename)[0], "txt")
-    save_path = os.path.join(folder_path, output_filename)
+    save_text_to_file(details["text"], output_filename, output_dir, naming_scheme, details=details)
 
-    # ファイルに保存
-    with open(save_path, "w", encoding="utf-8") as f:
-        f.write(text)
+
+def save_text_to_file(text: str, output_filename: str, output_dir: str = "../outputs",
+                      naming_scheme: str = naming.DEFAULT_SCHEME,
+                      details: Optional[Dict[str, Any]] = None) -> str:
+    """
+    文字起こし済みのテキストを指定されたフォルダ内のテキストファイルに保存する
+
+    Parameters
+    ----------
+    text : str
+        保存する文字起こし結果
+    output_filename : str
+        保存するテキストファイル名（拡張子なしでも可）
+    output_dir : str, optional
+        保存先フォルダ（デフォルト: "outputs"）
+    naming_scheme : str, optional
+        ファイル名の付け方（"sequential", "timestamp", "uuid"、naming.NAMING_SCHEMES を参照）
+    details : Dict[str, Any], optional
+        文字起こしの詳細（audio2text.transcribe_details の戻り値）。
+        音声のハッシュ・モデル名・処理時間・区間が文字起こしストアに一緒に登録される
+
+    Returns
+    -------
+    str
+        保存したファイルのパス
+    """
+    with instrumentation.span("save"):
+        # 重複しないファイル名を確保（フォルダが無ければ作成）
+        save_path = _claim_save_path(output_filename, output_dir, "txt", naming_scheme)
+
+        # ファイルに保存
+        with open(save_path, "w", encoding="utf-8") as f:
+            f.write(text)
 
     print(f"文字起こし結果が保存されました: {save_path}")
+    record_transcript(text, save_path, details)
+    return save_path
+
+
+def save_audio_to_file(samples, output_filename: str, output_dir: str = "../outputs",
+                       naming_scheme: str = naming.DEFAULT_SCHEME, codec: str = "wav") -> str:
+    """
+    メモリ上の録音（16kHz モノラル float32）を指定されたフォルダ内の音声ファイル（デフォルトは WAV）に保存する
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        録音した音声のサンプル列
+    output_filename : str
+        保存する WAV ファイル名（拡張子なしでも可）
+    output_dir : str, optional
+        保存先フォルダ（デフォルト: "outputs"）
+    naming_scheme : str, optional
+        ファイル名の付け方（"sequential", "timestamp", "uuid"、naming.NAMING_SCHEMES を参照）
+    codec : str, optional
+        保存形式（"wav", "flac", "opus"、record.STORAGE_CODECS を参照）。WAV 以外は ffmpeg でエンコードする
+
+    Returns
+    -------
+    str
+        保存したファイルのパス
+    """
+    from models.audio_io import save_wav
+
+    # 重複しないファイル名を確保（フォルダが無ければ作成）
+    with instrumentation.span("save", codec=codec):
+        if codec == "wav":
+            save_path = _claim_save_path(output_filename, output_dir, "wav", naming_scheme)
+            save_wav(save_path, samples)
+        else:
+            from models import record
+            save_path = _claim_save_path(output_filename, output_dir, record.codec_extension(codec), naming_scheme)
+            record.encode_samples(samples, save_path, codec)
+
+    print(f"録音した音声が保存されました: {save_path}")
+    return save_path
+
+
+def save_audio_file(audio_file_path: str, output_filename: str, output_dir: str = "../outputs",
+                    naming_scheme: str = naming.DEFAULT_SCHEME) -> str:
+    """
+    録音時に保存形式（FLAC, Opus など）でエンコード済みの音声ファイルを、指定されたフォルダにコピーする
+
+    Parameters
+    ----------
+    audio_file_path : str
+        録音したファイル（record.record_audio_array の output_filename）
+    output_filename : str
+        保存するファイル名（拡張子は audio_file_path のものになる）
+    output_dir : str, optional
+        保存先フォルダ（デフォルト: "outputs"）
+    naming_scheme : str, optional
+        ファイル名の付け方（"sequential", "timestamp", "uuid"、naming.NAMING_SCHEMES を参照）
+
+    Returns
+    -------
+    str
+        保存したファイルのパス
+
+    Notes
+    -----
+    - エンコードし直さずにコピーするだけなので、長い録音でもすぐに終わる。
+    """
+    ext = os.path.splitext(audio_file_path)[1].lstrip(".") or "wav"
+    with instrumentation.span("save"):
+        save_path = _claim_save_path(output_filename, output_dir, ext, naming_scheme)
+        shutil.copyfile(audio_file_path, save_path)
+
+    print(f"録音した音声が保存されました: {save_path}")
+    return save_path
+
+
+def save_long_transcription_to_file(audio_file_path: str, output_filename: str, output_dir: str = "../outputs",
+                                    model_name: Optional[str] = None, backend: Optional[str] = None,
+                                    window_seconds: float = 30.0, overlap_seconds: float = 2.0,
+                                    naming_scheme: str = naming.DEFAULT_SCHEME) -> Optional[str]:
+    """
+    長い音声ファイルを 30 秒ずつ文字起こしし、確定した区間から順にテキストファイルへ書き込む
+
+    Parameters
+    ----------
+    audio_file_path : str
+        文字起こしを行う音声ファイルのパス（1 時間を超える会議の録音など）
+    output_filename : str
+        文字起こし結果を保存するテキストファイル名（拡張子なしでも可）
+    output_dir : str, optional
+        保存先フォルダ（デフォルト: "outputs"）
+    model_name : str, optional
+        使用するモデル名（デフォルト: audio2text.DEFAULT_MODEL_NAME）
+    backend : str, optional
+        使用するバックエンド（デフォルト: audio2text.DEFAULT_BACKEND）
+    window_seconds : float, optional
+        1 回に文字起こしする長さ(秒)
+    overlap_seconds : float, optional
+        窓どうしの重なり(秒)
+    naming_scheme : str, optional
+        ファイル名の付け方（"sequential", "timestamp", "uuid"、naming.NAMING_SCHEMES を参照）
 
+    Returns
+    -------
+    Optional[str]
+        保存したファイルのパス（音声ファイルが無い場合は None）
 
-def get_unique_filename(folder: str, basename: str = "result", ext: str = "txt") -> str:
+    Notes
+    -----
+    - 音声はメモリマップで窓ごとに読み込み（chunked.transcribe_chunked）、結果は区間ごとに
+      ファイルへ書き出すため、録音の長さに関係なく使用メモリは一定になる。
+    """
+    from models.chunked import transcribe_chunked
+
+    # 音声ファイルの存在確認
+    if not os.path.exists(audio_file_path):
+        print(f"音声ファイルが見つかりません: {audio_file_path}")
+        return None
+
+    # 重複しないファイル名を確保（フォルダが無ければ作成）
+    save_path = _claim_save_path(output_filename, output_dir, "txt", naming_scheme)
+
+    # 区間が確定するたびに追記する（途中で止まっても、そこまでの結果は残る）
+    segments: List[Dict[str, Any]] = []
+    with open(save_path, "w", encoding="utf-8") as f:
+        def _write_segment(segment) -> None:
+            f.write(segment.text)
+            f.flush()
+            segments.append({"start": segment.start, "end": segment.end, "text": segment.text})
+
+        result = transcribe_chunked(
+            audio_file_path,
+            lambda samples: audio2text.transcribe(samples, model_name=model_name, backend=backend),
+            on_segment=_write_segment,
+            window_seconds=window_seconds,
+            overlap_seconds=overlap_seconds,
+        )
+
+    print(f"文字起こし結果が保存されました: {save_path}（音声 {result['audio_seconds']:.0f}秒, "
+          f"{result['windows']} 区切り）")
+    record_transcript(result["text"], save_path, {
+        "model": audio2text.model_key(model_name, backend), "duration": result["audio_seconds"],
+        "decode_seconds": result["decode_seconds"], "segments": segments,
+    })
+    return save_path
+
+
+def record_transcript(text: str, save_path: str, details: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    保存した文字起こし結果を文字起こしストア（全文検索用）に登録する
+
+    Parameters
+    ----------
+    text : str
+        文字起こし結果
+    save_path : str
+        保存したテキストファイルのパス
+    details : Dict[str, Any], optional
+        文字起こしの詳細（audio2text.transcribe_details の戻り値）
+
+    Returns
+    -------
+    Optional[int]
+        登録した文字起こしの ID（登録に失敗した場合は None）
+
+    Notes
+    -----
+    - 登録に失敗してもテキストファイルは保存済みなので、エラーにはせずメッセージだけ出す。
+    """
+    from models.transcript_store import get_default_store
+
+    details = details or {}
+    try:
+        with instrumentation.span("store"):
+            return get_default_store().add(
+                text, audio_hash=details.get("audio_hash"), model=details.get("model"),
+                duration=details.get("duration"), load_seconds=details.get("load_seconds"),
+                decode_seconds=details.get("decode_seconds"), segments=details.get("segments"),
+                source_path=os.path.abspath(save_path),
+            )
+    except sqlite3.Error as e:
+        print(f"文字起こしストアへの登録に失敗しました: {e}")
+        return None
+
+
+def _claim_save_path(output_filename: str, output_dir: str, ext: str, naming_scheme: str) -> str:
+    """保存先フォルダを作成し、重複しないファイル名を確保してそのパスを返す"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    folder_path = os.path.join(script_dir, output_dir)
+    os.makedirs(folder_path, exist_ok=True)
+    # 空ファイルを作って名前を確保する（同時に保存しても同じ名前にならない）
+    filename = naming.claim_filename(folder_path, os.path.splitext(output_filename)[0], ext, naming_scheme)
+    return os.path.join(folder_path, filename)
+
+
+def get_unique_filename(folder: str, basename: str = "result", ext: str = "txt",
+                        naming_scheme: str = naming.DEFAULT_SCHEME) -> str:
     """
     指定フォルダ内で既存ファイルと重複しない新しいファイル名を生成する
 
@@ -53,18 +293,19 @@ def get_unique_filename(folder: str, basename: str = "result", ext: str = "txt")
         ファイル名のベース（デフォルト: "result"）
     ext : str, optional
         拡張子（デフォルト: "txt"）
+    naming_scheme : str, optional
+        ファイル名の付け方（デフォルト: "sequential" → result.txt, result(1).txt, ...）
 
     Returns
     -------
     str
         重複しない新しいファイル名
+
+    Notes
+    -----
+    - フォルダ内の既存ファイル名は最初の 1 回だけ走査し、以後はメモリ上の索引から番号を決める
+      （naming.FolderIndex）。ファイルが何万個あっても 1 回の保存で stat を繰り返さない。
+    - ファイルは作らない（名前を返すだけ）。保存処理では、名前を空ファイルとして確保する
+      _claim_save_path を使う。
     """
-    i = 0
-    while True:
-        if i == 0:
-            filename = f"{basename}.{ext}"
-        else:
-            filename = f"{basename}({i}).{ext}"
-        if not os.path.exists(os.path.join(folder, filename)):
-            return filename
-        i += 1
+    return naming.unique_filename(folder, basename, ext, naming_scheme)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# 文字起こしサーバー（transcription_server.py）のデフォルトの URL
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+# サーバーが混雑している（503）ときに送り直す回数
+DEFAULT_RETRIES = 3
+
+# 1 回の要求の結果を待つ時間の上限(秒)
+DEFAULT_TIMEOUT_SECONDS = 600.0
+
+
+class ServerBusyError(RuntimeError):
+    """文字起こしサーバーの処理待ちが上限に達していて、送り直しても受け付けられなかった"""
+
+
+def transcribe_samples(samples: np.ndarray, server_url: str = DEFAULT_SERVER_URL,
+                       model_name: Optional[str] = None, language: Optional[str] = None, vad: bool = False,
+                       retries: int = DEFAULT_RETRIES, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    メモリ上の音声（16kHz モノラル float32）を文字起こしサーバーで文字起こしする
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        float32 のサンプル列
+    server_url : str
+        サーバーの URL（"http://127.0.0.1:8765" など）
+    model_name : str, optional
+        使用するモデル名（デフォルト: サーバーのモデル）
+    language : str, optional
+        音声の言語
+    vad : bool
+        True の場合は無音を取り除いてから文字起こしする
+    retries : int
+        サーバーが混雑しているとき（503）に送り直す回数
+    timeout : float
+        結果を待つ時間の上限(秒)
+
+    Returns
+    -------
+    Dict[str, Any]
+        audio2text.transcribe_details と同じ項目に "queue_seconds", "batch_size" を加えた辞書
+
+    Raises
+    ------
+    ServerBusyError
+        送り直してもサーバーが混雑していた場合
+    RuntimeError
+        サーバーに接続できない、またはサーバーでエラーが起きた場合
+    """
+    query = {name: value for name, value in
+             (("model", model_name), ("language", language), ("vad", "1" if vad else None)) if value}
+    url = f"{server_url.rstrip('/')}/transcribe"
+    if query:
+        url += "?" + urllib.parse.urlencode(query)
+    body = np.ascontiguousarray(samples, dtype="<f4").tobytes()
+
+    for attempt in range(retries + 1):
+        request = urllib.request.Request(url, data=body, method="POST",
+                                         headers={"Content-Type": "application/x-float32"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            message = _error_message(e)
+            if e.code != 503:
+                raise RuntimeError(f"文字起こしサーバーでエラーが発生しました（{e.code}）: {message}") from e
+            if attempt == retries:
+                raise ServerBusyError(f"文字起こしサーバーが混雑しています: {message}") from e
+            # 混雑している間は、サーバーが指定した時間だけ待ってから送り直す
+            time.sleep(float(e.headers.get("Retry-After") or 1))
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"文字起こしサーバーに接続できません（{server_url}）: {e.reason}") from e
+    raise ServerBusyError("文字起こしサーバーが混雑しています。")
+
+
+def get_metrics(server_url: str = DEFAULT_SERVER_URL, timeout: float = 5.0) -> Dict[str, Any]:
+    """文字起こしサーバーの処理待ちの数・処理速度（GET /metrics）を返す"""
+    with urllib.request.urlopen(f"{server_url.rstrip('/')}/metrics", timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def _error_message(error: urllib.error.HTTPError) -> str:
+    try:
+        return json.loads(error.read().decode("utf-8")).get("error", "")
+    except (ValueError, OSError):
+        return error.reason
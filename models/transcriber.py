@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import platform
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Union, runtime_checkable
+
+import numpy as np
+
+from models.audio_io import SAMPLE_RATE
+
+# 音声の入力（ファイルパス、または 16kHz モノラル float32 の配列）
+AudioInput = Union[str, np.ndarray]
+
+# settings.json の model_name（mlx のリポジトリ名）から openai-whisper のモデル名への対応
+CPU_MODEL_NAMES = {
+    "whisper-base-mlx": "base",
+    "mlx-community/whisper-base-mlx": "base",
+    "whisper-large-v3-turbo": "turbo",
+    "mlx-community/whisper-large-v3-turbo": "turbo",
+}
+
+# transcribe_batch で 1 回のデコードにまとめられる音声の長さ（Whisper の入力 1 つ分 = 30 秒）
+CLIP_SAMPLES = 30 * SAMPLE_RATE
+
+# まとめてデコードするときに使えるオプション（これ以外を指定した場合は 1 つずつ transcribe する）
+CLIP_DECODE_OPTIONS = {"language", "task", "fp16", "temperature"}
+
+# まとめてデコードした結果が次の基準を満たさない場合は、温度を上げてデコードし直す
+# （transcribe（openai-whisper / mlx_whisper）のデフォルトと同じ基準）
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+@runtime_checkable
+class Transcriber(Protocol):
+    """
+    文字起こしバックエンドのインターフェース。
+
+    Attributes
+    ----------
+    backend : str
+        バックエンド名（"mlx", "cpu", "stub"）
+    model_name : str
+        モデル名
+    num_threads : int
+        推論に使うスレッド数
+    batch_size : int
+        transcribe_batch で 1 度にまとめて処理する音声の数
+    """
+    backend: str
+    model_name: str
+    num_threads: int
+    batch_size: int
+
+    def load(self) -> "Transcriber":
+        """モデルを読み込む（読み込み済みなら何もしない）。自分自身を返す"""
+        ...
+
+    def transcribe(self, audio: AudioInput, **decode_options: Any) -> Dict[str, Any]:
+        """文字起こしを行い、"text" と "segments" を含む辞書を返す"""
+        ...
+
+    def transcribe_batch(self, audios: Sequence[AudioInput], **decode_options: Any) -> List[Dict[str, Any]]:
+        """複数の音声を文字起こしする"""
+        ...
+
+    def close(self) -> None:
+        """モデルを解放する"""
+        ...
+
+
+class _BaseTranscriber:
+    """各バックエンドで共通の処理"""
+
+    backend = ""
+
+    def __init__(self, model_name: str, num_threads: int = 1, batch_size: int = 1) -> None:
+        self.model_name = model_name
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+    def transcribe_batch(self, audios: Sequence[AudioInput], **decode_options: Any) -> List[Dict[str, Any]]:
+        """
+        複数の音声を文字起こしする
+
+        Notes
+        -----
+        - batch_size が 1 の場合は、1 つずつ transcribe する（transcribe と同じ結果）。
+        - batch_size が 2 以上の場合（まとめてデコードする設定）は、30 秒以下の配列を batch_size 個ずつ
+          _decode_clips でまとめて 1 回のデコードにする（バックエンドが対応している場合）。
+          同時に渡された数によらず、30 秒以下の配列はすべてこの方法でデコードするので、結果は
+          渡し方（1 つだけか、他の音声と一緒か）で変わらない。
+        - まとめてデコードした結果は、音声 1 つにつき 1 区間（区間内の時刻なし）になる。温度を上げて
+          デコードし直す基準（圧縮率・平均対数確率・無音の確率）は transcribe と同じ。
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(audios)
+        clips = [i for i, audio in enumerate(audios)
+                 if isinstance(audio, np.ndarray) and 0 < len(audio) <= CLIP_SAMPLES]
+        if clips and self.batch_size > 1 and set(decode_options) <= CLIP_DECODE_OPTIONS:
+            for start in range(0, len(clips), self.batch_size):
+                group = clips[start:start + self.batch_size]
+                decoded = self._decode_clips_with_fallback([audios[i] for i in group], decode_options)
+                if decoded is None:
+                    break
+                for i, result in zip(group, decoded):
+                    results[i] = result
+        return [result if result is not None else self.transcribe(audio, **decode_options)
+                for audio, result in zip(audios, results)]
+
+    def _decode_clips_with_fallback(self, clips: List[np.ndarray],
+                                    decode_options: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """まとめてデコードし、基準を満たさなかった音声だけを温度を上げてまとめてデコードし直す"""
+        temperatures = decode_options.get("temperature", FALLBACK_TEMPERATURES)
+        if not isinstance(temperatures, (list, tuple)):
+            temperatures = (temperatures,)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(clips)
+        pending = list(range(len(clips)))
+        for temperature in temperatures:
+            decoded = self._decode_clips([clips[i] for i in pending], {**decode_options, "temperature": temperature})
+            if decoded is None:
+                return None
+            for i, result in zip(pending, decoded):
+                results[i] = result
+            pending = [i for i, result in zip(pending, decoded) if _needs_fallback(result)]
+            if not pending:
+                break
+        return results
+
+    def _decode_clips(self, clips: List[np.ndarray],
+                      decode_options: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """30 秒以下の音声をまとめて 1 回でデコードする（対応していないバックエンドは None を返す）"""
+        return None
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}(model_name={self.model_name!r}, "
+                f"num_threads={self.num_threads}, batch_size={self.batch_size})")
+
+
+def _compression_ratio(text: str) -> float:
+    """テキストの圧縮率（同じ語の繰り返しが多いほど大きい）"""
+    data = text.encode("utf-8")
+    return len(data) / len(zlib.compress(data)) if data else 0.0
+
+
+def _needs_fallback(result: Dict[str, Any]) -> bool:
+    """まとめてデコードした 1 つ分の結果を、温度を上げてデコードし直すべきかどうか（無音と判断したものは除く）"""
+    segments = result.get("segments") or []
+    if not segments:
+        return False
+    segment = segments[0]
+    return (segment.get("compression_ratio", 0.0) > COMPRESSION_RATIO_THRESHOLD
+            or segment.get("avg_logprob", 0.0) < LOGPROB_THRESHOLD)
+
+
+def _clip_result(text: str, duration: float, avg_logprob: float, no_speech_prob: float,
+                 language: Optional[str], temperature: float = 0.0) -> Dict[str, Any]:
+    """まとめてデコードした 1 つ分の結果を、transcribe と同じ形（1 区間）にする"""
+    # transcribe と同じ基準で、無音と判断したものは空にする
+    if no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOGPROB_THRESHOLD:
+        text = ""
+    text = text.strip()
+    segments = [{
+        "id": 0, "start": 0.0, "end": duration, "text": text, "temperature": temperature,
+        "avg_logprob": avg_logprob, "compression_ratio": _compression_ratio(text),
+        "no_speech_prob": no_speech_prob,
+    }] if text else []
+    return {"text": text, "segments": segments, "language": language}
+
+
+# ==========================================================
+# mlx（Apple silicon）
+# ==========================================================
+class MlxTranscriber(_BaseTranscriber):
+    """
+    mlx_whisper を使うバックエンド（Apple silicon 専用）。
+
+    Notes
+    -----
+    - mlx_whisper.transcribe は ModelHolder（クラス変数）のモデルを使うため、
+      読み込んだモデルを ModelHolder に渡してから呼び出す。プロセス内で排他にする。
+    """
+
+    backend = "mlx"
+    _holder_lock = threading.Lock()
+
+    def __init__(self, model_name: str, num_threads: int = 1, batch_size: int = 1) -> None:
+        super().__init__(model_name, num_threads, batch_size)
+        self._model = None
+
+    def load(self) -> "MlxTranscriber":
+        with self._lock:
+            if self._model is None:
+                import mlx.core as mx
+                from mlx_whisper.load_models import load_model
+                # transcribe の fp16 デフォルトに合わせて読み込む
+                self._model = load_model(self.model_name, dtype=mx.float16)
+        return self
+
+    def transcribe(self, audio: AudioInput, **decode_options: Any) -> Dict[str, Any]:
+        import mlx_whisper
+        from mlx_whisper.transcribe import ModelHolder
+
+        self.load()
+        with MlxTranscriber._holder_lock:
+            # 読み込み済みのモデルを渡し、transcribe 内での再読み込みを防ぐ
+            ModelHolder.model = self._model
+            ModelHolder.model_path = self.model_name
+            return mlx_whisper.transcribe(audio, path_or_hf_repo=self.model_name, **decode_options)
+
+    def _decode_clips(self, clips: List[np.ndarray], decode_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        import mlx.core as mx
+        from mlx_whisper.audio import N_FRAMES, log_mel_spectrogram, pad_or_trim
+        from mlx_whisper.decoding import DecodingOptions, decode
+
+        self.load()
+        # mlx のメルスペクトログラムは (フレーム, メル) の順。30 秒分に揃えて重ねる
+        mel = mx.stack([
+            pad_or_trim(log_mel_spectrogram(clip, n_mels=self._model.dims.n_mels), N_FRAMES, axis=-2)
+            for clip in clips
+        ])
+        with MlxTranscriber._holder_lock:
+            decoded = decode(self._model, mel, DecodingOptions(**decode_options))
+        return [_clip_result(d.text, len(clip) / SAMPLE_RATE, d.avg_logprob, d.no_speech_prob, d.language,
+                             decode_options["temperature"])
+                for clip, d in zip(clips, decoded)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._model = None
+
+
+# ==========================================================
+# CPU（openai-whisper + torch）
+# ==========================================================
+class WhisperCpuTranscriber(_BaseTranscriber):
+    """
+    openai-whisper を torch の CPU で動かすバックエンド（Linux などで使う）。
+
+    Notes
+    -----
+    - model_name が mlx のリポジトリ名の場合は CPU_MODEL_NAMES で openai-whisper のモデル名に変換する。
+    - num_threads は torch.set_num_threads に渡す。
+    """
+
+    backend = "cpu"
+
+    def __init__(self, model_name: str, num_threads: int = 0, batch_size: int = 1) -> None:
+        num_threads = num_threads or os.cpu_count() or 1
+        super().__init__(model_name, num_threads, batch_size)
+        self._model = None
+
+    def load(self) -> "WhisperCpuTranscriber":
+        with self._lock:
+            if self._model is None:
+                import torch
+                import whisper
+
+                torch.set_num_threads(self.num_threads)
+                name = CPU_MODEL_NAMES.get(self.model_name, self.model_name)
+                self._model = whisper.load_model(name, device="cpu")
+        return self
+
+    def transcribe(self, audio: AudioInput, **decode_options: Any) -> Dict[str, Any]:
+        self.load()
+        decode_options.setdefault("fp16", False)  # CPU では fp16 を使えない
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+        with self._lock:
+            return self._model.transcribe(audio, **decode_options)
+
+    def _decode_clips(self, clips: List[np.ndarray], decode_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        import torch
+        import whisper
+        from whisper.audio import N_FRAMES
+
+        self.load()
+        options = {"fp16": False, **decode_options}  # CPU では fp16 を使えない
+        mel = torch.stack([
+            whisper.pad_or_trim(whisper.log_mel_spectrogram(clip.astype(np.float32, copy=False),
+                                                            self._model.dims.n_mels), N_FRAMES)
+            for clip in clips
+        ])
+        with self._lock:
+            decoded = whisper.decode(self._model, mel, whisper.DecodingOptions(**options))
+        return [_clip_result(d.text, len(clip) / SAMPLE_RATE, d.avg_logprob, d.no_speech_prob, d.language,
+                             options["temperature"])
+                for clip, d in zip(clips, decoded)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._model = None
+
+
+# ==========================================================
+# スタブ（テスト・ベンチマーク用）
+# ==========================================================
+class StubTranscriber(_BaseTranscriber):
+    """
+    モデルを使わずに決まった結果を返すバックエンド（テスト・ベンチマーク用）。
+
+    Notes
+    -----
+    - 音声 1 秒ごとに 1 区間を作り、テキストは音声の内容のハッシュから決まる。
+      同じ音声からは必ず同じ結果になる。
+    - seconds_per_audio_second を指定すると、音声の長さに比例した時間だけ待つ（推論時間の模擬）。
+      transcribe_batch でまとめた場合は、最も長い音声の分だけ待つ（まとめてデコードする場合の模擬）。
+    """
+
+    backend = "stub"
+
+    def __init__(self, model_name: str = "stub", num_threads: int = 1, batch_size: int = 1,
+                 load_seconds: float = 0.0, seconds_per_audio_second: float = 0.0) -> None:
+        super().__init__(model_name, num_threads, batch_size)
+        self.load_seconds = load_seconds
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.loaded = False
+
+    def load(self) -> "StubTranscriber":
+        if not self.loaded:
+            time.sleep(self.load_seconds)
+            self.loaded = True
+        return self
+
+    def transcribe(self, audio: AudioInput, **decode_options: Any) -> Dict[str, Any]:
+        self.load()
+        if isinstance(audio, str):
+            from models.audio_io import load_audio
+            audio = load_audio(audio)
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * self.seconds_per_audio_second)
+        return self._result(audio, duration)
+
+    def _decode_clips(self, clips: List[np.ndarray], decode_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.load()
+        time.sleep(max(len(clip) for clip in clips) / SAMPLE_RATE * self.seconds_per_audio_second)
+        return [self._result(clip, len(clip) / SAMPLE_RATE) for clip in clips]
+
+    @staticmethod
+    def _result(audio: np.ndarray, duration: float) -> Dict[str, Any]:
+
+        segments = []
+        for i in range(int(np.ceil(duration))):
+            piece = audio[i * SAMPLE_RATE:(i + 1) * SAMPLE_RATE]
+            digest = hashlib.sha1(np.ascontiguousarray(piece).tobytes()).hexdigest()[:6]
+            segments.append({
+                "id": i, "start": float(i), "end": float(min(i + 1, duration)),
+                "text": f"[{digest}]", "avg_logprob": -0.1, "no_speech_prob": 0.0,
+            })
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": "ja"}
+
+    def close(self) -> None:
+        self.loaded = False
+
+
+# ==========================================================
+# バックエンドの選択
+# ==========================================================
+BACKENDS = {
+    MlxTranscriber.backend: MlxTranscriber,
+    WhisperCpuTranscriber.backend: WhisperCpuTranscriber,
+    StubTranscriber.backend: StubTranscriber,
+}
+
+
+def default_backend() -> str:
+    """実行環境に合ったバックエンド名を返す（Apple silicon の macOS なら "mlx"、それ以外は "cpu"）"""
+    if platform.system() == "Darwin" and platform.machine() == "arm64":
+        return MlxTranscriber.backend
+    return WhisperCpuTranscriber.backend
+
+
+def resolve_backend(backend: str = None) -> str:
+    """settings.json の backend（None / "auto" を含む）を実際のバックエンド名に変換する"""
+    if not backend or backend == "auto":
+        return default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"不明なバックエンドです: {backend}（{', '.join(BACKENDS)} から選んでください）")
+    return backend
+
+
+def create_transcriber(backend: str, model_name: str, **kwargs: Any) -> Transcriber:
+    """
+    バックエンドを作成する（モデルはまだ読み込まない）
+
+    Parameters
+    ----------
+    backend : str
+        バックエンド名（"mlx", "cpu", "stub", "auto"）
+    model_name : str
+        モデル名
+    **kwargs : Any
+        num_threads, batch_size など各バックエンドのオプション
+
+    Returns
+    -------
+    Transcriber
+        作成したバックエンド
+    """
+    return BACKENDS[resolve_backend(backend)](model_name, **kwargs)
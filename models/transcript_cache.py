@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# キャッシュの保存先（save.py の出力先 "../outputs" と同じ階層に置く）
+DEFAULT_CACHE_DIR = "../transcript_cache"
+
+# キャッシュ全体の上限サイズ（バイト）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TranscriptCache:
+    """
+    文字起こし結果をディスクにキャッシュするクラス。
+
+    Notes
+    -----
+    - キーは「音声ファイルの内容のハッシュ + モデル名 + デコードオプション」から作る。
+      同じ録音を同じ設定で文字起こしする場合は、モデルを呼ばずに結果を返せる。
+    - 1 件を 1 つの JSON ファイルとして保存する。
+    - 合計サイズが `max_bytes` を超えたら、最も古く使われたものから削除する。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Parameters
+        ----------
+        cache_dir : str, optional
+            キャッシュの保存先フォルダ（デフォルト: DEFAULT_CACHE_DIR、models/ からの相対パス）
+        max_bytes : int
+            キャッシュ全体の上限サイズ（バイト）
+        """
+        if cache_dir is None:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            cache_dir = os.path.normpath(os.path.join(script_dir, DEFAULT_CACHE_DIR))
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    # キーの生成
+    # ---------------------------------------------------------
+    @staticmethod
+    def hash_file(audio_file_path: str) -> str:
+        """
+        音声ファイルの内容の SHA-256 ハッシュを返す
+
+        Parameters
+        ----------
+        audio_file_path : str
+            音声ファイルのパス
+
+        Returns
+        -------
+        str
+            16 進数のハッシュ文字列
+        """
+        digest = hashlib.sha256()
+        with open(audio_file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_array(samples: "np.ndarray") -> str:
+        """
+        メモリ上の音声（NumPy 配列）の SHA-256 ハッシュを返す
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            音声のサンプル列
+
+        Returns
+        -------
+        str
+            16 進数のハッシュ文字列
+        """
+        import numpy as np
+
+        digest = hashlib.sha256(str(samples.dtype).encode("ascii"))
+        digest.update(memoryview(np.ascontiguousarray(samples)).cast("B"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(audio_hash: str, model_name: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        キャッシュのキーを作る
+
+        Parameters
+        ----------
+        audio_hash : str
+            音声の内容のハッシュ（hash_file の戻り値）
+        model_name : str
+            モデル名
+        options : Dict[str, Any], optional
+            デコードオプション（language, temperature など）
+
+        Returns
+        -------
+        str
+            キャッシュのキー
+        """
+        payload = json.dumps(
+            {"audio": audio_hash, "model": model_name, "options": options or {}},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---------------------------------------------------------
+    # 取得・保存
+    # ---------------------------------------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        キャッシュされた文字起こし結果を返す。無ければ None を返す。
+
+        Parameters
+        ----------
+        key : str
+            キャッシュのキー
+
+        Returns
+        -------
+        Optional[str]
+            文字起こし結果
+        """
+        entry = self.get_entry(key)
+        return None if entry is None else entry.get("text")
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュされた文字起こし結果を、一緒に保存した情報（put の metadata）ごと返す。
+        無ければ None を返す。
+
+        Parameters
+        ----------
+        key : str
+            キャッシュのキー
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            "text" と put の metadata を含む辞書
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # 最後に使った時刻を更新する（削除順の判定に使う）
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, text: str, **metadata: Any) -> None:
+        """
+        文字起こし結果をキャッシュに保存する
+
+        Parameters
+        ----------
+        key : str
+            キャッシュのキー
+        text : str
+            文字起こし結果
+        **metadata : Any
+            一緒に保存する情報（モデル名など）
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, **metadata}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    # ---------------------------------------------------------
+    # サイズによる削除
+    # ---------------------------------------------------------
+    def _evict(self) -> None:
+        """合計サイズが上限を超えていれば、古いものから削除する"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+
+# アプリ全体で共有するキャッシュ
+_default_cache: Optional[TranscriptCache] = None
+
+
+def get_default_cache() -> TranscriptCache:
+    """アプリ全体で共有するキャッシュを返す"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TranscriptCache()
+    return _default_cache
+
+
+def set_default_cache(cache: Optional[TranscriptCache]) -> None:
+    """アプリ全体で共有するキャッシュを差し替える（ベンチマークなどで別の場所を使うため、None で元に戻す）"""
+    global _default_cache
+    _default_cache = cache
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+# データベースの保存先（save.py の出力先 "../outputs" と同じ階層に置く）
+DEFAULT_DB_PATH = "../transcripts.db"
+
+# トライグラム（3 文字ずつ）で索引を作る。日本語は単語が空白で区切られないため、
+# 単語単位の索引では文の途中の語を検索できない
+_TOKENIZER = "trigram"
+
+# 関連度（bm25）で並べ替える一致件数の上限。これより多く一致する語は新しい順に返す
+RANK_LIMIT = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    audio_hash TEXT,
+    model TEXT,
+    duration REAL,
+    load_seconds REAL,
+    decode_seconds REAL,
+    segments TEXT,
+    source_path TEXT UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_audio_hash ON transcripts(audio_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text, content='transcripts', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_au AFTER UPDATE OF text ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+@dataclass
+class SearchHit:
+    """
+    検索結果の 1 件。
+
+    Attributes
+    ----------
+    id : int
+        文字起こしの ID（TranscriptStore.get に渡す）
+    snippet : str
+        一致した箇所の前後（一致部分は【】で囲む）
+    score : float
+        関連度（小さいほど関連が高い、FTS5 の bm25）。新しい順に返した場合は 0
+    source_path : str or None
+        保存したテキストファイルのパス
+    model : str or None
+        文字起こしに使ったモデル
+    created_at : float
+        登録した時刻（UNIX 時間）
+    """
+    id: int
+    snippet: str
+    score: float
+    source_path: Optional[str]
+    model: Optional[str]
+    created_at: float
+
+
+class TranscriptStore:
+    """
+    文字起こし結果を SQLite に保存し、全文検索できるようにするクラス。
+
+    Notes
+    -----
+    - 本文は FTS5 の索引（トライグラム）に登録する。10 万件でも検索はミリ秒単位で終わる。
+    - 一致が RANK_LIMIT 件以下なら bm25 の関連度順、それより多い（ありふれた語の）場合は新しい順に返す。
+    - トライグラムは 3 文字未満の語を索引で引けないため、2 文字以下の語は本文の
+      LIKE 検索で絞り込む（新しいものから調べ、limit 件見つかった時点で止まる）。
+    - 1 つの接続を複数のスレッドから使うため、操作はロックで直列化する。
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        """
+        Parameters
+        ----------
+        db_path : str, optional
+            データベースファイルのパス（デフォルト: DEFAULT_DB_PATH、models/ からの相対パス）
+        """
+        if db_path is None:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            db_path = os.path.normpath(os.path.join(script_dir, DEFAULT_DB_PATH))
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA.format(tokenizer=_TOKENIZER))
+
+    def close(self) -> None:
+        """データベースを閉じる"""
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------
+    # 登録
+    # ---------------------------------------------------------
+    def add(self, text: str, audio_hash: Optional[str] = None, model: Optional[str] = None,
+            duration: Optional[float] = None, load_seconds: Optional[float] = None,
+            decode_seconds: Optional[float] = None, segments: Optional[List[Dict[str, Any]]] = None,
+            source_path: Optional[str] = None, created_at: Optional[float] = None) -> int:
+        """
+        文字起こし結果を登録する（同じ source_path が登録済みなら上書きする）
+
+        Parameters
+        ----------
+        text : str
+            文字起こし結果
+        audio_hash : str, optional
+            音声の内容のハッシュ（TranscriptCache.hash_file / hash_array の戻り値）
+        model : str, optional
+            モデル名（"バックエンド:モデル名"）
+        duration : float, optional
+            音声の長さ(秒)
+        load_seconds : float, optional
+            モデル読み込みにかかった秒数
+        decode_seconds : float, optional
+            文字起こしにかかった秒数
+        segments : List[Dict[str, Any]], optional
+            区間のリスト（"start", "end", "text" を含む辞書）
+        source_path : str, optional
+            保存したテキストファイルのパス
+        created_at : float, optional
+            登録時刻（デフォルト: 現在時刻）
+
+        Returns
+        -------
+        int
+            登録した文字起こしの ID
+        """
+        row = self._row(text, audio_hash, model, duration, load_seconds, decode_seconds,
+                        segments, source_path, created_at)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO transcripts (text, audio_hash, model, duration, load_seconds, decode_seconds,"
+                " segments, source_path, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(source_path) DO UPDATE SET text=excluded.text, audio_hash=excluded.audio_hash,"
+                " model=excluded.model, duration=excluded.duration, load_seconds=excluded.load_seconds,"
+                " decode_seconds=excluded.decode_seconds, segments=excluded.segments,"
+                " created_at=excluded.created_at"
+                " RETURNING id",
+                row,
+            )
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _row(text, audio_hash, model, duration, load_seconds, decode_seconds, segments, source_path, created_at):
+        if segments is not None:
+            # 区間はモデルの出力そのままだと NumPy の値などを含むので、必要な項目だけ残す
+            segments = json.dumps(
+                [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]} for s in segments],
+                ensure_ascii=False,
+            )
+        return (text, audio_hash, model, duration, load_seconds, decode_seconds, segments,
+                source_path, time.time() if created_at is None else created_at)
+
+    def import_text_files(self, folder: str, batch_size: int = 1000) -> int:
+        """
+        フォルダ内の .txt ファイル（これまでに保存した文字起こし結果）をまとめて登録する
+
+        Parameters
+        ----------
+        folder : str
+            .txt ファイルを探すフォルダ（サブフォルダも含む）
+        batch_size : int
+            1 回のトランザクションで登録する件数
+
+        Returns
+        -------
+        int
+            新しく登録した件数（登録済みのファイルは読み飛ばす）
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute(
+                "SELECT source_path FROM transcripts WHERE source_path IS NOT NULL")}
+
+        def _rows() -> Iterable[tuple]:
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    if not name.endswith(".txt"):
+                        continue
+                    path = os.path.abspath(os.path.join(root, name))
+                    if path in known:
+                        continue
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            text = f.read()
+                    except (OSError, UnicodeDecodeError) as e:
+                        print(f"読み込めないファイルを飛ばします: {path}（{e}）")
+                        continue
+                    yield self._row(text, None, None, None, None, None, None, path, os.path.getmtime(path))
+
+        count = 0
+        batch: List[tuple] = []
+        for row in _rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                count += self._insert_many(batch)
+                batch = []
+        if batch:
+            count += self._insert_many(batch)
+        print(f"{count} 件の文字起こし結果を登録しました: {folder}")
+        return count
+
+    def _insert_many(self, rows: List[tuple]) -> int:
+        # INSERT OR IGNORE で飛ばされた行は数えないよう、実際に登録した件数を返す
+        # （total_changes は全文検索のトリガーによる変更も数えるため rowcount を使う）
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO transcripts (text, audio_hash, model, duration, load_seconds,"
+                " decode_seconds, segments, source_path, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return cursor.rowcount
+
+    # ---------------------------------------------------------
+    # 取得・検索
+    # ---------------------------------------------------------
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+    def get(self, transcript_id: int) -> Optional[Dict[str, Any]]:
+        """
+        文字起こし結果を 1 件返す。無ければ None を返す。
+
+        Parameters
+        ----------
+        transcript_id : int
+            文字起こしの ID
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            登録した項目の辞書（"segments" はリストに戻してある）
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM transcripts WHERE id = ?", (transcript_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["segments"] = json.loads(entry["segments"]) if entry["segments"] else []
+        return entry
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """
+        文字起こし結果を全文検索し、関連の高い順に返す
+
+        Parameters
+        ----------
+        query : str
+            検索語（空白で区切ると、すべての語を含むものを探す）
+        limit : int
+            返す件数の上限
+
+        Returns
+        -------
+        List[SearchHit]
+            検索結果（関連の高い順）
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        long_terms = [term.replace('"', '""') for term in terms if len(term) >= 3]
+        short_terms = [term for term in terms if len(term) < 3]
+
+        # LIKE の % と _ は語の一部として扱う（\ でエスケープする）
+        like = "".join(" AND t.text LIKE ? ESCAPE '\\'" for _ in short_terms)
+        like_args = [f"%{_escape_like(term)}%" for term in short_terms]
+        columns = "t.id, t.source_path, t.model, t.created_at"
+        if long_terms:
+            # 各語をフレーズとして囲み、FTS5 の構文として解釈されないようにする
+            match = " AND ".join(f'"{term}"' for term in long_terms)
+            with self._lock:
+                # bm25 は一致した全件の出現数を数えるため、ほとんどの文書に出てくる語では遅くなる。
+                # 一致が RANK_LIMIT 件を超える場合は関連度の計算をやめ、新しい順に返す
+                common = self._conn.execute(
+                    "SELECT rowid FROM transcripts_fts WHERE transcripts_fts MATCH ?"
+                    " ORDER BY rowid DESC LIMIT 1 OFFSET ?", (match, RANK_LIMIT - 1)).fetchone() is not None
+            order = "transcripts_fts.rowid DESC" if common else "score"
+            score = "0.0" if common else "bm25(transcripts_fts)"
+            sql = (f"SELECT {columns}, snippet(transcripts_fts, 0, '【', '】', '…', 12) AS snippet, {score} AS score"
+                   " FROM transcripts_fts JOIN transcripts AS t ON t.id = transcripts_fts.rowid"
+                   f" WHERE transcripts_fts MATCH ?{like} ORDER BY {order} LIMIT ?")
+            args = [match, *like_args, limit]
+        else:
+            # 短い語だけの場合は索引を使えないので、新しいものから順に本文を調べる
+            sql = (f"SELECT {columns}, substr(t.text, 1, 40) AS snippet, 0.0 AS score"
+                   f" FROM transcripts AS t WHERE 1{like} ORDER BY t.id DESC LIMIT ?")
+            args = [*like_args, limit]
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [SearchHit(row["id"], row["snippet"], row["score"], row["source_path"], row["model"],
+                          row["created_at"]) for row in rows]
+
+
+def _escape_like(term: str) -> str:
+    """LIKE のパターンで、% と _ を文字そのものとして扱うようにエスケープする（ESCAPE '\\' と一緒に使う）"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# アプリ全体で共有するストア
+_default_store: Optional[TranscriptStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> TranscriptStore:
+    """アプリ全体で共有するストアを返す"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TranscriptStore()
+        return _default_store
+
+
+def set_default_store(store: Optional[TranscriptStore]) -> None:
+    """アプリ全体で共有するストアを差し替える（ベンチマークなどで別のデータベースを使うため、None で元に戻す）"""
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
+
+
+if __name__ == "__main__":
+    # python -m models.transcript_store import <フォルダ>   … 既存の .txt をまとめて登録
+    # python -m models.transcript_store search <検索語>     … 検索
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "search"):
+        print("使い方: python -m models.transcript_store import <フォルダ> | search <検索語>")
+        sys.exit(1)
+    store = get_default_store()
+    if sys.argv[1] == "import":
+        store.import_text_files(sys.argv[2])
+    else:
+        start = time.perf_counter()
+        hits = store.search(" ".join(sys.argv[2:]))
+        for hit in hits:
+            print(f"[{hit.id}] {hit.source_path or '-'}: {hit.snippet}")
+        print(f"{len(hits)} 件（{(time.perf_counter() - start) * 1000:.1f} ミリ秒）")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from models import instrumentation
+from models.audio_io import SAMPLE_RATE
+
+# 音声区間（開始サンプル, 終了サンプル）
+Span = Tuple[int, int]
+
+
+def frame_features(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                   frame_ms: float = 30.0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    フレームごとのエネルギー(dB)とゼロ交差率を計算する
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        float32 のサンプル列
+    sample_rate : int
+        サンプリングレート
+    frame_ms : float
+        フレーム長（ミリ秒、フレームは重ならない）
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, int]
+        (エネルギー[dB], ゼロ交差率[0〜1], フレーム長[サンプル])
+    """
+    frame_length = max(int(sample_rate * frame_ms / 1000), 1)
+    n_frames = int(np.ceil(len(samples) / frame_length))
+    padded = np.zeros(n_frames * frame_length, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(n_frames, frame_length)
+
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr, frame_length
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """True が連続する区間の (開始インデックス, 終了インデックス) を返す"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: float = 30.0,
+                  margin_db: float = 10.0, min_energy_db: float = -55.0, max_energy_db: float = -35.0,
+                  zcr_threshold: float = 0.25,
+                  min_speech_ms: float = 150.0, min_silence_ms: float = 300.0,
+                  padding_ms: float = 200.0) -> List[Span]:
+    """
+    エネルギーとゼロ交差率から発話区間を検出する
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        float32 のサンプル列
+    sample_rate : int
+        サンプリングレート
+    frame_ms : float
+        フレーム長（ミリ秒）
+    margin_db : float
+        雑音レベル（エネルギーの下位 10% 点）から何 dB 大きければ発話とみなすか
+    min_energy_db : float
+        発話とみなすエネルギーの下限(dB)。静かな録音で雑音を発話と誤検出しないため
+    max_energy_db : float
+        しきい値の上限(dB)。これより大きいフレームは常に発話とみなす
+        （録音全体で話し続けている場合に、話し声を雑音レベルと誤認しないため）
+    zcr_threshold : float
+        ゼロ交差率がこれを超えるフレームは、エネルギーが少し低くても発話とみなす（摩擦音など）
+    min_speech_ms : float
+        これより短い発話区間は捨てる
+    min_silence_ms : float
+        これより短い無音は発話の一部として埋める
+    padding_ms : float
+        発話区間の前後に付け足す長さ
+
+    Returns
+    -------
+    List[Span]
+        発話区間（開始サンプル, 終了サンプル）のリスト
+    """
+    if len(samples) == 0:
+        return []
+
+    energy_db, zcr, frame_length = frame_features(samples, sample_rate, frame_ms)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = min(max(noise_floor + margin_db, min_energy_db), max_energy_db)
+    speech = (energy_db > threshold) | ((energy_db > threshold - 6.0) & (zcr > zcr_threshold))
+
+    # 短い無音を埋める
+    frame_sec_ms = frame_length * 1000.0 / sample_rate
+    starts, ends = _runs(~speech)
+    short_gap = (ends - starts) * frame_sec_ms < min_silence_ms
+    inner = (starts > 0) & (ends < len(speech))
+    for s, e in zip(starts[short_gap & inner], ends[short_gap & inner]):
+        speech[s:e] = True
+
+    # 短い発話を捨てる
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * frame_sec_ms >= min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+
+    # サンプル単位に変換して前後に余白を付け、重なった区間をまとめる
+    padding = int(sample_rate * padding_ms / 1000)
+    spans: List[Span] = []
+    for s, e in zip(starts * frame_length - padding, ends * frame_length + padding):
+        s, e = max(int(s), 0), min(int(e), len(samples))
+        if spans and s <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], e))
+        else:
+            spans.append((s, e))
+    return spans
+
+
+class SpeechTimeline:
+    """
+    発話区間だけをつなげた音声と、元の音声との時刻の対応を保持するクラス。
+
+    Notes
+    -----
+    - 区間の間には gap_seconds の無音をはさむ（単語がつながって誤認識されないようにするため）。
+    - to_original() で、つなげた音声上の時刻を元の録音の時刻に戻す。
+    """
+
+    def __init__(self, samples: np.ndarray, spans: List[Span], sample_rate: int = SAMPLE_RATE,
+                 gap_seconds: float = 0.2) -> None:
+        self.sample_rate = sample_rate
+        self.spans = spans
+        gap = np.zeros(int(sample_rate * gap_seconds), dtype=np.float32)
+
+        pieces = []
+        # つなげた音声での各区間の開始時刻と、元の音声での開始時刻（秒）
+        self._concat_starts = []
+        self._orig_starts = []
+        self._lengths = []
+        position = 0
+        for i, (s, e) in enumerate(spans):
+            if i > 0:
+                pieces.append(gap)
+                position += len(gap)
+            pieces.append(samples[s:e])
+            self._concat_starts.append(position / sample_rate)
+            self._orig_starts.append(s / sample_rate)
+            self._lengths.append((e - s) / sample_rate)
+            position += e - s
+        self.audio = np.concatenate(pieces).astype(np.float32, copy=False) if pieces else np.zeros(0, np.float32)
+
+    def to_original(self, t: float) -> float:
+        """つなげた音声上の時刻 t(秒) を元の録音の時刻に変換する"""
+        if not self._concat_starts:
+            return t
+        i = max(int(np.searchsorted(self._concat_starts, t, side="right")) - 1, 0)
+        offset = min(max(t - self._concat_starts[i], 0.0), self._lengths[i])
+        return self._orig_starts[i] + offset
+
+
+def transcribe_speech_only(samples: np.ndarray, transcribe_fn: Callable[[np.ndarray], Dict[str, Any]],
+                           sample_rate: int = SAMPLE_RATE, **vad_options: Any) -> Dict[str, Any]:
+    """
+    無音を取り除いた音声だけを文字起こしし、区間の時刻を元の録音の時刻に戻す
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        float32 のサンプル列
+    transcribe_fn : Callable[[np.ndarray], Dict[str, Any]]
+        音声を受け取り、"text" と "segments" を含む辞書を返す関数
+    sample_rate : int
+        サンプリングレート
+    **vad_options : Any
+        detect_speech に渡すオプション
+
+    Returns
+    -------
+    Dict[str, Any]
+        transcribe_fn の結果（segments の時刻は元の録音基準）に "vad" を加えた辞書。
+        "vad" には元の長さ・発話の長さ・削減した秒数・発話区間が入る
+    """
+    with instrumentation.span("vad") as attrs:
+        spans = detect_speech(samples, sample_rate, **vad_options)
+        timeline = SpeechTimeline(samples, spans, sample_rate)
+        original_seconds = len(samples) / sample_rate
+        processed_seconds = len(timeline.audio) / sample_rate
+        # 処理時間のパネルに、無音を除いて減らした秒数を表示するため
+        attrs["audio_seconds"] = original_seconds
+        attrs["saved_seconds"] = original_seconds - processed_seconds
+
+    report = {
+        "original_seconds": original_seconds,
+        "speech_seconds": processed_seconds,
+        "saved_seconds": original_seconds - processed_seconds,
+        "spans": [(s / sample_rate, e / sample_rate) for s, e in spans],
+    }
+
+    if not spans:
+        # 発話が無ければモデルを呼ばない
+        result: Dict[str, Any] = {"text": "", "segments": []}
+    else:
+        result = transcribe_fn(timeline.audio)
+        for seg in result.get("segments", []):
+            seg["start"] = timeline.to_original(float(seg["start"]))
+            seg["end"] = timeline.to_original(float(seg["end"]))
+
+    result["vad"] = report
+    print(f"無音除去: {original_seconds:.1f}秒 → {processed_seconds:.1f}秒"
+          f"（{report['saved_seconds']:.1f}秒ぶんの計算を削減）")
+    return result
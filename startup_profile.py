@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+起動時間の計測（python main.py --profile-startup）
+
+起動の各段階（ウィンドウ表示、コントローラーの準備、ML ライブラリの読み込み）までの時間と、
+モジュールごとの import 時間（python -X importtime と同じく、累積と自身の時間）を表示する。
+"""
+
+import importlib.abc
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _TimingLoader(importlib.abc.Loader):
+    """モジュールの実行（exec_module）にかかった時間を記録するローダー"""
+
+    def __init__(self, loader: importlib.abc.Loader, profiler: "StartupProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        stack = self._profiler._stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self._profiler._record(module.__name__, elapsed, elapsed - children, len(stack))
+            # 読み込み後は元のローダーに戻す（isinstance でローダーを調べるライブラリのため）
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """他のファインダーが見つけたモジュールのローダーを _TimingLoader で包む"""
+
+    def __init__(self, profiler: "StartupProfiler") -> None:
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(spec.loader, self._profiler)
+        return spec
+
+
+class StartupProfiler:
+    """
+    起動の各段階までの時間と、モジュールごとの import 時間を記録するクラス。
+
+    Notes
+    -----
+    - enabled=False の場合は何もしない（通常の起動で計測の負荷をかけないため）。
+    - import の計測は sys.meta_path の先頭にファインダーを入れて行うため、
+      計測を始める前に読み込まれたモジュールは含まれない。
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.start_time = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: List[Tuple[str, float, float, int]] = []  # (モジュール, 累積, 自身, 深さ)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._finder: Optional[_TimingFinder] = None
+        if enabled:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def _stack(self) -> List[float]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _record(self, name: str, cumulative: float, own: float, depth: int) -> None:
+        with self._lock:
+            self.imports.append((name, cumulative, own, depth))
+
+    def mark(self, stage: str) -> None:
+        """
+        起動の段階に到達した時刻を記録する
+
+        Parameters
+        ----------
+        stage : str
+            段階の名前（"ウィンドウ表示" など）
+        """
+        if self.enabled:
+            self.marks.append((stage, time.perf_counter() - self.start_time))
+
+    def stop(self) -> None:
+        """import の計測をやめる"""
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def report(self, top: int = 25) -> None:
+        """
+        計測結果を表示する
+
+        Parameters
+        ----------
+        top : int
+            表示するモジュールの数（累積時間の大きい順）
+        """
+        if not self.enabled:
+            return
+        self.stop()
+        print("起動時間の内訳（計測開始から）")
+        for stage, seconds in self.marks:
+            print(f"  {stage:<20} {seconds * 1000:8.1f} ms")
+
+        with self._lock:
+            imports = list(self.imports)
+        packages: Dict[str, float] = {}
+        for name, cumulative, _, depth in imports:
+            if depth == 0:
+                root = name.split(".")[0]
+                packages[root] = packages.get(root, 0.0) + cumulative
+        print("import 時間（トップレベルのパッケージごと）")
+        for root, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {seconds * 1000:8.1f} ms  {root}")
+        print(f"import 時間（累積の大きい順、上位 {top} 件）")
+        print("    累積[ms]  自身[ms]  モジュール")
+        for name, cumulative, own, depth in sorted(imports, key=lambda item: -item[1])[:top]:
+            print(f"  {cumulative * 1000:9.1f} {own * 1000:9.1f}  {'  ' * depth}{name}")
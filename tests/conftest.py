@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+# リポジトリのルート（models/, controller/ など）を import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _isolated_defaults(tmp_path, monkeypatch):
+    """アプリ全体で共有するストア・キャッシュ・バックエンドの設定を、テストごとに一時フォルダのものにする"""
+    from models import audio2text, transcript_cache, transcript_store
+
+    # 既定の保存先（リポジトリ直下の transcripts.db, transcript_cache/）を使わない
+    monkeypatch.setattr(transcript_store, "DEFAULT_DB_PATH", str(tmp_path / "transcripts.db"))
+    monkeypatch.setattr(transcript_store, "_default_store", None)
+    monkeypatch.setattr(transcript_cache, "DEFAULT_CACHE_DIR", str(tmp_path / "transcript_cache"))
+    monkeypatch.setattr(transcript_cache, "_default_cache", None)
+    # configure_backend の設定を次のテストに残さない
+    monkeypatch.setattr(audio2text, "_backend_options", {})
+    yield
+    if transcript_store._default_store is not None:
+        transcript_store._default_store.close()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+キャッシュを使った文字起こし（models/audio2text.py の transcribe_details）のテスト
+
+モデルの代わりに stub バックエンドを使う。
+"""
+
+import numpy as np
+
+from models import audio2text, instrumentation
+from models.transcript_cache import TranscriptCache
+
+SAMPLE_RATE = 16000
+
+
+def _speech_then_silence():
+    # 1 秒の雑音（発話の代わり）のあとに 2 秒の無音
+    noise = np.random.default_rng(0).uniform(-0.3, 0.3, SAMPLE_RATE).astype(np.float32)
+    return np.concatenate([noise, np.zeros(2 * SAMPLE_RATE, dtype=np.float32)])
+
+
+def test_vad_report_is_kept_in_details_and_cache(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    samples = _speech_then_silence()
+    with instrumentation.get_instrumentation().run("transcribe"):
+        details = audio2text.transcribe_details(samples, cache=cache, backend="stub", vad=True)
+    report = details["vad"]
+    assert report["original_seconds"] == 3.0
+    assert report["saved_seconds"] > 1.0
+
+    # 処理時間のパネルに渡す集計にも入る
+    summary = instrumentation.get_instrumentation().recent_runs()[-1]
+    assert summary["vad_saved_seconds"] == report["saved_seconds"]
+
+    cached = audio2text.transcribe_details(samples, cache=cache, backend="stub", vad=True)
+    assert cached["cached"]
+    assert cached["vad"]["saved_seconds"] == report["saved_seconds"]
+
+
+def test_no_vad_report_without_vad(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    details = audio2text.transcribe_details(_speech_then_silence(), cache=cache, backend="stub")
+    assert details["vad"] is None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+フォルダ内の音声ファイルの一括文字起こし（batch_transcribe.py）のテスト
+"""
+
+import os
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+import batch_transcribe
+
+
+def _write_wav(path, seconds: float = 0.5, frequency: float = 440.0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    t = np.arange(int(16000 * seconds)) / 16000
+    samples = (np.sin(2 * np.pi * frequency * t) * 8000).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(samples.tobytes())
+
+
+def test_output_paths_are_unique_for_same_stem(tmp_path):
+    root = str(tmp_path / "in")
+    paths = [os.path.join(root, "a", "x.wav"), os.path.join(root, "b", "x.wav"), os.path.join(root, "x.wav"),
+             os.path.join(root, "x.mp3")]
+    outputs = [batch_transcribe.output_path_for(p, "out", root) for p in paths]
+    assert len(set(outputs)) == len(paths)
+    assert outputs[0] == os.path.join("out", "a", "x.wav.txt")
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("recordings/**/*.wav", "recordings"),
+    ("recordings/a/*.wav", os.path.join("recordings", "a")),
+    ("*.wav", os.curdir),
+    ("recordings/a/x.wav", os.path.join("recordings", "a")),
+])
+def test_input_root_of_glob(target, expected):
+    assert batch_transcribe.input_root(target) == expected
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg が必要です")
+def test_same_stem_files_are_all_transcribed_and_resumed(tmp_path):
+    root = tmp_path / "in"
+    _write_wav(root / "a" / "x.wav", frequency=440.0)
+    _write_wav(root / "b" / "x.wav", frequency=660.0)
+    _write_wav(root / "x.wav", frequency=880.0)
+    output_dir = str(tmp_path / "out")
+
+    summary = batch_transcribe.run_batch(str(root), output_dir, "whisper-base-mlx", workers=1, backend="stub")
+    assert summary["transcribed"] == 3
+    for relative in ("a/x.wav.txt", "b/x.wav.txt", "x.wav.txt"):
+        assert os.path.isfile(os.path.join(output_dir, relative))
+
+    # 再実行すると、すべて処理済みとして飛ばす
+    summary = batch_transcribe.run_batch(str(root), output_dir, "whisper-base-mlx", workers=1, backend="stub")
+    assert summary["skipped"] == 3
+    assert summary["transcribed"] == 0
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ベンチマークの計測結果の比較（benchmarks/pipeline.py の compare）のテスト
+"""
+
+from benchmarks import pipeline
+
+
+def _report(*results):
+    return {"meta": {}, "results": list(results)}
+
+
+def _measured(stage, median):
+    return {"stage": stage, "params": {}, "runs": [median], "median": median, "min": median, "max": median}
+
+
+def _failed(stage):
+    return {"stage": stage, "params": {}, "runs": [], "error": "RuntimeError: boom"}
+
+
+def test_newly_failing_stage_is_reported_as_failed():
+    rows = pipeline.compare(_report(_measured("save", 0.1)), _report(_failed("save")))
+    assert [row["status"] for row in rows] == ["failed"]
+    assert rows[0]["error"] == "RuntimeError: boom"
+
+
+def test_main_exits_with_error_when_a_stage_fails(tmp_path):
+    import json
+
+    base, new = tmp_path / "base.json", tmp_path / "new.json"
+    base.write_text(json.dumps(_report(_measured("save", 0.1), _measured("load", 0.1))))
+    new.write_text(json.dumps(_report(_failed("save"), _measured("load", 0.1))))
+    assert pipeline.main(["compare", str(base), str(new)]) == 1
+    new.write_text(json.dumps(_report(_measured("save", 0.1), _measured("load", 0.1))))
+    assert pipeline.main(["compare", str(base), str(new)]) == 0
+
+
+def test_stage_without_baseline_is_missing():
+    rows = pipeline.compare(_report(), _report(_measured("save", 0.1), _failed("load")))
+    assert [row["status"] for row in rows] == ["missing", "missing"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+長い音声の窓ごとの文字起こし（models/chunked.py）のテスト
+
+モデルの代わりに、音声に埋め込んだ時刻から「1 秒に 1 語、4 語で 1 区間」の文字起こし結果を作る関数を使う。
+窓の末尾で切れた語は "<w29?" のように聞き誤る（実際のモデルでも、切れた発話は別の文字列になる）。
+"""
+
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+from models import chunked
+
+SAMPLE_RATE = 16000
+AUDIO_SECONDS = 75
+WORDS_PER_SEGMENT = 4
+# 最後の語が音声の末尾までに終わるようにする
+NUM_WORDS = AUDIO_SECONDS - 1
+
+
+def _write_clock_wav(path):
+    # 各サンプルの値を、先頭からの時刻（10 ミリ秒単位）にする
+    samples = (np.arange(AUDIO_SECONDS * SAMPLE_RATE) // 160).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+
+def _fake_transcribe(samples):
+    window_start = round(float(samples[0]) * 32768) / 100
+    window_end = window_start + len(samples) / SAMPLE_RATE
+    segments = []
+    for first in range(0, NUM_WORDS, WORDS_PER_SEGMENT):
+        last = min(first + WORDS_PER_SEGMENT, NUM_WORDS)
+        # 語 k は k + 0.5 秒から 1 秒間。窓の先頭より前に始まった語は聞こえず、窓の末尾で切れた語は聞き誤る
+        words = [f"<w{k}" + ("?" if k + 1.5 > window_end else ">") for k in range(first, last)
+                 if window_start <= k + 0.5 < window_end]
+        if words:
+            segments.append({"start": max(first + 0.5, window_start) - window_start,
+                             "end": min(last + 0.5, window_end) - window_start,
+                             "text": "".join(words)})
+    return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+@pytest.mark.parametrize("codec", ["wav", "flac"])
+def test_window_boundaries_do_not_duplicate_or_cut_text(tmp_path, codec):
+    path = tmp_path / "clock.wav"
+    _write_clock_wav(path)
+    if codec == "flac":
+        if shutil.which("ffmpeg") is None:
+            pytest.skip("ffmpeg が必要です")
+        flac_path = tmp_path / "clock.flac"
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-i", str(path), str(flac_path)], check=True)
+        path = flac_path
+
+    committed = []
+    result = chunked.transcribe_chunked(str(path), _fake_transcribe, on_segment=committed.append)
+
+    expected = "".join(f"<w{k}>" for k in range(NUM_WORDS))
+    assert result["text"] == expected
+    assert "".join(segment.text for segment in committed) == expected
+    assert all(segment.is_final for segment in committed)
+    assert result["windows"] >= 3
+    assert result["audio_seconds"] == pytest.approx(AUDIO_SECONDS)
+
+
+def test_short_audio_is_a_single_final_window(tmp_path):
+    path = tmp_path / "short.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(np.zeros(SAMPLE_RATE * 3, dtype=np.int16).tobytes())
+    calls = []
+    result = chunked.transcribe_chunked(
+        str(path), lambda samples: calls.append(len(samples)) or {"segments": [{"start": 0.0, "end": 3.0,
+                                                                                 "text": "hello"}]})
+    assert calls == [SAMPLE_RATE * 3]
+    assert result["text"] == "hello"
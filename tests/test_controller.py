@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+AudioController のジョブ（ワーカースレッドで実行する静的メソッド）のテスト
+
+UI もジョブキューも使わず、ジョブの関数を直接呼ぶ。
+"""
+
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from controller.controller import AudioController
+from models import server_client
+
+
+def _context():
+    return SimpleNamespace(cancel_event=threading.Event(), report_progress=lambda payload: None,
+                           check_cancelled=lambda: None)
+
+
+def test_refine_on_server_records_the_server_model(monkeypatch):
+    monkeypatch.setattr(server_client, "transcribe_samples",
+                        lambda samples, url, model_name=None: {"text": "直した", "model": "mlx:large"})
+    segments = [{"start": 0.0, "end": 1.0, "text": "下書き"}]
+    result = AudioController._refine_job(_context(), np.zeros(16000, dtype=np.float32), segments,
+                                         "whisper-large-v3-turbo", "stub", "http://localhost:0", -0.3)
+    assert result["model"] == "mlx:large"
+    assert result["segments"][0]["text"] == "直した"
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+設定ファイルの読み書き（models/data_model.py）のテスト
+"""
+
+import json
+import os
+
+import pytest
+
+from models import data_model
+from models.data_model import DataModel
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_model, "_stores", {})
+    monkeypatch.setattr(data_model, "CHECK_INTERVAL_SECONDS", 0.0)
+    return DataModel(str(tmp_path / "settings.json"))
+
+
+def _rewrite(path, content):
+    # 更新時刻の分解能が粗いファイルシステムでも、書き換えを検出できるようにする
+    stamp = os.stat(path).st_mtime_ns
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.utime(path, ns=(stamp + 10**9, stamp + 10**9))
+
+
+def test_broken_file_keeps_current_settings(model):
+    model.set("model_name", "x")
+    model.flush()
+    _rewrite(model.settings_path, '{"model_name": "y", ')
+
+    assert model.get("model_name") == "x"
+    with open(model.settings_path, encoding="utf-8") as f:
+        assert f.read() == '{"model_name": "y", '
+
+    # 書き終わったファイルは取り込む
+    _rewrite(model.settings_path, json.dumps({"model_name": "y"}))
+    assert model.get("model_name") == "y"
+
+
+def test_missing_file_is_created_with_defaults(model):
+    with open(model.settings_path, encoding="utf-8") as f:
+        assert json.load(f)["theme"] == "light"
+
+
+def test_direct_edits_survive_external_change(model):
+    model.settings["record_seconds"] = 30
+    _rewrite(model.settings_path, json.dumps({"theme": "dark"}))
+    model.save_settings()
+
+    with open(model.settings_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved == {"theme": "dark", "record_seconds": 30}
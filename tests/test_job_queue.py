@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ジョブキュー（controller/job_queue.py）のテスト
+"""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from controller.job_queue import JobQueue, _JobSignals  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _wait(app, queue, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.is_busy() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert not queue.is_busy()
+
+
+def test_results_are_delivered_without_a_signals_object_per_job(app):
+    queue = JobQueue(max_workers=2)
+    finished, failed = [], []
+
+    def fail(context):
+        raise RuntimeError("boom")
+
+    for i in range(20):
+        queue.submit(lambda context, value: value * 2, i, on_finished=finished.append)
+    queue.submit(fail, on_failed=failed.append)
+    _wait(app, queue)
+
+    assert sorted(finished) == [i * 2 for i in range(20)]
+    assert failed == ["boom"]
+    # シグナルはキューで 1 つだけ（ジョブごとに作って残さない）
+    assert len(queue.findChildren(_JobSignals)) == 1
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+読み込み済みモデルのレジストリ（models/model_registry.py）のテスト
+
+モデルの代わりに、読み込みを止めておける読み込み関数を使う。
+"""
+
+import threading
+
+import pytest
+
+from models.model_registry import ModelRegistry
+
+
+class _Loader:
+    """モデル名を返す読み込み関数（blocked にある名前は release されるまで読み込みを終えない）"""
+
+    def __init__(self, blocked=()):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.blocked = set(blocked)
+
+    def __call__(self, name):
+        self.calls.append(name)
+        if name in self.blocked:
+            self.started.set()
+            assert self.release.wait(5.0)
+        return f"model:{name}"
+
+
+def _in_thread(fn, *args):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn(*args)), daemon=True)
+    thread.start()
+    return thread, results
+
+
+def test_loaded_model_is_available_while_another_loads():
+    loader = _Loader(blocked={"slow"})
+    registry = ModelRegistry(loader, capacity=2)
+    registry.get("fast")
+
+    thread, _ = _in_thread(registry.get, "slow")
+    assert loader.started.wait(5.0)
+    # 読み込み中でも、読み込み済みのモデルの取得と状態の確認は待たされない
+    assert registry.get("fast") == "model:fast"
+    assert not registry.is_loaded("slow")
+    loader.release.set()
+    thread.join(5.0)
+    assert registry.is_loaded("slow")
+
+
+def test_concurrent_gets_load_once():
+    loader = _Loader(blocked={"a"})
+    registry = ModelRegistry(loader, capacity=2)
+    first, first_results = _in_thread(registry.get, "a")
+    assert loader.started.wait(5.0)
+    second, second_results = _in_thread(registry.get, "a")
+    loader.release.set()
+    first.join(5.0)
+    second.join(5.0)
+    assert first_results == second_results == ["model:a"]
+    assert loader.calls == ["a"]
+
+
+def test_leased_model_is_closed_after_return():
+    closed = []
+    registry = ModelRegistry(_Loader(), capacity=1, on_evict=closed.append)
+    with registry.lease("a") as model:
+        registry.get("b")
+        # 文字起こし中のモデルは、破棄されても閉じない
+        assert not registry.is_loaded("a")
+        assert closed == []
+    assert closed == [model]
+
+    registry.evict("b")
+    assert closed == [model, "model:b"]
+
+
+def test_failed_load_is_reported_and_retried():
+    attempts = []
+
+    def loader(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise RuntimeError("load failed")
+        return name
+
+    registry = ModelRegistry(loader)
+    with pytest.raises(RuntimeError):
+        registry.get("a")
+    assert registry.get("a") == "a"
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+保存ファイル名の決定（models/naming.py, save.get_unique_filename）のテスト
+"""
+
+import os
+
+from models import naming, save
+
+
+def test_get_unique_filename_does_not_create_files(tmp_path):
+    (tmp_path / "result.txt").write_text("x")
+    assert save.get_unique_filename(str(tmp_path)) == "result(1).txt"
+    assert save.get_unique_filename(str(tmp_path)) == "result(1).txt"
+    assert sorted(os.listdir(tmp_path)) == ["result.txt"]
+
+
+def test_get_unique_filename_skips_files_created_after_indexing(tmp_path):
+    assert save.get_unique_filename(str(tmp_path), "a", "wav") == "a.wav"
+    (tmp_path / "a.wav").write_text("x")
+    assert save.get_unique_filename(str(tmp_path), "a", "wav") == "a(1).wav"
+
+
+def test_claimed_save_paths_are_unique(tmp_path):
+    paths = [save._claim_save_path("result.txt", str(tmp_path), "txt", "sequential") for _ in range(3)]
+    assert [os.path.basename(p) for p in paths] == ["result.txt", "result(1).txt", "result(2).txt"]
+    assert all(os.path.exists(p) for p in paths)
+
+
+def test_timestamp_and_uuid_names_are_not_indexed(tmp_path, monkeypatch):
+    monkeypatch.setattr(naming.time, "strftime", lambda fmt: "20250601-153012")
+    folder = str(tmp_path)
+    index = naming.get_folder_index(folder)
+    names = [naming.claim_filename(folder, scheme="timestamp") for _ in range(2)]
+    names.append(naming.claim_filename(folder, scheme="uuid"))
+    # 同じ秒に重なっても別の名前になり、索引は増えない
+    assert names[:2] == ["result_20250601-153012.txt", "result_20250601-153012(1).txt"]
+    assert len(set(names)) == 3
+    assert len(index) == 0
+    assert naming.unique_filename(folder, scheme="timestamp") == "result_20250601-153012(2).txt"
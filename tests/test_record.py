@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+メモリ上への録音（record.record_audio_array）のテスト
+"""
+
+import shutil
+
+import pytest
+
+from models import record
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg が必要です")
+
+
+def test_records_requested_length():
+    samples = record.record_audio_array(0.5, source=record.sine_input(sample_rate=16000))
+    assert len(samples) == 8000
+
+
+def test_ffmpeg_failure_raises_with_stderr(tmp_path):
+    # マイクが無い・使用中の場合と同じく、ffmpeg が入力を開けずに終了する
+    missing = str(tmp_path / "missing.wav")
+    with pytest.raises(RuntimeError, match="missing.wav"):
+        record.record_audio_array(0.5, source=record.file_input(missing))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+セッションの状態遷移（controller/session_manager.py）のテスト
+
+ジョブは実行せず、JobQueue の代わりに投入されたジョブを記録するだけのキューを使う。
+"""
+
+import numpy as np
+import pytest
+
+from controller.session_manager import SessionManager
+
+
+class _RecordingQueue:
+    """submit されたジョブのコールバックを記録する（ジョブは実行しない）"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.jobs.append(kwargs)
+        return len(self.jobs)
+
+    def cancel(self, job_id):
+        return False
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SessionManager(_RecordingQueue(), root=str(tmp_path))
+
+
+def _recorded_session(manager):
+    session = manager.create()
+    manager.run(session, "record", lambda context: None)
+    manager.job_queue.jobs[-1]["on_finished"](np.zeros(16000, dtype=np.float32))
+    session.samples = np.zeros(16000, dtype=np.float32)
+    manager.current = session
+    return session
+
+
+@pytest.mark.parametrize("lane, state", [("transcribe", "transcribing"), ("save", "saving")])
+def test_failed_session_with_samples_can_be_retried(manager, lane, state):
+    session = _recorded_session(manager)
+    manager.run(session, lane, lambda context: None)
+    manager.job_queue.jobs[-1]["on_failed"]("error")
+    assert session.state == "failed"
+    # 表示中のセッションは片付けられず、録音が残っているのでやり直せる
+    assert manager.get(session.id) is session
+    assert session.can_transition(state)
+    manager.run(session, lane, lambda context: None)
+    assert session.state == state
+
+
+def test_failed_recording_cannot_be_retried(manager):
+    session = manager.create()
+    manager.run(session, "record", lambda context: None)
+    manager.current = session
+    manager.job_queue.jobs[-1]["on_failed"]("error")
+    assert session.state == "failed"
+    assert not session.can_transition("transcribing")
+    with pytest.raises(ValueError):
+        session.transition("transcribing")
+
+
+def test_transcript_text_is_one_line_per_segment(manager):
+    session = manager.create()
+    session.set_transcript({"text": " こんにちは。 元気です。", "segments": [
+        {"start": 0.0, "end": 1.0, "text": " こんにちは。"}, {"start": 1.0, "end": 2.0, "text": " 元気です。"}]})
+    # 画面の表示（1 区間 1 行）と同じテキストを保存する
+    assert session.text == "こんにちは。\n元気です。\n"
+    assert session.details["text"] == session.text
+    with open(session.transcript_path, encoding="utf-8") as f:
+        assert f.read() == session.text
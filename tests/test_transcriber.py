@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文字起こしバックエンドの共通処理（models/transcriber.py の transcribe_batch）のテスト
+"""
+
+import numpy as np
+
+from models.audio_io import SAMPLE_RATE
+from models.transcriber import FALLBACK_TEMPERATURES, _BaseTranscriber, _clip_result
+
+
+class _FakeTranscriber(_BaseTranscriber):
+    """温度 0 では繰り返し（圧縮率の高いテキスト）を返し、温度を上げると正しく認識するバックエンド"""
+
+    backend = "fake"
+
+    def __init__(self, batch_size: int) -> None:
+        super().__init__("fake", batch_size=batch_size)
+        self.calls = []
+
+    def transcribe(self, audio, **decode_options):
+        self.calls.append(("transcribe", 1, None))
+        return {"text": "full", "segments": [{"start": 0.0, "end": 1.0, "text": "full"}], "language": "ja"}
+
+    def _decode_clips(self, clips, decode_options):
+        temperature = decode_options["temperature"]
+        self.calls.append(("decode", len(clips), temperature))
+        text = "あいう" * 50 if temperature == 0.0 else "こんにちは"
+        return [_clip_result(text, len(clip) / SAMPLE_RATE, -0.2, 0.01, "ja", temperature) for clip in clips]
+
+
+def _clip(seconds: float = 1.0):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_single_clip_uses_same_path_as_a_batch():
+    # 1 つだけ渡しても、他の音声と一緒に渡しても同じ方法でデコードする（届いたタイミングで結果が変わらない）
+    alone = _FakeTranscriber(batch_size=4).transcribe_batch([_clip()])
+    together = _FakeTranscriber(batch_size=4).transcribe_batch([_clip(), _clip(2.0)])
+    assert alone[0]["text"] == together[0]["text"] == "こんにちは"
+    assert alone[0]["segments"][0].keys() == together[0]["segments"][0].keys()
+
+
+def test_batched_decoding_falls_back_to_higher_temperature():
+    transcriber = _FakeTranscriber(batch_size=4)
+    results = transcriber.transcribe_batch([_clip(), _clip()])
+    assert transcriber.calls == [("decode", 2, FALLBACK_TEMPERATURES[0]), ("decode", 2, FALLBACK_TEMPERATURES[1])]
+    assert [r["segments"][0]["temperature"] for r in results] == [FALLBACK_TEMPERATURES[1]] * 2
+
+
+def test_batch_size_one_transcribes_each_audio():
+    transcriber = _FakeTranscriber(batch_size=1)
+    results = transcriber.transcribe_batch([_clip(), _clip()])
+    assert [r["text"] for r in results] == ["full", "full"]
+    assert all(call[0] == "transcribe" for call in transcriber.calls)
+
+
+def test_long_audio_is_transcribed_whole():
+    transcriber = _FakeTranscriber(batch_size=4)
+    results = transcriber.transcribe_batch([_clip(), _clip(31.0)])
+    assert [r["text"] for r in results] == ["こんにちは", "full"]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文字起こしストア（models/transcript_store.py）とハッシュの計算（models/audio2text.py）のテスト
+"""
+
+import numpy as np
+
+from models import audio2text
+from models.transcript_cache import TranscriptCache
+from models.transcript_store import TranscriptStore
+
+
+def test_import_counts_only_inserted_rows(tmp_path):
+    store = TranscriptStore(str(tmp_path / "transcripts.db"))
+    try:
+        row = store._row("a", None, None, None, None, None, None, str(tmp_path / "a.txt"), 0.0)
+        assert store._insert_many([row]) == 1
+        other = store._row("b", None, None, None, None, None, None, str(tmp_path / "b.txt"), 0.0)
+        assert store._insert_many([row, other]) == 1
+        assert len(store) == 2
+    finally:
+        store.close()
+
+
+def test_hash_is_skipped_only_when_not_needed(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(TranscriptCache, "hash_array", staticmethod(lambda samples: calls.append(1) or "h"))
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    samples = np.zeros(16000, dtype=np.float32)
+
+    audio2text.samples_to_text(samples, cache=cache, use_cache=False, backend="stub")
+    assert calls == []
+    details = audio2text.transcribe_details(samples, cache=cache, use_cache=False, backend="stub")
+    assert details["audio_hash"] == "h"
+
+
+def test_short_terms_match_percent_and_underscore_literally(tmp_path):
+    store = TranscriptStore(str(tmp_path / "transcripts.db"))
+    try:
+        percent = store.add("達成率は100%です")
+        underscore = store.add("変数名はa_bです")
+        store.add("100点とabです")
+        assert [hit.id for hit in store.search("0%")] == [percent]
+        assert [hit.id for hit in store.search("a_")] == [underscore]
+    finally:
+        store.close()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+常時録音（record.WarmCapture）のテスト
+
+マイクの代わりに lavfi のサイン波（実時間で生成）を入力にする。
+"""
+
+import shutil
+import time
+
+import numpy as np
+import pytest
+
+from models import record
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg が必要です")
+
+SAMPLE_RATE = 16000
+FREQUENCY = 440.0
+PRE_ROLL = 0.5
+
+
+@pytest.fixture
+def capture():
+    # 16kHz で生成してリサンプリングを挟まず、サンプル同士の関係がサイン波の式どおりになるようにする
+    capture = record.WarmCapture(record.sine_input(FREQUENCY, sample_rate=SAMPLE_RATE, realtime=True),
+                                 sample_rate=SAMPLE_RATE, pre_roll=PRE_ROLL).start()
+    # リングバッファが直前の音声で埋まるまで待つ
+    deadline = time.monotonic() + 10.0
+    while len(capture.buffer) < capture.buffer.capacity and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield capture
+    capture.stop()
+
+
+def _sine_residual(samples: np.ndarray) -> np.ndarray:
+    """サイン波なら x[n-1] + x[n+1] = 2cos(ω)x[n] が成り立つので、その誤差を返す（抜け・重なりがあると大きくなる）"""
+    omega = 2 * np.pi * FREQUENCY / SAMPLE_RATE
+    return np.abs(samples[:-2] + samples[2:] - 2 * np.cos(omega) * samples[1:-1])
+
+
+def test_clip_includes_pre_roll(capture):
+    clip = capture.start_clip(0.2)
+    assert clip.pre_roll_samples == int(PRE_ROLL * SAMPLE_RATE)
+    # 録音開始の時点で直前の音声はもう録音に入っている
+    assert len(clip) == clip.pre_roll_samples
+    assert clip.wait(10.0)
+    samples = clip.stop()
+    assert len(samples) == int((0.2 + PRE_ROLL) * SAMPLE_RATE)
+
+
+def test_no_gap_or_overlap_at_clip_boundary(capture):
+    clip = capture.start_clip(0.2)
+    assert clip.wait(10.0)
+    samples = clip.stop()
+    boundary = clip.pre_roll_samples
+    assert np.abs(samples).max() > 0.05
+    # 直前の音声と録音開始後の音声の境目を含め、全体が 1 つの連続したサイン波になっている
+    residual = _sine_residual(samples[boundary - 50:boundary + 50])
+    assert residual.max() < 2e-3
+    assert _sine_residual(samples).max() < 2e-3
+
+
+def test_stop_returns_clip_array_without_copy(capture, tmp_path):
+    clip = capture.start_clip(0.1, memmap_path=str(tmp_path / "audio.npy"))
+    assert clip.wait(10.0)
+    samples = clip.stop()
+    assert np.shares_memory(samples, clip._out)
+    assert isinstance(samples, np.memmap)
+
+
+def test_first_sample_latency_is_recorded(capture):
+    clip = capture.start_clip(0.1, pre_roll=0.0)
+    assert clip.pre_roll_samples == 0
+    assert clip.wait_first_sample(10.0)
+    assert clip.first_sample_latency is not None
+    assert 0.0 <= clip.first_sample_latency < 1.0
+    clip.stop()
+
+
+def test_record_warm_clip_stops_on_cancel(capture):
+    import threading
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    samples = record.record_warm_clip(capture, 5.0, cancel_event=cancel_event)
+    # 中止してもそれまでの音声（少なくとも直前の音声）は返る
+    assert int(PRE_ROLL * SAMPLE_RATE) <= len(samples) < 5.0 * SAMPLE_RATE
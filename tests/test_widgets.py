@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+結果表示（window/widgets.py の StatusAndResultWidget）のテスト
+
+表示しているテキストが、保存するテキスト（session_manager.transcript_text）と同じになることを確認する。
+"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from controller.session_manager import transcript_text  # noqa: E402
+from window.widgets import StatusAndResultWidget  # noqa: E402
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.0, "text": " こんにちは。"},
+    {"start": 1.0, "end": 2.0, "text": " 元気です。"},
+]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_displayed_text_matches_saved_text(app):
+    widget = StatusAndResultWidget()
+    details = {"text": " こんにちは。 元気です。", "segments": [dict(segment) for segment in SEGMENTS]}
+    widget.set_result_text(transcript_text(details), details["segments"])
+    assert widget.get_result_text() == transcript_text(details) == "こんにちは。\n元気です。\n"
+
+    # 2 段階の文字起こしで区間を置き換えても、保存するテキストと同じまま
+    details["segments"][0]["text"] = " こんばんは。"
+    widget.replace_segment_text(0, " こんばんは。")
+    assert widget.get_result_text() == transcript_text(details)
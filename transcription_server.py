@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文字起こしサーバー（GUI なし）。1 つの読み込み済みモデルを、同じマシンの複数のアプリ・スクリプトで共有する
+
+使い方
+------
+    python transcription_server.py
+    python transcription_server.py --port 8765 --model whisper-large-v3-turbo --max-batch 8 --max-wait-ms 50
+    python transcription_server.py --batch-decode   # 30 秒以下の音声をまとめて 1 回でデコードする
+
+    # 音声ファイルを送って文字起こしする（ffmpeg で読める形式なら何でもよい）
+    curl --data-binary @recordings/meeting.wav http://127.0.0.1:8765/transcribe
+    # 処理待ちの数・処理速度
+    curl http://127.0.0.1:8765/metrics
+
+API
+---
+- POST /transcribe
+    - 本文: 音声ファイルのバイト列。Content-Type が application/x-float32 の場合は
+      16kHz モノラル float32（リトルエンディアン）のサンプル列（デコードしない）
+    - クエリ: model（モデル名）, language, vad=1（無音を除いて文字起こし）
+    - 結果: "text", "segments", "model", "duration", "decode_seconds", "queue_seconds", "batch_size" などの JSON
+    - 処理待ちが上限に達している場合は 503（Retry-After ヘッダー付き）を返す
+- GET /metrics: 処理待ちの数・処理速度・待ち時間（RequestBatcher.metrics を参照）
+- GET /health: {"status": "ok"}
+
+- 同時に届いた要求は、最初の要求から --max-wait-ms の間に届いた同じモデル・言語のものを
+  --max-batch 件までまとめて 1 回のモデル呼び出し（audio2text.transcribe_batch）にする。
+  デフォルトではその中で 1 件ずつ文字起こしするので、結果はアプリ内で文字起こしした場合と同じになる。
+- --batch-decode を付けると、30 秒以下の音声はまとめて 1 回でデコードする（速いが、結果は音声 1 つにつき
+  1 区間で区間内の時刻が無い）。同時に届いた数によらず 30 秒以下の音声はすべてこの方法になるので、
+  結果が届いたタイミングで変わることはない。
+- 受け付けるのは 127.0.0.1 からの接続だけ（--host で変更できる）。
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Hashable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from models import audio2text
+from models.audio_io import SAMPLE_RATE, load_audio
+from models.data_model import DataModel
+from models.request_batcher import (DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_QUEUE, DEFAULT_MAX_WAIT_SECONDS,
+                                    QueueFullError, RequestBatcher)
+from models.transcript_cache import TranscriptCache
+from models.vad import transcribe_speech_only
+
+# デフォルトの待ち受けアドレス
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 受け付ける音声の大きさの上限（バイト）
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# 1 つの要求の結果を待つ時間の上限(秒)
+REQUEST_TIMEOUT_SECONDS = 600.0
+
+# 生のサンプル列を送るときの Content-Type
+RAW_CONTENT_TYPE = "application/x-float32"
+
+
+class TranscriptionService:
+    """
+    要求をまとめてモデルを呼び出す、文字起こしサーバーの本体（HTTP の処理以外）
+    """
+
+    def __init__(self, model_name: str, backend: str, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait: float = DEFAULT_MAX_WAIT_SECONDS, max_queue: int = DEFAULT_MAX_QUEUE) -> None:
+        self.model_name = model_name
+        self.backend = backend
+        self.started_at = time.time()
+        self.batcher = RequestBatcher(self._process, max_batch_size, max_wait, max_queue)
+
+    def _process(self, key: Hashable, samples_list: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """ワーカースレッドで、同じ key の要求をまとめて文字起こしする"""
+        model_name, language = key
+        options = {"language": language} if language else {}
+        start = time.perf_counter()
+        results = audio2text.transcribe_batch(samples_list, model_name=model_name, backend=self.backend,
+                                              **options)
+        decode_seconds = time.perf_counter() - start
+        for result in results:
+            result["decode_seconds"] = decode_seconds
+            result["batch_size"] = len(samples_list)
+        print(f"{len(samples_list)} 件をまとめて文字起こししました（{decode_seconds:.2f}秒）")
+        return results
+
+    def _submit(self, samples: np.ndarray, model_name: str, language: Optional[str]) -> Dict[str, Any]:
+        future = self.batcher.submit((model_name, language), samples, weight=len(samples) / SAMPLE_RATE)
+        return future.result(timeout=REQUEST_TIMEOUT_SECONDS)
+
+    def transcribe(self, samples: np.ndarray, model_name: Optional[str] = None, language: Optional[str] = None,
+                   vad: bool = False) -> Dict[str, Any]:
+        """
+        音声を文字起こしする（HTTP のスレッドから呼ばれ、結果が出るまで待つ）
+
+        Raises
+        ------
+        QueueFullError
+            処理待ちが上限に達している場合
+        """
+        model_name = model_name or self.model_name
+        start = time.perf_counter()
+        if vad:
+            result = transcribe_speech_only(samples, lambda speech: self._submit(speech, model_name, language))
+        else:
+            result = self._submit(samples, model_name, language)
+        return {
+            "text": result["text"],
+            "segments": audio2text.plain_segments(result.get("segments")),
+            "audio_hash": TranscriptCache.hash_array(samples),
+            "model": audio2text.model_key(model_name, self.backend),
+            "duration": len(samples) / SAMPLE_RATE,
+            "load_seconds": 0.0,
+            "decode_seconds": result.get("decode_seconds", 0.0),
+            "queue_seconds": time.perf_counter() - start - result.get("decode_seconds", 0.0),
+            "batch_size": result.get("batch_size", 0),
+            "vad": result.get("vad"),
+            "cached": False,
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        """処理待ちの数・処理速度などと、サーバーの設定を返す"""
+        return {
+            "model": audio2text.model_key(self.model_name, self.backend),
+            "uptime_seconds": time.time() - self.started_at,
+            "max_batch_size": self.batcher.max_batch_size,
+            "max_wait_seconds": self.batcher.max_wait,
+            **self.batcher.metrics(),
+        }
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+def decode_upload(body: bytes, content_type: str) -> np.ndarray:
+    """
+    送られてきた音声を 16kHz モノラル float32 の配列にする
+
+    Parameters
+    ----------
+    body : bytes
+        POST の本文
+    content_type : str
+        Content-Type（RAW_CONTENT_TYPE ならサンプル列、それ以外は音声ファイルとして ffmpeg で読む）
+    """
+    if content_type.split(";")[0].strip() == RAW_CONTENT_TYPE:
+        if len(body) % 4:
+            raise ValueError("float32 のサンプル列の長さが 4 バイトの倍数ではありません。")
+        return np.frombuffer(body, dtype="<f4").astype(np.float32, copy=False)
+
+    # ffmpeg はパイプからだと形式を判定できないものがあるため、一時ファイルに書いてから読む
+    fd, path = tempfile.mkstemp(prefix="transcription-upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return load_audio(path)
+    finally:
+        os.remove(path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP の要求を TranscriptionService に渡す"""
+
+    service: TranscriptionService
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"不明なパスです: {path}"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            self._send_json(404, {"error": f"不明なパスです: {url.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_UPLOAD_BYTES:
+            self._send_json(400 if length <= 0 else 413, {"error": "音声の大きさが不正です。"})
+            if length > 0:
+                self.close_connection = True
+            return
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        body = self.rfile.read(length)
+        try:
+            samples = decode_upload(body, self.headers.get("Content-Type", ""))
+        except Exception as e:
+            self._send_json(400, {"error": f"音声を読み込めません: {e}"})
+            return
+        if len(samples) == 0:
+            self._send_json(400, {"error": "音声が空です。"})
+            return
+
+        try:
+            result = self.service.transcribe(samples, query.get("model"), query.get("language"),
+                                             vad=query.get("vad") in ("1", "true"))
+        except QueueFullError as e:
+            # 処理待ちが多すぎる間は断り、少し待ってから送り直してもらう
+            self._send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, result)
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 要求ごとのログは出さない（まとめて処理した件数は TranscriptionService が表示する）
+        pass
+
+
+def create_server(service: TranscriptionService, host: str = DEFAULT_HOST,
+                  port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    文字起こしサーバーを作成する（serve_forever() で待ち受けを始める）
+
+    Parameters
+    ----------
+    service : TranscriptionService
+        要求を処理するサービス
+    host : str
+        待ち受けるアドレス
+    port : int
+        待ち受けるポート（0 の場合は空いているポート）
+
+    Returns
+    -------
+    ThreadingHTTPServer
+        作成したサーバー（server_address で実際のポートがわかる）
+    """
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: List[str] = None) -> int:
+    data_model = DataModel()
+    parser = argparse.ArgumentParser(description="文字起こしサーバーを起動します（1 つのモデルを複数のアプリで共有）。")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument("--model", default=data_model.get("model_name", audio2text.DEFAULT_MODEL_NAME),
+                        help="デフォルトのモデル名（要求の model で変えられる。デフォルト: settings.json の model_name）")
+    parser.add_argument("--backend", default=data_model.get("backend", audio2text.DEFAULT_BACKEND),
+                        help="文字起こしのバックエンド（mlx / cpu / stub / auto）")
+    parser.add_argument("--threads", type=int, default=data_model.get("num_threads", 0),
+                        help="推論に使うスレッド数（0 はバックエンドの既定値）")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="1 回のモデル呼び出しにまとめる要求の数の上限")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_SECONDS * 1000,
+                        help="同じ条件の要求を待ってまとめる時間（ミリ秒）")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="処理待ちにできる要求の数の上限（超えたら 503 で断る）")
+    parser.add_argument("--batch-decode", action="store_true",
+                        help="30 秒以下の音声をまとめて 1 回でデコードする（結果は音声 1 つにつき 1 区間になる）")
+    args = parser.parse_args(argv)
+
+    options = {"batch_size": args.max_batch if args.batch_decode else 1}
+    if args.threads:
+        options["num_threads"] = args.threads
+    audio2text.configure_backend(args.backend, **options)
+    # 最初の要求を待たせないよう、モデルを先に読み込んでおく
+    audio2text.preload_model(args.model, args.backend)
+
+    service = TranscriptionService(args.model, args.backend, args.max_batch, args.max_wait_ms / 1000,
+                                   args.max_queue)
+    server = create_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"文字起こしサーバーを起動しました: http://{host}:{port}（終了は Ctrl+C）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
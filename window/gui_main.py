@@ -3,7 +3,10 @@ from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, Q
 from PySide6.QtCore import Qt
 
 # 作成したコンポーネントをインポート
-from window.widgets import RecordingSettingsWidget, ProcessAndSaveWidget, StatusAndResultWidget
+from window.widgets import (
+    RecordingSettingsWidget, ProcessAndSaveWidget, StatusAndResultWidget, TranscriptSearchWidget,
+    PerfPanelWidget
+)
 
 
 class MainWindow(QMainWindow):
@@ -38,9 +41,19 @@ class MainWindow(QMainWindow):
         
         main_layout.addLayout(control_panel_layout)
         
-        # --- 2. ステータスと結果表示エリア (垂直方向) ---
+        # --- 2. ステータスと結果表示エリア (垂直方向) と処理時間のパネル ---
+        result_layout = QHBoxLayout()
         self.status_result = StatusAndResultWidget()
-        main_layout.addWidget(self.status_result)
+        result_layout.addWidget(self.status_result, 2)
+
+        self.perf_panel = PerfPanelWidget()
+        result_layout.addWidget(self.perf_panel, 1)
+
+        main_layout.addLayout(result_layout)
+
+        # --- 3. 保存済みの文字起こしの検索エリア ---
+        self.transcript_search = TranscriptSearchWidget()
+        main_layout.addWidget(self.transcript_search)
         
         # --- リーダーの接続ポイント ---
         # リーダーはここに、ロジッククラス（浅山氏担当）との接続コードを追加します。
@@ -59,12 +72,44 @@ class MainWindow(QMainWindow):
         """エラーメッセージを表示する"""
         self.status_result.set_status(message, is_error=True)
 
-    def display_transcription(self, text: str):
-        """文字起こし結果をテキストエリアに表示する"""
-        self.status_result.set_result_text(text)
+    def display_transcription(self, text: str, segments=None):
+        """文字起こし結果をテキストエリア (と区間の一覧) に表示する"""
+        self.status_result.set_result_text(text, segments)
         # 文字起こし成功時に、保存ボタンなどを有効化する処理が必要ならここに追加
         self.process_save.set_processing_enabled(True)
     
+    def begin_live_transcription(self):
+        """ライブ文字起こしの開始時に結果表示をクリアする"""
+        self.status_result.begin_live_text()
+
+    def show_live_segment(self, text: str, is_final: bool, start: float = 0.0, end: float = 0.0):
+        """ライブ文字起こしの区間を結果表示に追加する（暫定の区間は次で置き換わる）"""
+        self.status_result.append_live_segment(text, is_final, start, end)
+
+    def replace_segment_text(self, row: int, text: str):
+        """表示中の区間のテキストを置き換える（2 段階の文字起こしで下書きを直す）"""
+        self.status_result.replace_segment_text(row, text)
+
+    def set_recording_active(self, active: bool):
+        """録音中は録音ボタンを無効にする"""
+        self.recording_settings.set_recording_active(active)
+
+    def set_busy(self, busy: bool):
+        """バックグラウンドで処理を実行中かどうかを表示に反映する"""
+        self.process_save.set_busy(busy)
+
+    def show_search_results(self, hits):
+        """保存済みの文字起こしの検索結果を表示する"""
+        self.transcript_search.set_results(hits)
+
+    def show_transcript(self, text: str, segments=None):
+        """保存済みの文字起こし結果をテキストエリアに表示する（保存ボタンの状態は変えない）"""
+        self.status_result.set_result_text(text, segments)
+
+    def show_perf_run(self, summary: dict):
+        """処理 1 回分の段階ごとの処理時間を処理時間のパネルに追加する"""
+        self.perf_panel.add_run(summary)
+
     def enable_transcription_ui(self):
         """
         録音完了後に、文字实况と保存ボタンを有効化する
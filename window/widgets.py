@@ -2,9 +2,12 @@ import os
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLineEdit, QLabel, 
-    QTextEdit, QSpinBox, QGroupBox
+    QPlainTextEdit, QSpinBox, QGroupBox,
+    QListWidget, QListWidgetItem, QTableWidget, QTableWidgetItem,
+    QHeaderView, QProgressBar, QTableView, QTabWidget
 )
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtCore import Signal, Qt, QTimer, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
 
 # --- カスタムウィジェット ---
 
@@ -14,6 +17,8 @@ class RecordingSettingsWidget(QGroupBox):
     """
     # 録音開始をリクエストするシグナル (引数: 録音時間[秒])
     recording_start_requested = Signal(int)
+    # 録音しながらの文字起こし(ライブ)をリクエストするシグナル (引数: 録音時間[秒])
+    live_transcription_requested = Signal(int)
 
     def __init__(self, parent=None):
         super().__init__("録音設定と操作", parent)
@@ -34,17 +39,30 @@ class RecordingSettingsWidget(QGroupBox):
         self.record_button.clicked.connect(self._on_record_clicked)
         self.layout.addWidget(self.record_button)
 
+        # 3. ライブ文字起こしボタン (録音しながら文字起こしする)
+        self.live_button = QPushButton("📝 録音しながら文字起こし")
+        self.live_button.clicked.connect(self._on_live_clicked)
+        self.layout.addWidget(self.live_button)
+
     def _on_record_clicked(self):
         """
         録音ボタンがクリックされたときにシグナルを発火させる。
         """
         record_seconds = 10 
         self.recording_start_requested.emit(record_seconds)
+
+    def _on_live_clicked(self):
+        """
+        ライブ文字起こしボタンがクリックされたときにシグナルを発火させる。
+        """
+        record_seconds = int(self.time_label.text())
+        self.live_transcription_requested.emit(record_seconds)
         
     def set_recording_active(self, active: bool):
         """録音中のUI状態を切り替える (リーダーが使用)"""
         self.record_button.setEnabled(not active)
-        self.time_input.setEnabled(not active)
+        self.live_button.setEnabled(not active)
+        self.time_label.setEnabled(not active)
         if active:
             self.record_button.setText("録音中...")
         else:
@@ -59,6 +77,8 @@ class ProcessAndSaveWidget(QGroupBox):
     transcribe_requested = Signal()
     # 結果保存をリクエストするシグナル
     save_requested = Signal()
+    # 実行中の処理の中止をリクエストするシグナル
+    cancel_requested = Signal()
 
     def __init__(self, parent=None):
         super().__init__("文字起こしと保存", parent)
@@ -73,6 +93,12 @@ class ProcessAndSaveWidget(QGroupBox):
         self.save_button = QPushButton("💾 結果をファイルに保存")
         self.save_button.clicked.connect(self.save_requested.emit)
         self.layout.addWidget(self.save_button)
+
+        # 3. 中止ボタン (処理の実行中だけ有効)
+        self.cancel_button = QPushButton("⏹ 中止")
+        self.cancel_button.clicked.connect(self.cancel_requested.emit)
+        self.cancel_button.setEnabled(False)
+        self.layout.addWidget(self.cancel_button)
         
         # 初期状態では無効にしておく (録音完了後に有効化される想定)
         self.set_processing_enabled(False)
@@ -82,11 +108,107 @@ class ProcessAndSaveWidget(QGroupBox):
         self.transcribe_button.setEnabled(enabled)
         self.save_button.setEnabled(enabled)
 
+    def set_busy(self, busy: bool):
+        """処理の実行中は中止ボタンを有効にする (リーダーが使用)"""
+        self.cancel_button.setEnabled(busy)
+
+
+def format_timestamp(seconds: float) -> str:
+    """秒数を "分:秒" (1 時間以上は "時:分:秒") の文字列にする"""
+    seconds = max(int(seconds), 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class SegmentTableModel(QAbstractTableModel):
+    """
+    文字起こしの区間 (開始時刻・テキスト) の一覧を保持するモデル。
+
+    QTableView (行の高さ固定) で表示すると、画面に見えている行だけが描画され、
+    区間の追加も追加した行の分しか計算しないため、数万区間の文字起こしでも軽く動く。
+    """
+    HEADERS = ["時刻", "テキスト"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # (開始時刻[秒], 終了時刻[秒], テキスト)
+        self._segments = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._segments)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        start, end, text = self._segments[index.row()]
+        if role == Qt.DisplayRole:
+            return format_timestamp(start) if index.column() == 0 else text.strip()
+        if role == Qt.ToolTipRole:
+            return f"{format_timestamp(start)} - {format_timestamp(end)}"
+        if role == Qt.UserRole:
+            return start
+        return None
+
+    @staticmethod
+    def _as_row(segment):
+        if isinstance(segment, dict):
+            return (float(segment["start"]), float(segment["end"]), segment["text"])
+        start, end, text = segment
+        return (float(start), float(end), text)
+
+    def set_segments(self, segments):
+        """区間の一覧を置き換える"""
+        self.beginResetModel()
+        self._segments = [self._as_row(segment) for segment in segments]
+        self.endResetModel()
+
+    def append_segments(self, segments):
+        """区間を末尾にまとめて追加する (追加した行だけが通知される)"""
+        rows = [self._as_row(segment) for segment in segments]
+        if not rows:
+            return
+        first = len(self._segments)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._segments.extend(rows)
+        self.endInsertRows()
+
+    def set_segment_text(self, row: int, text: str):
+        """指定した区間のテキストを置き換える"""
+        start, end, _ = self._segments[row]
+        self._segments[row] = (start, end, text)
+        index = self.index(row, 1)
+        self.dataChanged.emit(index, index)
+
+    def segment_text(self, row: int) -> str:
+        return self._segments[row][2]
+
+    def clear(self):
+        self.set_segments([])
+
 
 class StatusAndResultWidget(QWidget):
     """
     現在のステータス表示と文字起こし結果を表示するエリア。
+
+    結果は「テキスト」タブ (全文) と「区間」タブ (開始時刻つきの一覧) の 2 通りで表示する。
+    テキストは区間ごとに 1 行 (1 ブロック) にする。文書の配置はブロック単位で行われるため、
+    区間を追加しても組み直すのは追加した行だけになる。
+    ライブ文字起こしの区間は RENDER_INTERVAL_MS ごとにまとめて末尾に追加する。
     """
+    # 届いた区間をまとめて描画する間隔 (ミリ秒)
+    RENDER_INTERVAL_MS = 50
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
@@ -96,10 +218,35 @@ class StatusAndResultWidget(QWidget):
         self.status_label.setStyleSheet("font-weight: bold; padding: 5px;")
         self.layout.addWidget(self.status_label)
         
-        # 2. 結果表示エリア
-        self.result_text = QTextEdit()
+        # 2. 結果表示エリア (QPlainTextEdit は行単位で配置するため、長い文書でも追加が軽い)
+        self.result_tabs = QTabWidget()
+        self.result_text = QPlainTextEdit()
         self.result_text.setPlaceholderText("文字起こし結果がここに表示されます...")
-        self.layout.addWidget(self.result_text)
+        self.result_tabs.addTab(self.result_text, "テキスト")
+
+        # 3. 区間の一覧 (見えている行だけを描画する。行の高さを固定し、行の追加で全体を測り直さない)
+        self.segment_model = SegmentTableModel(self)
+        self.segment_view = QTableView()
+        self.segment_view.setModel(self.segment_model)
+        self.segment_view.setWordWrap(False)
+        self.segment_view.setShowGrid(False)
+        self.segment_view.setSelectionBehavior(QTableView.SelectRows)
+        self.segment_view.verticalHeader().hide()
+        self.segment_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.segment_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
+        self.segment_view.horizontalHeader().setStretchLastSection(True)
+        self.result_tabs.addTab(self.segment_view, "区間")
+        self.layout.addWidget(self.result_tabs)
+
+        # ライブ文字起こしで暫定テキストが始まる位置
+        self._partial_start = 0
+        # まだ描画していない確定区間と、最新の暫定テキスト
+        self._pending_segments = []
+        self._pending_partial = None
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(self.RENDER_INTERVAL_MS)
+        self._render_timer.timeout.connect(self._render_pending)
 
     def set_status(self, message: str, is_error: bool = False):
         """ステータスメッセージを設定する (リーダーが使用)"""
@@ -109,11 +256,250 @@ class StatusAndResultWidget(QWidget):
             self.status_label.setStyleSheet("font-weight: bold; color: black; padding: 5px;")
         self.status_label.setText(message)
 
-    def set_result_text(self, text: str):
-        """結果テキストを設定する (リーダーが使用)"""
-        self.result_text.setText(text)
-        self.result_text.repaint()
+    def set_result_text(self, text: str, segments=None):
+        """
+        結果テキスト (と区間の一覧) を設定する (リーダーが使用)
+
+        区間があれば 1 区間 1 行で表示する (保存するテキストと同じ形、session_manager.transcript_text を参照)
+        """
+        self._discard_pending()
+        if segments:
+            text = "".join(self._line(segment["text"]) for segment in segments)
+        self.result_text.setPlainText(text)
+        self.segment_model.set_segments(segments or [])
+        self._partial_start = self.result_text.document().characterCount() - 1
         
+    def begin_live_text(self):
+        """ライブ文字起こしの開始時に結果表示をクリアする (リーダーが使用)"""
+        self._discard_pending()
+        self.result_text.clear()
+        self.segment_model.clear()
+        self._partial_start = 0
+
+    def append_live_segment(self, text: str, is_final: bool, start: float = 0.0, end: float = 0.0):
+        """
+        ライブ文字起こしの区間を末尾に追加する (リーダーが使用)
+
+        暫定の区間は灰色で表示し、次の区間が届いたら置き換える。
+        描画は RENDER_INTERVAL_MS ごとにまとめて行う。
+        """
+        if is_final:
+            self._pending_segments.append((start, end, text))
+            self._pending_partial = None
+        else:
+            self._pending_partial = text
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
+    @staticmethod
+    def _line(text: str) -> str:
+        return text.strip() + "\n"
+
+    def _discard_pending(self):
+        self._render_timer.stop()
+        self._pending_segments = []
+        self._pending_partial = None
+
+    def _render_pending(self):
+        """まだ描画していない区間を、前回の暫定テキストを置き換える形で末尾に追加する"""
+        self._render_timer.stop()
+        segments, partial = self._pending_segments, self._pending_partial
+        self._pending_segments = []
+        self._pending_partial = None
+
+        # 末尾を表示していた場合だけ、追加後も末尾までスクロールする
+        scroll_bar = self.result_text.verticalScrollBar()
+        follow = scroll_bar.value() >= scroll_bar.maximum()
+
+        cursor = QTextCursor(self.result_text.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(self._partial_start)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.insertText("".join(self._line(text) for _, _, text in segments), QTextCharFormat())
+        self._partial_start = cursor.position()
+        if partial:
+            partial_format = QTextCharFormat()
+            partial_format.setForeground(QColor("gray"))
+            cursor.insertText(partial, partial_format)
+        cursor.endEditBlock()
+        if follow:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+        list_bar = self.segment_view.verticalScrollBar()
+        list_follow = list_bar.value() >= list_bar.maximum()
+        self.segment_model.append_segments(segments)
+        if segments and list_follow:
+            self.segment_view.scrollToBottom()
+
+    def replace_segment_text(self, row: int, text: str):
+        """
+        区間のテキストをその場で置き換える (リーダーが使用)
+
+        2 段階の文字起こしで、下書きの区間を精度の高いモデルの結果で置き換えるのに使う。
+        テキストは区間ごとに 1 行なので、置き換えるのはその行 (ブロック) だけになる。
+        """
+        if self._render_timer.isActive():
+            self._render_pending()
+        if row >= self.segment_model.rowCount():
+            return
+        self.segment_model.set_segment_text(row, text)
+
+        block = self.result_text.document().findBlockByNumber(row)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        start, old_end = cursor.selectionStart(), cursor.selectionEnd()
+        cursor.insertText(text.strip(), QTextCharFormat())
+        if start < self._partial_start:
+            self._partial_start += cursor.position() - old_end
+
     def get_result_text(self) -> str:
         """現在の結果テキストを取得する (リーダー/保存担当が使用)"""
-        return self.result_text.toPlainText()
\ No newline at end of file
+        if self._render_timer.isActive():
+            self._render_pending()
+        return self.result_text.toPlainText()
+
+
+class TranscriptSearchWidget(QGroupBox):
+    """
+    保存済みの文字起こし結果を検索する検索ボックスと、検索結果の一覧。
+    """
+    # 検索をリクエストするシグナル (引数: 検索語)
+    search_requested = Signal(str)
+    # 検索結果が選ばれたときのシグナル (引数: 文字起こしの ID)
+    transcript_selected = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__("保存済みの文字起こしを検索", parent)
+        self.layout = QVBoxLayout(self)
+
+        # 1. 検索ボックス (入力が止まってから検索する)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("検索語を入力 (空白区切りで AND 検索)")
+        self.query_input.setClearButtonEnabled(True)
+        self.layout.addWidget(self.query_input)
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(self._emit_search)
+        self.query_input.textChanged.connect(self._search_timer.start)
+        self.query_input.returnPressed.connect(self._emit_search)
+
+        # 2. 検索結果 (関連の高い順)
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self._on_item_activated)
+        self.result_list.itemClicked.connect(self._on_item_activated)
+        self.layout.addWidget(self.result_list)
+
+    def _emit_search(self):
+        """入力中の検索語で検索をリクエストする"""
+        self._search_timer.stop()
+        self.search_requested.emit(self.query_input.text())
+
+    def _on_item_activated(self, item: QListWidgetItem):
+        """検索結果が選ばれたときにシグナルを発火させる"""
+        self.transcript_selected.emit(item.data(Qt.UserRole))
+
+    def set_results(self, hits):
+        """検索結果を表示する (リーダーが使用)"""
+        self.result_list.clear()
+        for hit in hits:
+            name = os.path.basename(hit.source_path) if hit.source_path else f"#{hit.id}"
+            item = QListWidgetItem(f"{name}: {hit.snippet}")
+            item.setData(Qt.UserRole, hit.id)
+            item.setToolTip(hit.source_path or "")
+            self.result_list.addItem(item)
+
+
+class PerfPanelWidget(QGroupBox):
+    """
+    直近の処理（録音・文字起こし・保存）の段階ごとの処理時間と、実時間係数(RTF)を表示するパネル。
+    """
+    # 表に並べる段階 (instrumentation の区間名, 見出し)
+    STAGES = [
+        ("record", "録音"),
+        ("resample", "変換"),
+        ("model_load", "読込"),
+        ("decode", "デコード"),
+        ("refine", "再認識"),
+        ("save", "保存"),
+    ]
+
+    def __init__(self, max_runs: int = 10, parent=None):
+        super().__init__("処理時間 (直近の実行)", parent)
+        self.layout = QVBoxLayout(self)
+        self.max_runs = max_runs
+
+        # 1. 実時間係数のゲージ (デコード時間 / 音声の長さ、小さいほど速い)
+        gauge_layout = QHBoxLayout()
+        gauge_layout.addWidget(QLabel("RTF:"))
+        self.rtf_gauge = QProgressBar()
+        self.rtf_gauge.setRange(0, 100)
+        self.rtf_gauge.setValue(0)
+        self.rtf_gauge.setFormat("-")
+        gauge_layout.addWidget(self.rtf_gauge)
+        self.layout.addLayout(gauge_layout)
+
+        # 2. 段階ごとの処理時間 [秒] (新しい実行を上に追加する)
+        headers = ["処理", "合計"] + [label for _, label in self.STAGES] + ["キャッシュ", "無音除去"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.layout.addWidget(self.table)
+
+    def add_run(self, summary: dict):
+        """
+        実行 1 回分の計測結果 (instrumentation.Run.summary() の辞書) を先頭に追加する (リーダーが使用)
+
+        最も時間のかかった段階を強調表示する。
+        """
+        stages = summary.get("stages", {})
+        counters = summary.get("counters", {})
+        hits, misses = counters.get("cache_hit", 0), counters.get("cache_miss", 0)
+
+        cells = [summary.get("name", ""), self._format_seconds(summary.get("seconds"))]
+        cells += [self._format_seconds(stages.get(stage)) for stage, _ in self.STAGES]
+        cells.append(f"{hits}/{hits + misses}" if hits + misses else "-")
+        # 無音を除いたことで文字起こしせずに済んだ秒数
+        vad_saved = summary.get("vad_saved_seconds")
+        cells.append(f"{vad_saved:.1f}" if vad_saved is not None else "-")
+
+        self.table.insertRow(0)
+        for column, text in enumerate(cells):
+            item = QTableWidgetItem(text)
+            if column > 0:
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(0, column, item)
+        if summary.get("status") not in (None, "ok"):
+            self.table.item(0, 0).setForeground(QColor("red"))
+            self.table.item(0, 0).setToolTip(f"終了状態: {summary.get('status')}")
+
+        # 最も時間のかかった段階 (ボトルネック) を強調する
+        timed = [(stages[stage], i) for i, (stage, _) in enumerate(self.STAGES) if stages.get(stage)]
+        if timed:
+            _, slowest = max(timed)
+            item = self.table.item(0, 2 + slowest)
+            font = QFont(item.font())
+            font.setBold(True)
+            item.setFont(font)
+            item.setBackground(QColor("#ffe0b2"))
+
+        while self.table.rowCount() > self.max_runs:
+            self.table.removeRow(self.table.rowCount() - 1)
+
+        self._set_rtf(summary.get("real_time_factor"))
+
+    def _set_rtf(self, rtf):
+        """実時間係数のゲージを更新する (1.0 = 音声と同じ長さの時間がかかる)"""
+        if rtf is None:
+            return
+        self.rtf_gauge.setValue(min(int(rtf * 100), 100))
+        self.rtf_gauge.setFormat(f"{rtf:.2f} (実時間の {1 / rtf:.1f} 倍速)" if rtf > 0 else "-")
+
+    @staticmethod
+    def _format_seconds(seconds) -> str:
+        return f"{seconds:.2f}" if seconds else "-"